@@ -0,0 +1,54 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Identifies the filestore solution an SFS node runs, for the
+          testsets of any base class.
+"""
+from redhat_cmd_utils import RHCmdUtils
+
+
+class FilestoreSolution(object):
+    """
+    Mixin for GenericTest testsets that need to know whether an SFS node
+    runs Symantec FileStore or Veritas Access.
+    """
+
+    def identify_filestore_solution(self, node):
+        """
+        Function to identify whether the filestore solution
+        utilised in the deployment is SFS or VA.
+
+        Args:
+            node (str): Connection data file name of the
+                        filestore server name.
+
+        Returns:
+            str. Identifier of filestore solution: VA / SFS.
+        """
+        redhat = RHCmdUtils()
+        # THERE IS NO INDEPENDENT VERSION COMMAND THAT
+        # IDENTIFIES THE SOLUTION INSTALLED. THE SSH
+        # BANNER SEEMS TO BE THE EASIEST IDENTIFIER TO ACCESS.
+        # FIND THE BANNER FILE.
+        find_cmd = \
+            redhat.get_find_cmd("/ -name banner")
+        find_cmd = "/usr{0}".format(find_cmd)
+        # IGNORE ANY UPGRADE RPM DIRS AND FOCUS ON THE LIVE CONFIG
+        find_cmd = \
+            find_cmd + " |{0} -v upgrade".format(redhat.grep_path)
+        stdout, _, _ = \
+            self.run_command(node, find_cmd)
+        self.assertNotEqual([], stdout)
+        # GATHER THE HEADER INFO
+        cat_cmd = redhat.get_cat_cmd(stdout[0])
+        stdout, _, _ = \
+            self.run_command(node, cat_cmd)
+        # BASE DECISION ON BANNER CONTENT.
+        if self.is_text_in_list("Symantec FileStore", stdout):
+            return "SFS"
+        elif self.is_text_in_list("Veritas Access", stdout):
+            return "VA"
+        else:
+            # RAISE AN ASSERTION AS FILESTORE SOLUTION NOT KNOWN
+            self.assertTrue(False,
+                            "Filestore solution not ascertained.")
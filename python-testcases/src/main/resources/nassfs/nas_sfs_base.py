@@ -0,0 +1,902 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Common harness for the naslib integration testsets. The naslib
+          scripts are copied to the MS and run there against the SFS.
+
+"""
+from litp_generic_test import GenericTest
+from filestore_solution import FilestoreSolution
+from naslib_scheduler import schedule, share_fixtures
+import test_constants
+import base64
+import hashlib
+import json
+import os
+import pipes
+import random
+import shutil
+import tarfile
+import tempfile
+import time
+import unittest
+
+# sha1sum style manifest of the scripts synced to the MS, kept next to them
+SCRIPTS_MANIFEST = "naslib_scripts.sha1"
+SCRIPTS_ARCHIVE = "naslib_scripts.tar.gz"
+# manifests already synced during this run, by (MS, remote path)
+_SYNCED_SCRIPTS = {}
+BATCH_SCRIPT = "naslib_batch.py"
+BATCH_RESULT_MARKER = "NASLIB_BATCH_RESULT "
+# tells the resources of this run apart from those of any other run
+RUN_TAG = "%04x" % random.getrandbits(16)
+# filestore solution of every SFS node seen during this run
+_FILESTORE_SOLUTIONS = {}
+SOLUTION_ENV = "NASLIB_FILESTORE_SOLUTION"
+# where the scripts record the SFS resources they create, see naslibtest.py
+LEDGER_ENV = "NASLIB_LEDGER"
+LEDGER_DIR = "naslib_ledgers"
+# file system + cache stacks the scripts lease, see naslib_fixtures.py
+FIXTURE_POOL_ENV = "NASLIB_FIXTURE_POOL"
+FIXTURE_DIR = "naslib_fixtures"
+FIXTURES_SCRIPT = "naslib_fixtures.py"
+# seconds tearDownClass gives a stack still being provisioned before it
+# kills the provision and destroys the pool
+FIXTURE_PROVISION_WAIT_SECS = 600
+FAST_LOGGING_ENV = "NASLIB_FAST_LOGGING"
+SSH_BROKER_ENV = "NASLIB_SSH_BROKER"
+# times the naslib calls of the scripts, see naslib_profile.py
+PROFILE_ENV = "NASLIB_PROFILE"
+# where the benchmarks keep their baselines, see benchmarks/naslib_bench.py
+BENCHMARKS_ENV = "NASLIB_BENCHMARKS"
+BENCHMARKS_DIR = "naslib_benchmarks"
+# host:port of an SFS simulator on the MS, see naslib_sfs_sim.py
+SFS_SIMULATOR_ENV = "NASLIB_SFS_SIMULATOR"
+SFS_SIMULATOR_SCRIPT = "naslib_sfs_sim.py"
+SFS_SIMULATOR_PORT = "2222"
+# seconds a simulator the harness starts has to listen
+SFS_SIMULATOR_START_SECS = 30
+# seeded file systems kept on the SFS between runs, see naslib_golden.py
+GOLDEN_ENV = "NASLIB_GOLDEN"
+GOLDEN_DIR = "naslib_golden"
+GOLDEN_SCRIPT = "naslib_golden.py"
+# the tests the runner selected for each testset, in run order
+_SCHEDULED_TESTS = {}
+# testsets with a fixture pool: an instance to run commands with and the
+# SFS nodes the pool has stacks on
+_FIXTURE_POOLS = {}
+# the same for the testsets with golden images to destroy
+_GOLDEN_IMAGES = {}
+# testsets that started an SFS simulator on the MS: an instance to run
+# commands with and the port it listens on
+_SFS_SIMULATORS = {}
+
+
+def naslib_script(script_name, file_system=False, share=False, cache=False,
+                  snapshot=False, solutions=None, fixture=None):
+    """Declare the script a test runs on the MS and the resources whose
+    names it takes. _test_script runs the declaration by default and the
+    batch runs read it without running the test.
+    Args:
+        script_name. (str) The script file name
+        file_system. (bool) The script takes the file system name
+        share. (bool) The script takes the share name
+        cache. (bool) The script takes the cache name
+        snapshot. (bool) The script takes the snapshot name
+        solutions. (tuple) The filestore solutions, "SFS" or "VA", the
+        script can run against, any if None
+        fixture. (tuple) The file system size, cache size and cache
+        resize, or None, of the stack the script leases from the fixture
+        pool, so it can be provisioned ahead of the test
+
+    Returns:
+        function. The decorator
+    """
+    resources = {"file_system": file_system, "share": share,
+                 "cache": cache, "snapshot": snapshot}
+
+    def decorate(test_method):
+        """Attach the declaration to the test method"""
+        test_method.naslib_script = script_name
+        test_method.naslib_resources = resources
+        test_method.naslib_solutions = solutions
+        test_method.naslib_fixture = fixture
+        return test_method
+    return decorate
+
+
+class NasSfsBase(FilestoreSolution, GenericTest):
+    """
+    Base class for the naslib testsets. It holds the setUp and tearDown
+    every story shares and the helpers to run scripts on the MS.
+    """
+
+    # scripts are run through the persistent agent on the MS, which keeps
+    # naslib and the LITP logging imported between tests
+    use_agent = True
+    agent_script = "naslib_agent.py"
+    # None keeps the run_command default
+    script_timeout_secs = None
+    batch_timeout_secs = 7200
+    # every test works on SFS resources of its own, so tests can overlap;
+    # when False all tests share the same fixed names and must run serially
+    namespace_resources = True
+    # cap on the scripts a parallel batch runs at the same time on one SFS
+    max_parallel_scripts = 4
+    # spread the tests over every SFS node of the deployment rather than
+    # running them all against the first one
+    shard_across_sfs = True
+    # scripts lease their file system and cache from a pool kept for the
+    # whole testset rather than creating them, see naslib_fixtures.py
+    use_fixture_pool = False
+    # the scripts keep their log records in memory and only hand them to
+    # the LITP logging when a test fails
+    fast_logging = False
+    # the scripts attach to one SSH transport per SFS kept by a broker on
+    # the MS, rather than each opening an SSH session
+    ssh_broker = False
+    # the scripts that restore gigabytes of data take it from golden images
+    # kept on the SFS instead of writing it on every run
+    use_golden_images = False
+    # the golden images are destroyed after the testset instead of staying
+    # on the SFS for the next run, which seeds them all over again
+    destroy_golden_images = False
+    # the batch results give the p50, p95 and max duration of every naslib
+    # operation of every test
+    profile_naslib = False
+    # the benchmark scripts save their results as baselines on the MS and
+    # compare them with those of the previous ERIClitpnassfs build
+    benchmark_baselines = False
+    # "host:port" of a naslib_sfs_sim.py the scripts talk to instead of the
+    # SFS nodes of the deployment, None for the real ones. The harness
+    # starts one on 127.0.0.1 of the MS itself
+    sfs_simulator = None
+    # the solution the simulator plays, its --solution
+    sfs_simulator_solution = "SFS"
+
+    def __init__(self, *args, **kwargs):
+        super(NasSfsBase, self).__init__(*args, **kwargs)
+        # the runner makes an instance of every test it selected before
+        # it runs the first of them
+        tests = _SCHEDULED_TESTS.setdefault(type(self), [])
+        if self._testMethodName not in tests:
+            tests.append(self._testMethodName)
+
+    def setUp(self):
+        """
+        Description:
+            Runs before every test
+        Actions:
+            Determine
+                management server,
+                list of all managed nodes
+                location of script src dir
+        Results:
+            Class variables that are required to execute tests
+        """
+        super(NasSfsBase, self).setUp()
+        self.management_server = self.get_management_node_filename()
+        self.nas_server = self.sfs_node_for(self._testMethodName)
+        if self.nas_server is None:
+            self.skipTest("No SFS node runs the filestore solutions %s" %
+                          (self.declared_solutions(self._testMethodName),))
+        self.nas_server_ip, self.nas_server_user, self.nas_server_pw = \
+            self.sfs_credentials(self.nas_server)
+        self.list_managed_nodes = self.get_managed_node_filenames()
+        current_dir = os.path.dirname(os.path.realpath(__file__))
+        self.script_src_dir = os.path.join(current_dir, "scripts")
+        self.remote_path = "/tmp"
+        names = self.resource_names(self._testMethodName)
+        self.test_fs_name = names["fs"]
+        self.test_share_name = names["share"]
+        self.test_cache_name = names["cache"]
+        self.test_snapshot_name = names["snapshot"]
+
+        self.python_path = "/usr/bin/python"
+        self.assertTrue(self.sync_scripts_to_ms(),
+                        "Failed to copy scripts to MS")
+        if self.sfs_simulator:
+            self.start_sfs_simulator()
+        self.provision_next_test()
+
+    def tearDown(self):
+        """
+        Description:
+            Runs after every single test
+        Actions:
+            Delete the resources a test may have left on the SFS
+        Results:
+            The super class prints out diagnostics and variables
+        """
+        # a test whose scripts recorded nothing has nothing to delete
+        if not self.ledger_is_empty():
+            result = self.run_scripts_batch([
+                {"id": "teardown", "script": "test_teardown.py",
+                 "sfs": self.nas_server,
+                 "env": self.job_env(self._testMethodName, self.nas_server),
+                 "argv": self.teardown_params(), "teardown": None}])[0]
+            self.assertTrue(result["passed"],
+                            self.format_batch_result(result))
+        super(NasSfsBase, self).tearDown()
+
+    @classmethod
+    def tearDownClass(cls):
+        """
+        Description:
+            Runs after the last test of the testset
+        Actions:
+            Delete the stacks of the fixture pool and, when asked to, the
+            golden images, stop the SFS simulator the testset started
+        """
+        owner, nodes = _FIXTURE_POOLS.pop(cls, (None, ()))
+        if owner is not None:
+            owner.wait_for_provision()
+        for node in sorted(nodes):
+            _, stderr, exit_code = owner.run_script(
+                owner.script_remote_location(FIXTURES_SCRIPT),
+                ["destroy", owner.fixture_pool_path()] +
+                owner.sfs_credentials(node))
+            if exit_code != 0:
+                owner.log('info', "Fixture pool left on %s:\n%s" %
+                          (node, "\n".join(stderr)))
+        owner, nodes = _GOLDEN_IMAGES.pop(cls, (None, ()))
+        for node in sorted(nodes):
+            _, stderr, exit_code = owner.run_script(
+                owner.script_remote_location(GOLDEN_SCRIPT),
+                ["destroy", os.path.join(owner.remote_path, GOLDEN_DIR)] +
+                owner.sfs_credentials(node))
+            if exit_code != 0:
+                owner.log('info', "Golden images left on %s:\n%s" %
+                          (node, "\n".join(stderr)))
+        owner, port = _SFS_SIMULATORS.pop(cls, (None, None))
+        if owner is not None:
+            # the brackets keep pkill from matching the shell running it
+            owner.run_command(owner.management_server,
+                              "/usr/bin/pkill -f '[%s]%s serve --port %s '" %
+                              (SFS_SIMULATOR_SCRIPT[0],
+                               SFS_SIMULATOR_SCRIPT[1:], port))
+        super(NasSfsBase, cls).tearDownClass()
+
+    def resource_names(self, test_name):
+        """Give the names of the SFS resources a test works with. They are
+        unique to the test and to this run unless namespace_resources is
+        off.
+        Args:
+            test_name. (str) The test method name
+
+        Returns:
+            dict. The file system, share, cache and snapshot names
+        """
+        if not self.namespace_resources:
+            return {"fs": "some_fs", "share": "/vx/some_fs",
+                    "cache": "some_cache", "snapshot": "some_snap"}
+        prefix = "nl%s%s" % (RUN_TAG, hashlib.sha1("%s.%s" % (
+            type(self).__module__, test_name)).hexdigest()[:6])
+        return {"fs": prefix + "_fs", "share": "/vx/%s_fs" % prefix,
+                "cache": prefix + "_cache", "snapshot": prefix + "_snap"}
+
+    def sfs_credentials(self, node):
+        """Give the details the scripts connect to an SFS node with.
+        Args:
+            node. (str) The SFS node filename
+
+        Returns:
+            list. The ip, user and password of the node
+        """
+        return [self.get_node_att(node, "ipv4"),
+                self.get_node_att(node, "username"),
+                self.get_node_att(node, "password")]
+
+    def start_sfs_simulator(self):
+        """Start the SFS simulator sfs_simulator names on the MS and wait
+        for it to listen, unless it is on another host or answers already.
+        The one started is stopped after the testset.
+        """
+        host, _, port = self.sfs_simulator.partition(":")
+        port = port or SFS_SIMULATOR_PORT
+        if host not in ("", "127.0.0.1", "localhost") or \
+                type(self) in _SFS_SIMULATORS:
+            return
+        probe = "/usr/bin/timeout 2 /bin/bash -c '</dev/tcp/127.0.0.1/%s'" \
+            % port
+        _, _, exit_code = self.run_command(self.management_server, probe)
+        if exit_code == 0:
+            return
+        log_path = self.script_remote_location("naslib_sfs_sim.log")
+        self.run_command(
+            self.management_server,
+            "nohup %s %s serve --port %s --solution %s >>%s 2>&1 &" % (
+                self.python_path,
+                self.script_remote_location(SFS_SIMULATOR_SCRIPT), port,
+                self.sfs_simulator_solution, log_path))
+        deadline = time.time() + SFS_SIMULATOR_START_SECS
+        while exit_code != 0 and time.time() < deadline:
+            time.sleep(1)
+            _, _, exit_code = self.run_command(self.management_server,
+                                               probe)
+        self.assertEqual(0, exit_code, "The SFS simulator did not start, "
+                         "see %s on the MS" % log_path)
+        _SFS_SIMULATORS[type(self)] = (self, port)
+
+    def filestore_solution(self, node):
+        """Identify whether an SFS node runs Symantec FileStore or Veritas
+        Access, from the SSH banner as there is no version command for it.
+        It is looked up once per node and run, only when a test needs it,
+        and never with a simulator.
+        Args:
+            node. (str) The SFS node filename
+
+        Returns:
+            str. "SFS" or "VA"
+        """
+        if self.sfs_simulator:
+            return self.sfs_simulator_solution
+        if node in _FILESTORE_SOLUTIONS:
+            return _FILESTORE_SOLUTIONS[node]
+        # reading the banner needs the support user
+        self.assertTrue(self.set_node_connection_data(
+            node, username=test_constants.SFS_SUPPORT_USR,
+            password=test_constants.SFS_SUPPORT_PW))
+        try:
+            solution = self.identify_filestore_solution(node)
+        finally:
+            self.assertTrue(self.set_node_connection_data(
+                node, username=test_constants.SFS_MASTER_USR,
+                password=test_constants.SFS_MASTER_PW))
+        _FILESTORE_SOLUTIONS[node] = solution
+        return solution
+
+    def declared_solutions(self, test_name):
+        """Give the filestore solutions a test declared it runs against.
+        Args:
+            test_name. (str) The test method name
+
+        Returns:
+            tuple. The solutions, None if any will do
+        """
+        return getattr(getattr(self, test_name), "naslib_solutions", None)
+
+    def sfs_nodes(self, solutions=None):
+        """Give the SFS nodes the tests may use.
+        Args:
+            solutions. (tuple) Keep only the nodes running one of these
+            filestore solutions, all of them if None
+
+        Returns:
+            list. The SFS node filenames
+        """
+        nodes = self.get_sfs_node_filenames()
+        if not self.shard_across_sfs:
+            nodes = nodes[:1]
+        if solutions:
+            nodes = [node for node in nodes
+                     if self.filestore_solution(node) in solutions]
+        return nodes
+
+    def sfs_node_for(self, test_name):
+        """Pick the SFS node a test runs against when it runs on its own.
+        The choice only depends on the test name, so tearDown and any
+        rerun use the same node.
+        Args:
+            test_name. (str) The test method name
+
+        Returns:
+            str. The SFS node filename, None if no node fits the test
+        """
+        nodes = self.sfs_nodes(self.declared_solutions(test_name))
+        if not nodes:
+            return None
+        digest = hashlib.sha1("%s.%s" % (type(self).__module__, test_name))
+        return nodes[int(digest.hexdigest(), 16) % len(nodes)]
+
+    def shard_tests(self, test_names):
+        """Spread tests over the SFS nodes, each going to the node with the
+        fewest tests among those running a solution it supports.
+        Args:
+            test_names. (list) The test method names
+
+        Returns:
+            tuple. The node of every test that fits one, by test name, and
+            the names of the tests no node fits
+        """
+        load = dict((node, 0) for node in self.sfs_nodes())
+        shards = {}
+        unplaced = []
+        for test_name in test_names:
+            nodes = self.sfs_nodes(self.declared_solutions(test_name))
+            if not nodes:
+                unplaced.append(test_name)
+                continue
+            node = nodes[0]
+            for candidate in nodes[1:]:
+                if load[candidate] < load[node]:
+                    node = candidate
+            load[node] += 1
+            shards[test_name] = node
+        return shards, unplaced
+
+    def ledger_path(self, test_name):
+        """Give the ledger the scripts of a test record what they create
+        in, so the teardown deletes only that.
+        Args:
+            test_name. (str) The test method name
+
+        Returns:
+            str. The ledger path on the MS
+        """
+        return os.path.join(self.remote_path, LEDGER_DIR, "%s_%s.%s.jsonl" %
+                            (RUN_TAG, type(self).__module__, test_name))
+
+    def ledger_is_empty(self):
+        """Check whether the scripts of the running test recorded nothing,
+        so there is nothing for the teardown script to delete.
+        Returns:
+            bool. True if the ledger on the MS is missing or empty
+        """
+        _, _, exit_code = self.run_command(
+            self.management_server,
+            "/usr/bin/test -s %s" % self.ledger_path(self._testMethodName))
+        return exit_code != 0
+
+    def fixture_pool_path(self):
+        """Give the state file of the fixture pool of this testset.
+        Returns:
+            str. The pool path on the MS
+        """
+        return os.path.join(self.remote_path, FIXTURE_DIR, "%s_%s.json" %
+                            (RUN_TAG, type(self).__module__))
+
+    def declared_fixture(self, test_name):
+        """Give the fixture stack a test declared it leases.
+        Args:
+            test_name. (str) The test method name
+
+        Returns:
+            list. The file system size, cache size and cache resize, None
+            if the test leases no stack or there is no fixture pool
+        """
+        fixture = getattr(getattr(self, test_name), "naslib_fixture", None)
+        if not (self.use_fixture_pool and fixture):
+            return None
+        return list(fixture)
+
+    def provision_next_test(self):
+        """Have the fixture stack of the test the runner runs after this
+        one created in the background on the MS, while this one runs. The
+        SFS password goes to the provision on its stdin, out of ps.
+        """
+        declared = self.declared_tests()
+        tests = [name for name in _SCHEDULED_TESTS.get(type(self), [])
+                 if name in declared]
+        if self._testMethodName not in tests:
+            return
+        position = tests.index(self._testMethodName) + 1
+        if position == len(tests):
+            return
+        next_test = tests[position]
+        fixture = self.declared_fixture(next_test)
+        node = self.sfs_node_for(next_test)
+        if fixture is None or node is None:
+            return
+        self.job_env(next_test, node)
+        ip_address, username, password = self.sfs_credentials(node)
+        args = ["provision", self.fixture_pool_path(), ip_address,
+                username] + [size for size in fixture if size]
+        log_path = self.script_remote_location("naslib_provision.log")
+        self.run_command(self.management_server,
+                         "printf '%%s\\n' %s | nohup %s %s %s >>%s 2>&1 &"
+                         % (pipes.quote(password), self.python_path,
+                            self.script_remote_location(FIXTURES_SCRIPT),
+                            " ".join(args), log_path))
+
+    def wait_for_provision(self):
+        """Wait for the stacks provision_next_test has still being created,
+        so the pool is not destroyed under them, and kill the provisions
+        that take longer than FIXTURE_PROVISION_WAIT_SECS.
+        """
+        # the brackets keep pgrep and pkill from matching the shell
+        pattern = "[%s]%s provision %s " % (
+            FIXTURES_SCRIPT[0], FIXTURES_SCRIPT[1:], self.fixture_pool_path())
+        command = ("for i in $(seq %d); do /usr/bin/pgrep -f '%s' "
+                   ">/dev/null || exit 0; sleep 1; done; "
+                   "/usr/bin/pkill -f '%s'"
+                   % (FIXTURE_PROVISION_WAIT_SECS, pattern, pattern))
+        self.run_command(self.management_server, command,
+                         connection_timeout_secs=(
+                             FIXTURE_PROVISION_WAIT_SECS + 60))
+
+    def job_env(self, test_name, node):
+        """Give the environment of the scripts run for a test.
+        Args:
+            test_name. (str) The test method name
+            node. (str) The SFS node the scripts run against
+
+        Returns:
+            dict. The NASLIB_ variables for the job
+        """
+        env = {LEDGER_ENV: self.ledger_path(test_name)}
+        # the banner is only read for the tests that run on some solutions
+        # and for the benchmarks, which label their baselines with it
+        if self.declared_solutions(test_name) or self.benchmark_baselines \
+                or self.sfs_simulator or node in _FILESTORE_SOLUTIONS:
+            env[SOLUTION_ENV] = self.filestore_solution(node)
+        if self.fast_logging:
+            env[FAST_LOGGING_ENV] = "1"
+        if self.ssh_broker:
+            env[SSH_BROKER_ENV] = "1"
+        if self.use_golden_images:
+            env[GOLDEN_ENV] = os.path.join(self.remote_path, GOLDEN_DIR)
+            if self.destroy_golden_images:
+                _, nodes = _GOLDEN_IMAGES.setdefault(type(self),
+                                                     (self, set()))
+                nodes.add(node)
+        if self.profile_naslib:
+            env[PROFILE_ENV] = "1"
+        if self.benchmark_baselines:
+            env[BENCHMARKS_ENV] = os.path.join(self.remote_path,
+                                               BENCHMARKS_DIR)
+        if self.sfs_simulator:
+            env[SFS_SIMULATOR_ENV] = self.sfs_simulator
+        if self.use_fixture_pool:
+            env[FIXTURE_POOL_ENV] = self.fixture_pool_path()
+            _, nodes = _FIXTURE_POOLS.setdefault(type(self), (self, set()))
+            nodes.add(node)
+        return env
+
+    def teardown_params(self, names=None, node=None):
+        """Give the arguments for the teardown script.
+        Args:
+            names. (dict) The resource names, the running test's if None
+            node. (str) The SFS node to delete them from, nas_server if None
+
+        Returns:
+            list. The connection details and the resource names to delete
+        """
+        names = names or self.resource_names(self._testMethodName)
+        return self.sfs_credentials(node or self.nas_server) + [
+            names["fs"], names["share"], names["cache"], names["snapshot"]]
+
+    def script_remote_location(self, script_name):
+        """Give the remote location for for a script, given it's name.
+        Args:
+            script_name. (str) The script file name
+        Returns:
+            str. The script remote location
+        """
+        return os.path.join(self.remote_path, script_name)
+
+    def script_local_location(self, script_name):
+        """Give the local location for for a script, given it's name.
+        Args:
+            script_name. (str) The script file name
+        Returns:
+            str. The script local location
+        """
+        return os.path.join(self.script_src_dir, script_name)
+
+    def local_scripts_manifest(self):
+        """Hash the local scripts.
+        Returns:
+            dict. The sha1 of every script, by path relative to the
+            scripts dir
+        """
+        manifest = {}
+        for root, _, files in os.walk(self.script_src_dir):
+            for name in files:
+                if not name.endswith(".py"):
+                    continue
+                path = os.path.join(root, name)
+                with open(path, "rb") as script:
+                    digest = hashlib.sha1(script.read()).hexdigest()
+                manifest[os.path.relpath(path, self.script_src_dir)] = digest
+        return manifest
+
+    def stale_scripts_on_ms(self, manifest):
+        """Check the scripts on the MS against a manifest, comparing it with
+        the one the last sync left there rather than hashing every script
+        again. The scripts of that manifest since deleted from the MS, by
+        a /tmp cleanup say, count as missing.
+        Args:
+            manifest. (dict) The sha1 of every script, by relative path
+
+        Returns:
+            list. The scripts missing or different on the MS
+        """
+        read_cmd = "cd %s && cat %s 2>/dev/null | while read digest path; " \
+            "do [ -f \"$path\" ] && echo \"$digest  $path\"; done" \
+            % (self.remote_path, SCRIPTS_MANIFEST)
+        stdout, _, _ = self.run_command(self.management_server, read_cmd)
+        remote = {}
+        for line in stdout:
+            digest, _, path = line.partition("  ")
+            remote[path] = digest
+        return sorted(path for path, digest in manifest.items()
+                      if remote.get(path) != digest)
+
+    def sync_scripts_to_ms(self):
+        """Make the scripts on the MS match the local ones. Only changed
+        scripts are pushed, as one archive, and only once per run. The
+        manifest left on the MS lets later runs skip the transfer.
+        Returns:
+            bool. True if successful.
+        """
+        key = (self.management_server, self.remote_path)
+        manifest = self.local_scripts_manifest()
+        if _SYNCED_SCRIPTS.get(key) == manifest:
+            return True
+        stale = self.stale_scripts_on_ms(manifest)
+        if stale:
+            self.log('info', "Syncing %d scripts to %s" %
+                     (len(stale), self.management_server))
+            work_dir = tempfile.mkdtemp()
+            try:
+                manifest_path = os.path.join(work_dir, SCRIPTS_MANIFEST)
+                with open(manifest_path, "w") as manifest_file:
+                    for path, digest in sorted(manifest.items()):
+                        manifest_file.write("%s  %s\n" % (digest, path))
+                archive_path = os.path.join(work_dir, SCRIPTS_ARCHIVE)
+                archive = tarfile.open(archive_path, "w:gz")
+                try:
+                    for path in stale:
+                        archive.add(self.script_local_location(path), path)
+                    archive.add(manifest_path, SCRIPTS_MANIFEST)
+                finally:
+                    archive.close()
+                if not self.copy_file_to(self.management_server,
+                                         archive_path, self.remote_path):
+                    return False
+            finally:
+                shutil.rmtree(work_dir)
+            remote_archive = self.script_remote_location(SCRIPTS_ARCHIVE)
+            _, _, exit_code = self.run_command(
+                self.management_server, "tar -xzf %s -C %s && rm -f %s" %
+                (remote_archive, self.remote_path, remote_archive))
+            if exit_code != 0:
+                return False
+        _SYNCED_SCRIPTS[key] = manifest
+        return True
+
+    def script_command(self, script_path, args):
+        """Build the command line that runs a script on the MS.
+        Args:
+            script_path. (str) The script path on the MS file system
+            args. (list) The arguments for the script
+
+        Returns:
+            str. The command to run on the MS
+        """
+        if self.use_agent:
+            agent_path = self.script_remote_location(self.agent_script)
+            return "%s %s call %s %s" % (self.python_path, agent_path,
+                                         script_path, ' '.join(args))
+        return "%s %s %s" % (self.python_path, script_path, ' '.join(args))
+
+    def run_script(self, script_path, args=None, timeout_secs=None):
+        """Runs a python script.
+        Args:
+           script_path. (str) A string representing a script path on
+           the Ms file
+           system
+           args. (list) A list of args to be passed to the string
+           timeout_secs. (int) The command timeout, script_timeout_secs
+           if None
+
+        Returns:
+            stdout. (list) A list of the standart output
+            stderr. (list) A list of the standart error output
+            exit_code. (int) A integer represeting the exit code
+        """
+        script_cmd = self.script_command(script_path, args or [])
+        kwargs = {}
+        timeout_secs = timeout_secs or self.script_timeout_secs
+        if timeout_secs is not None:
+            kwargs["connection_timeout_secs"] = timeout_secs
+        stdout, stderr, exit_code = self.run_command(self.management_server,
+                                                     script_cmd, **kwargs)
+        return stdout, stderr, exit_code
+
+    def script_params(self, file_system=False, share=False, cache=False,
+                      snapshot=False, names=None, node=None):
+        """Give the arguments for a test script.
+        Args:
+            file_system. (bool) Pass the file system name
+            share. (bool) Pass the share name
+            cache. (bool) Pass the cache name
+            snapshot. (bool) Pass the snapshot name
+            names. (dict) The resource names, the running test's if None
+            node. (str) The SFS node to run against, nas_server if None
+
+        Returns:
+            list. The connection details and the requested resource names
+        """
+        names = names or self.resource_names(self._testMethodName)
+        params = self.sfs_credentials(node or self.nas_server)
+        if file_system:
+            params += [names["fs"]]
+        if share:
+            params += [names["share"]]
+        if cache:
+            params += [names["cache"]]
+        if snapshot:
+            params += [names["snapshot"]]
+        return params
+
+    def declared_script(self, test_name=None):
+        """Give the script a test declared with naslib_script.
+        Args:
+            test_name. (str) The test method name, the running test if None
+
+        Returns:
+            tuple. The script name and the resources it needs
+        """
+        method = getattr(self, test_name or self._testMethodName)
+        return method.naslib_script, dict(method.naslib_resources)
+
+    def declared_tests(self):
+        """Give the tests of this testset that declare a script.
+        Returns:
+            list. The test method names, in run order
+        """
+        names = unittest.TestLoader().getTestCaseNames(type(self))
+        return [name for name in names
+                if hasattr(getattr(self, name), "naslib_script")]
+
+    def batch_job(self, test_name, teardown=True, node=None):
+        """Describe the declared script of a test as a batch job.
+        Args:
+            test_name. (str) The test method name
+            teardown. (bool) Run the teardown script after it
+            node. (str) The SFS node to run against, nas_server if None
+
+        Returns:
+            dict. The job for naslib_batch.py
+        """
+        script_name, resources = self.declared_script(test_name)
+        names = self.resource_names(test_name)
+        node = node or self.nas_server
+        return {"id": test_name, "script": script_name, "sfs": node,
+                "env": self.job_env(test_name, node),
+                "provision": self.declared_fixture(test_name),
+                "argv": self.script_params(names=names, node=node,
+                                           **resources),
+                "teardown": self.teardown_params(names, node)
+                if teardown else None}
+
+    def run_scripts_batch(self, jobs, workers=1):
+        """Runs scripts in a single interpreter on the MS, or in a few
+        worker processes. Jobs against different SFS nodes always overlap.
+        Args:
+            jobs. (list) The jobs for naslib_batch.py
+            workers. (int) How many jobs may run at the same time on one
+            SFS node
+
+        Returns:
+            list. One result per job, with the status, traceback and
+            duration of each test the script ran
+        """
+        args = ["--workers", str(workers)] if workers > 1 else []
+        args.append(base64.b64encode(json.dumps(jobs)))
+        timeout_secs = self.batch_timeout_secs if len(jobs) > 1 else None
+        stdout, stderr, _ = self.run_script(
+            self.script_remote_location(BATCH_SCRIPT), args, timeout_secs)
+        for line in stdout:
+            if line.startswith(BATCH_RESULT_MARKER):
+                return json.loads(line[len(BATCH_RESULT_MARKER):])
+        self.fail("No batch result from the MS:\n%s" %
+                  "\n".join(stdout + stderr))
+
+    @staticmethod
+    def format_batch_result(result):
+        """Describe a batch result for a log or an assertion message.
+        Args:
+            result. (dict) One job result from run_scripts_batch
+
+        Returns:
+            str. The status of the job, the rollsyncs its scripts measured,
+            the naslib calls of its tests when profiled and the tracebacks
+            of its failures
+        """
+        lines = ["%s (%s): %s in %.1fs%s" % (
+            result["id"], result["script"],
+            "passed" if result["passed"] else "FAILED", result["duration"],
+            " on %s" % result["sfs"] if result.get("sfs") else "")]
+        for metric in result.get("metrics", []):
+            if metric["metric"] == "rollsync":
+                lines.append("  rollsync of %s: %.1fs%s" % (
+                    metric["fs"], metric["seconds"],
+                    ", %dM at %.1f MB/s" % (metric["changed_mb"],
+                                            metric["mb_per_sec"])
+                    if "mb_per_sec" in metric else ""))
+        for test in result["tests"]:
+            for operation, stats in sorted(test.get("profile", {}).items()):
+                lines.append("  %s %s: %d calls, p50 %.3fs, p95 %.3fs, "
+                             "max %.3fs, %d ssh" % (
+                                 test["name"], operation, stats["calls"],
+                                 stats["p50"], stats["p95"], stats["max"],
+                                 stats["ssh"]))
+        for test in result["tests"] + result.get("teardown", []):
+            if test["traceback"]:
+                lines.append("%s %s\n%s" % (test["name"], test["status"],
+                                             test["traceback"]))
+        return "\n".join(lines)
+
+    def _test_script(self, script_name=None, **resources):
+        """Runs a python test file on the MS
+        Args:
+            script_name. (str) The script's name, the one the running test
+            declared with naslib_script if None
+            resources. (bool) file_system, share, cache and snapshot flags
+            selecting the resource names passed to the script
+
+        Returns:
+            dict. The batch result of the script
+        """
+        if script_name is None:
+            script_name, resources = self.declared_script()
+        result = self.run_scripts_batch([
+            {"id": self._testMethodName, "script": script_name,
+             "sfs": self.nas_server,
+             "env": self.job_env(self._testMethodName, self.nas_server),
+             "argv": self.script_params(**resources), "teardown": None}])[0]
+        self.assertTrue(result["passed"], self.format_batch_result(result))
+        return result
+
+    def log_sfs_summary(self, results):
+        """Log how the batch results were spread over the SFS nodes.
+        Args:
+            results. (list) The batch results
+        """
+        by_node = {}
+        for result in results:
+            by_node.setdefault(result.get("sfs"), []).append(result)
+        for node, node_results in sorted(by_node.items()):
+            self.log('info', "%s (%s): %d scripts, %d failed, %.1fs" % (
+                node, _FILESTORE_SOLUTIONS.get(node, "?"), len(node_results),
+                len([result for result in node_results
+                     if not result["passed"]]),
+                sum(result["duration"] for result in node_results)))
+
+    def _test_declared_scripts_batch(self, parallel=False):
+        """Runs the declared script of every test of this testset on the
+        MS, each followed by the teardown script. The tests are grouped by
+        fixture state, those of a group share one fixture pool stack, and
+        sharded over the SFS nodes, which work through their share at the
+        same time.
+        Args:
+            parallel. (bool) Run up to max_parallel_scripts at a time on
+            each SFS node, which needs namespace_resources
+
+        Returns:
+            list. The batch results
+        """
+        workers = 1
+        if parallel:
+            self.assertTrue(self.namespace_resources,
+                            "Tests sharing resource names cannot overlap")
+            workers = self.max_parallel_scripts
+        # tests needing the same fixture state run one after the other
+        plan = schedule(self, self.declared_tests())
+        for line in plan.report():
+            self.log('info', line)
+        shards, unplaced = self.shard_tests(plan.order)
+        for test_name in unplaced:
+            self.log('info', "%s skipped, no SFS node runs %s" %
+                     (test_name, self.declared_solutions(test_name),))
+        jobs = [self.batch_job(name, node=shards[name])
+                for name in plan.order if name in shards]
+        leasing, grouped = share_fixtures(jobs)
+        self.log('info', "fixture stacks: %d tests lease one, %d builds "
+                 "grouped, %d saved" % (leasing, grouped, leasing - grouped))
+        results = self.run_scripts_batch(jobs, workers)
+        for result in results:
+            self.log('info', self.format_batch_result(result))
+        self.log_sfs_summary(results)
+        builds = [result["fixture_builds"] for result in results
+                  if "fixture_builds" in result]
+        if builds:
+            self.log('info', "fixture stacks built by the pool: %d" %
+                     max(builds))
+        failed = [result for result in results if not result["passed"]]
+        self.assertEqual([], failed, "\n".join(
+            self.format_batch_result(result) for result in failed))
+        return results
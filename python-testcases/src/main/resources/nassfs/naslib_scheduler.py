@@ -0,0 +1,136 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Orders the naslib tests of a testset so the tests needing the
+          same SFS fixture state run one after the other.
+
+The fixture state of a test comes from its naslib_script declaration: the
+resources the script takes and the fixture pool stack it leases. Tests are
+selected by their @attr tags.
+
+The tests of a group leasing a fixture pool stack share it: each hands it
+back wiped to the next, on the same SFS node, and the stack is retired
+after the last of them, see naslib_fixtures.py. The stack is so built once
+per group and node instead of once per test, which the report counts. The
+tests without a pool stack still create their own resources.
+
+"""
+
+# the states in the order the groups run, simplest first
+FIXTURE_STATES = ("none", "cache", "fs", "fs+share", "fs+cache",
+                  "fs+cache+snapshot", "fs+share+cache+snapshot")
+
+
+def test_tags(test_method):
+    """Give the tags @attr set on a test method.
+    Args:
+        test_method. (function) The test method
+
+    Returns:
+        set. The tag names
+    """
+    method = getattr(test_method, "__func__", test_method)
+    return set(name for name, value in vars(method).items() if value is True)
+
+
+def fixture_state(resources, fixture=None):
+    """Name the fixture state a script needs.
+    Args:
+        resources. (dict) The file_system, share, cache and snapshot flags
+        of its declaration
+        fixture. (list) The sizes of the pool stack it leases, if any
+
+    Returns:
+        str. The state, with the stack sizes when it comes from the pool
+    """
+    parts = [name for flag, name in (("file_system", "fs"),
+                                     ("share", "share"), ("cache", "cache"),
+                                     ("snapshot", "snapshot"))
+             if resources.get(flag)]
+    state = "+".join(parts) or "none"
+    if fixture:
+        state += " (pool %s)" % "/".join(size for size in fixture if size)
+    return state
+
+
+def _state_rank(state):
+    """Give the position of a state's group"""
+    base = state.split(" ", 1)[0]
+    if base in FIXTURE_STATES:
+        return FIXTURE_STATES.index(base), state
+    return len(FIXTURE_STATES), state
+
+
+class Schedule(object):
+    """
+    The grouped run order of some tests.
+    """
+
+    def __init__(self, file_order, states):
+        self.file_order = file_order
+        self.states = states
+        self.order = sorted(file_order,
+                            key=lambda name: _state_rank(states[name]))
+
+    def groups(self):
+        """Give the tests of every fixture state, in run order.
+        Returns:
+            list. (state, test names) tuples
+        """
+        groups = []
+        for name in self.order:
+            if groups and groups[-1][0] == self.states[name]:
+                groups[-1][1].append(name)
+            else:
+                groups.append((self.states[name], [name]))
+        return groups
+
+    def report(self):
+        """Describe the groups.
+        Returns:
+            list. The report lines
+        """
+        return ["%-40s %s" % (state, ", ".join(names))
+                for state, names in self.groups()]
+
+
+def share_fixtures(jobs):
+    """Mark the batch jobs after which the pool stack of a group is
+    retired: the last job of every run of jobs on one SFS node leasing the
+    same stack.
+    Args:
+        jobs. (list) The batch jobs, in run order
+
+    Returns:
+        tuple. The jobs leasing a stack and the stacks built for them,
+        one per group and node
+    """
+    by_node = {}
+    for job in jobs:
+        by_node.setdefault(job.get("sfs"), []).append(job)
+    for node_jobs in by_node.values():
+        for job, after in zip(node_jobs, node_jobs[1:] + [None]):
+            job["retire"] = bool(job.get("provision")) and (
+                after is None or after.get("provision") != job["provision"])
+    return (len([job for job in jobs if job.get("provision")]),
+            len([job for job in jobs if job["retire"]]))
+
+
+def schedule(testset, test_names, tags=("all",)):
+    """Group the tests of a testset by fixture state.
+    Args:
+        testset. (NasSfsBase) An instance of the testset
+        test_names. (list) The tests that declare a script, in file order
+        tags. (tuple) Keep only the tests tagged with all of these
+
+    Returns:
+        Schedule. The grouped order
+    """
+    selected = [name for name in test_names
+                if set(tags) <= test_tags(getattr(testset, name))]
+    states = {}
+    for name in selected:
+        _, resources = testset.declared_script(name)
+        states[name] = fixture_state(resources,
+                                     testset.declared_fixture(name))
+    return Schedule(selected, states)
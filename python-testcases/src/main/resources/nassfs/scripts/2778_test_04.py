@@ -15,17 +15,15 @@ class Test04(NaslibTest):
         new_share_name = sys.argv[5]
         client_ip = sys.argv[1]
         with self.connect_to_nfs() as s:
-            s.filesystem.create(new_fs_name, "10M", self.pool_name)
+            new_fs_name, new_cache_name = self.fs_and_cache(
+                s, new_fs_name, new_cache_name, "10M", "10M")
+            # the share goes on the file system that was handed out
+            new_share_name = "/vx/%s" % new_fs_name
             self.assertFalse(s.share.exists(new_share_name, client_ip),
                     "share %s at %s should not exist" % (new_share_name,
                         client_ip))
             s.share.create(new_share_name, client_ip, "ro")
 
-            cache_existence = s.cache.exists(new_cache_name)
-            self.assertFalse(cache_existence,
-                    '%s should not exist' % new_cache_name)
-            s.cache.create(new_cache_name, "10M", self.pool_name)
-
             snap_existence = s.snapshot.exists(new_snap_name)
             self.assertFalse(snap_existence,
                     '%s already exists' % new_snap_name)
@@ -13,27 +13,8 @@ class Test05(NaslibTest):
         new_cache_name = sys.argv[5]
         new_snap_name = sys.argv[6]
         with self.connect_to_nfs() as s:
-            fs_existence = s.filesystem.exists(new_fs_name)
-            self.assertFalse(fs_existence,
-                    '%s already exists' % new_fs_name)
-            new_fs = s.filesystem.create(new_fs_name, "20M", self.pool_name)
-            fs_existence = s.filesystem.exists(new_fs_name)
-            self.assertTrue(fs_existence,
-                    '%s does not exists' % new_fs_name)
-            filesystems = s.filesystem.list()
-            self.assertTrue(len(filesystems) > 0)
-            fs_names = [f.name for f in filesystems]
-            self.assertTrue(new_fs_name in fs_names,
-                    '%s not in %s' % (new_fs.name, fs_names))
-            fs = s.filesystem.get(new_fs_name)
-            self.assertEquals(fs.name, new_fs_name)
-            self.assertEquals(fs.pool.name, self.pool_name)
-
-            cache_existence = s.cache.exists(new_cache_name)
-            self.assertFalse(cache_existence,
-                    '%s should not exist' % new_cache_name)
-            new_cache = s.cache.create(new_cache_name, "10M", self.pool_name)
-            new_cache.resize("20M")
+            new_fs_name, new_cache_name = self.fs_and_cache(
+                s, new_fs_name, new_cache_name, "20M", "10M", "20M")
 
             snap_existence = s.snapshot.exists(new_snap_name)
             self.assertFalse(snap_existence,
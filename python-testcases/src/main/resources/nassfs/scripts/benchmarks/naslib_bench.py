@@ -0,0 +1,162 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Baselines of the naslib benchmarks and their comparison.
+
+A baseline is a JSON file with the ERIClitpnassfs build on the MS, the SFS
+it ran against and the p50, p95 and max seconds of every operation, by
+name such as "filesystem.create@1G", and the bytes measured of any of them
+under "memory". Baselines go to the directory named
+by NASLIB_BENCHMARKS. A benchmark compares its baseline with the latest one
+of another build in there, and so does "compare" with two given files.
+An operation regresses when its p50 got slower by more than the tolerance,
+a fraction, and by more than MIN_DELTA seconds.
+
+Usage:
+    naslib_bench.py compare <old baseline> <new baseline> [--tolerance F]
+"""
+
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+# naslib_profile.py is one directory up
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.realpath(__file__))))
+
+from naslib_profile import percentile
+
+BENCHMARKS_ENV = "NASLIB_BENCHMARKS"
+PACKAGE = "ERIClitpnassfs"
+TOLERANCE = 0.25
+# seconds below which a slowdown is noise
+MIN_DELTA = 0.2
+
+
+def installed_build():
+    """ Gives the version of ERIClitpnassfs installed on this host.
+    """
+    with open(os.devnull, "w") as devnull:
+        try:
+            return subprocess.check_output(
+                ["rpm", "-q", PACKAGE, "--qf", "%{VERSION}-%{RELEASE}"],
+                stderr=devnull).strip()
+        except (OSError, subprocess.CalledProcessError):
+            return "unknown"
+
+
+class Timings(object):
+    """ Seconds of every run of every operation of a benchmark.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        # bytes by operation, for the benchmarks that measure memory
+        self.memory = {}
+
+    def record(self, operation, seconds):
+        self.samples.setdefault(operation, []).append(seconds)
+
+    def timed(self, operation, method, *args, **kwargs):
+        """ Calls method and records its duration under operation.
+        """
+        started = time.time()
+        result = method(*args, **kwargs)
+        self.record(operation, time.time() - started)
+        return result
+
+    def results(self):
+        return dict((operation, {"samples": len(seconds),
+                                 "p50": round(percentile(seconds, 0.5), 4),
+                                 "p95": round(percentile(seconds, 0.95), 4),
+                                 "max": round(max(seconds), 4)})
+                    for operation, seconds in self.samples.items())
+
+
+def save_baseline(benchmark, timings, sfs, solution=None, directory=None):
+    """ Writes the baseline of a benchmark run to directory, NASLIB_BENCHMARKS
+    if None, and gives it with its path, None when there is no directory.
+    """
+    directory = directory or os.environ.get(BENCHMARKS_ENV)
+    baseline = {"benchmark": benchmark, "build": installed_build(),
+                "sfs": sfs, "solution": solution,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": timings.results(), "memory": timings.memory}
+    if not directory:
+        return baseline, None
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    path = os.path.join(directory, "%s_%s_%s.json" % (
+        benchmark, baseline["build"], time.strftime("%Y%m%d%H%M%S")))
+    with open(path, "w") as output:
+        json.dump(baseline, output, indent=1, sort_keys=True)
+    return baseline, path
+
+
+def load_baseline(path):
+    with open(path) as baseline:
+        return json.load(baseline)
+
+
+def previous_baseline(baseline, directory=None):
+    """ Gives the latest baseline of the same benchmark and SFS from
+    another build, None if there is none.
+    """
+    directory = directory or os.environ.get(BENCHMARKS_ENV)
+    if not directory:
+        return None
+    candidates = []
+    for path in glob.glob(os.path.join(directory,
+                                       "%s_*.json" % baseline["benchmark"])):
+        try:
+            other = load_baseline(path)
+        except ValueError:
+            continue
+        if other["build"] != baseline["build"] and \
+                other["sfs"] == baseline["sfs"]:
+            candidates.append((other["created"], other))
+    return max(candidates)[1] if candidates else None
+
+
+def compare(old, new, tolerance=TOLERANCE):
+    """ Compares two baselines. Returns report lines and the operations
+    that regressed.
+    """
+    lines = ["%-32s %10s %10s %8s" % ("operation", old["build"][:10],
+                                      new["build"][:10], "change")]
+    regressions = []
+    for operation in sorted(set(old["results"]) & set(new["results"])):
+        before = old["results"][operation]["p50"]
+        after = new["results"][operation]["p50"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > tolerance and after - before > MIN_DELTA:
+            regressions.append(operation)
+            flag = " REGRESSED"
+        lines.append("%-32s %9.3fs %9.3fs %+7.1f%%%s" % (
+            operation, before, after, 100 * change, flag))
+    return lines, regressions
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    tolerance = TOLERANCE
+    if "--tolerance" in argv:
+        position = argv.index("--tolerance")
+        tolerance = float(argv[position + 1])
+        argv = argv[:position] + argv[position + 2:]
+    if len(argv) != 3 or argv[0] != "compare":
+        sys.stderr.write(__doc__)
+        return 2
+    lines, regressions = compare(load_baseline(argv[1]),
+                                 load_baseline(argv[2]), tolerance)
+    print "\n".join(lines)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
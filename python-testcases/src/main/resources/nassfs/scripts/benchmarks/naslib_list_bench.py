@@ -0,0 +1,246 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Latency and memory of listing and looking up file systems, shares
+and snapshots as their number grows.
+
+The SFS is populated in steps up to every count of NASLIB_BENCH_COUNTS,
+comma separated, with one file system, one share of it and one snapshot of
+it on a common cache per count. At each step list(), exists() of the last
+one created and of a missing one and get() of the last one are timed
+NASLIB_BENCH_ROUNDS times for every kind, and the bytes the items list()
+gives back hold are measured. The results are saved as a baseline and
+compared with the last one of another ERIClitpnassfs build, see
+naslib_bench.py, and the cost of every extra object is reported so a
+listing that grows faster than linearly shows.
+
+Usage:
+    naslib_list_bench.py <ip> <user> <password> <fs name> <cache name>
+        <snapshot name>
+"""
+
+import os
+import Queue
+import resource
+import sys
+import threading
+import time
+import traceback
+import unittest
+
+# the benchmarks import the scripts next to them and one directory up, also
+# when naslib_batch.py loads them
+BENCH_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path[:0] = [BENCH_DIR, os.path.dirname(BENCH_DIR)]
+
+from naslibtest import NaslibTest
+from naslib_teardown import TeardownExecutor, plan
+from naslib_bench import Timings, compare, previous_baseline, save_baseline
+
+from naslib.nasexceptions import DoesNotExist
+
+COUNTS_ENV = "NASLIB_BENCH_COUNTS"
+ROUNDS_ENV = "NASLIB_BENCH_ROUNDS"
+DEFAULT_COUNTS = "10,100,500,1000"
+DEFAULT_ROUNDS = 5
+FS_SIZE = "10M"
+CACHE_SIZE = "1G"
+# connections creating the objects at the same time
+POPULATE_WORKERS = 3
+# the marginal cost of an object may grow by as much before it is reported
+SUPERLINEAR = 2.0
+KINDS = ("filesystem", "share", "snapshot")
+
+
+def footprint(value, seen=None):
+    """ Bytes held by a value and the plain data and containers it refers
+    to. Of an object only its attributes are counted, and not the objects
+    they refer to, such as the connection every naslib item has.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += footprint(key, seen) + footprint(item, seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for item in value:
+            size += footprint(item, seen)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        size += sys.getsizeof(vars(value))
+        for item in vars(value).values():
+            if isinstance(item, (basestring, int, long, float, bool,
+                                 type(None), dict, list, tuple)):
+                size += footprint(item, seen)
+    return size
+
+
+def marginal_costs(points):
+    """ Seconds every extra object added between one count and the next,
+    from (count, seconds) points.
+    """
+    points = sorted(points)
+    return [(count, (seconds - last_seconds) / (count - last_count))
+            for (last_count, last_seconds), (count, seconds)
+            in zip(points, points[1:]) if count > last_count]
+
+
+class BenchList(NaslibTest):
+    """ Benchmark of listing and looking up many objects
+    """
+
+    def setUp(self):
+        super(BenchList, self).setUp()
+        self.client_ip = sys.argv[1]
+        self.cache_name = sys.argv[5]
+        # objects of every index below were tried, made or not
+        self.attempted = 0
+
+    def counts(self):
+        counts = os.environ.get(COUNTS_ENV) or DEFAULT_COUNTS
+        return sorted(int(count) for count in counts.split(","))
+
+    def names(self, index):
+        fs_name = "%s%d" % (sys.argv[4], index)
+        return fs_name, "/vx/%s" % fs_name, "%s%d" % (sys.argv[6], index)
+
+    def create_objects(self, s, index):
+        fs_name, share_name, snap_name = self.names(index)
+        s.filesystem.create(fs_name, FS_SIZE, self.pool_name)
+        s.share.create(share_name, self.client_ip, "ro")
+        s.snapshot.create(snap_name, fs_name, self.cache_name)
+
+    def populate(self, indexes):
+        """ Creates the objects of the given indexes on connections of
+        their own, POPULATE_WORKERS at a time.
+        """
+        pending = Queue.Queue()
+        for index in indexes:
+            pending.put(index)
+        errors = []
+
+        def worker():
+            try:
+                with self.connect_to_nfs(shared=False) as s:
+                    while not errors:
+                        try:
+                            index = pending.get_nowait()
+                        except Queue.Empty:
+                            return
+                        self.create_objects(s, index)
+            except Exception:  # pylint: disable=broad-except
+                errors.append(traceback.format_exc())
+
+        threads = [threading.Thread(target=worker)
+                   for _ in range(min(POPULATE_WORKERS, len(indexes)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.attempted = max([self.attempted] + [i + 1 for i in indexes])
+        self.assertEquals([], errors, "\n".join(errors))
+
+    def measure(self, s, timings, count, rounds):
+        """ Times the lookups of every kind with count objects of each.
+        """
+        fs_name, share_name, snap_name = self.names(count - 1)
+        lookups = {"filesystem": ((fs_name,), ("nlbmissing",)),
+                   "share": ((share_name, self.client_ip),
+                             ("/vx/nlbmissing", self.client_ip)),
+                   "snapshot": ((snap_name,), ("nlbmissing",))}
+        at = "@%d" % count
+        for kind in KINDS:
+            manager = getattr(s, kind)
+            present, missing = lookups[kind]
+            for _ in range(rounds):
+                items = timings.timed(kind + ".list" + at, manager.list)
+                self.assertTrue(
+                    timings.timed(kind + ".exists" + at, manager.exists,
+                                  *present), "%s %s is missing" %
+                    (kind, present[0]))
+                self.assertFalse(
+                    timings.timed(kind + ".exists_missing" + at,
+                                  manager.exists, *missing))
+                timings.timed(kind + ".get" + at, manager.get, *present)
+            self.assertTrue(len(items) >= count, "%d %ss listed, %d made" %
+                            (len(items), kind, count))
+            timings.memory[kind + ".list" + at] = footprint(items)
+        # the peak of the whole process, it only ever grows
+        timings.memory["peak_rss" + at] = resource.getrusage(
+            resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def report_scaling(self, baseline, counts):
+        for kind in KINDS:
+            points = [(count, baseline["results"]["%s.list@%d" % (kind, count)]
+                       ["p50"]) for count in counts]
+            costs = marginal_costs(points)
+            print "%s.list: %s" % (kind, ", ".join(
+                "%.2fms/object up to %d" % (1000 * cost, count)
+                for count, cost in costs))
+            if len(costs) > 1 and costs[0][1] > 0 and \
+                    costs[-1][1] > SUPERLINEAR * costs[0][1]:
+                print "%s.list grows faster than linearly" % kind
+            print "%s.list holds %s" % (kind, ", ".join(
+                "%dKB at %d" % (baseline["memory"]["%s.list@%d" %
+                                                   (kind, count)] / 1024,
+                                count) for count in counts))
+
+    def delete_task(self, s, task):
+        try:
+            getattr(s, task.kind).delete(*task.args)
+        except DoesNotExist:
+            pass
+
+    def cleanup(self, s):
+        """ Deletes everything the benchmark tried to create, in dependency
+        order. What fails to go is left to the teardown, which has it in
+        the ledger.
+        """
+        resources = {"share": [], "snapshot": [], "filesystem": [],
+                     "cache": [(self.cache_name,)]}
+        for index in range(self.attempted):
+            fs_name, share_name, snap_name = self.names(index)
+            resources["share"].append((share_name, self.client_ip))
+            resources["snapshot"].append((snap_name, fs_name))
+            resources["filesystem"].append((fs_name,))
+        executor = TeardownExecutor(
+            self.delete_task, lambda: self.connect_to_nfs(shared=False))
+        for task in executor.run(plan(resources), s):
+            if task.error:
+                print "could not delete %r: %s" % (task, task.error)
+
+    def test_01(self):
+        rounds = int(os.environ.get(ROUNDS_ENV) or DEFAULT_ROUNDS)
+        counts = self.counts()
+        timings = Timings()
+        with self.connect_to_nfs() as s:
+            s.cache.create(self.cache_name, CACHE_SIZE, self.pool_name)
+            try:
+                created = 0
+                for count in counts:
+                    started = time.time()
+                    self.populate(range(created, count))
+                    print "%d objects of each kind made in %.1fs" % (
+                        count - created, time.time() - started)
+                    created = count
+                    self.measure(s, timings, count, rounds)
+            finally:
+                self.cleanup(s)
+        baseline, path = save_baseline("naslib_list", timings,
+                                       self.conn_args[0],
+                                       self.filestore_solution)
+        print "baseline saved to %s" % path
+        self.report_scaling(baseline, counts)
+        previous = previous_baseline(baseline)
+        if previous is None:
+            return
+        lines, regressions = compare(previous, baseline)
+        print "\n".join(lines)
+        self.assertEquals([], regressions, "\n".join(lines))
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(BenchList)
+    unittest.TextTestRunner(verbosity=2).run(suite)
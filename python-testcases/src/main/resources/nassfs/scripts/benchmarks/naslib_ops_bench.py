@@ -0,0 +1,119 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Latency of the naslib file system, cache and snapshot operations
+over a sweep of sizes.
+
+Every round creates a file system and a cache of each size, resizes the
+file system to twice its size, grows the cache to twice its size and
+shrinks it back, snapshots the file system, changes it, restores it and
+deletes it all again, timing each step. The p50, p95 and max of every
+operation and size are saved as a baseline and compared with the last
+baseline of another ERIClitpnassfs build, see naslib_bench.py; the test
+fails on a regression.
+
+The sizes are "fs size:cache size" pairs, comma separated, in
+NASLIB_BENCH_SIZES and the rounds NASLIB_BENCH_ROUNDS.
+
+Usage:
+    naslib_ops_bench.py <ip> <user> <password> <fs name> <cache name>
+        <snapshot name>
+"""
+
+import os
+import re
+import sys
+import time
+import unittest
+
+# the benchmarks import the scripts next to them and one directory up, also
+# when naslib_batch.py loads them
+BENCH_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path[:0] = [BENCH_DIR, os.path.dirname(BENCH_DIR)]
+
+from naslibtest import NaslibTest
+from naslib_wait import wait_for_rollsync
+from naslib_bench import Timings, compare, previous_baseline, save_baseline
+
+SIZES_ENV = "NASLIB_BENCH_SIZES"
+ROUNDS_ENV = "NASLIB_BENCH_ROUNDS"
+DEFAULT_SIZES = "10M:10M,100M:50M,1G:500M"
+DEFAULT_ROUNDS = 3
+
+
+def doubled(size):
+    """ Gives twice a size such as "10M".
+    """
+    number, unit = re.match(r"^(\d+)(\D*)$", size).groups()
+    return "%d%s" % (2 * int(number), unit)
+
+
+class BenchOps(NaslibTest):
+    """ Benchmark of the naslib operations by size
+    """
+
+    def sizes(self):
+        sizes = os.environ.get(SIZES_ENV) or DEFAULT_SIZES
+        return [tuple(pair.split(":")) for pair in sizes.split(",")]
+
+    def bench_round(self, s, timings, index, fs_size, cache_size):
+        """ Times one round of the operations on resources of one size.
+        """
+        fs_name = "%s%d" % (sys.argv[4], index)
+        cache_name = "%s%d" % (sys.argv[5], index)
+        snap_name = "%s%d" % (sys.argv[6], index)
+        fs_at = "@" + fs_size
+        cache_at = "@" + cache_size
+
+        fs = timings.timed("filesystem.create" + fs_at, s.filesystem.create,
+                           fs_name, fs_size, self.pool_name)
+        timings.timed("filesystem.resize" + fs_at, fs.resize,
+                      doubled(fs_size))
+        cache = timings.timed("cache.create" + cache_at, s.cache.create,
+                              cache_name, cache_size, self.pool_name)
+        timings.timed("cache.growto" + cache_at, cache.resize,
+                      doubled(cache_size))
+        timings.timed("cache.shrinkto" + cache_at, cache.resize, cache_size)
+        timings.timed("snapshot.create" + fs_at, s.snapshot.create,
+                      snap_name, fs_name, cache_name)
+        status, _, err = s.ssh.run("dd if=/dev/urandom of=/vx/%s/bench "
+                                   "bs=1M count=1" % fs_name)
+        self.assertEquals(0, status, err)
+        started = time.time()
+        timings.timed("snapshot.restore" + fs_at, s.snapshot.restore,
+                      snap_name, fs_name)
+        wait_for_rollsync(s, fs_name, changed_mb=1, started=started)
+        timings.record("snapshot.rollsync" + fs_at, time.time() - started)
+        timings.timed("snapshot.delete" + fs_at, s.snapshot.delete,
+                      snap_name, fs_name)
+        timings.timed("filesystem.delete" + fs_at, s.filesystem.delete,
+                      fs_name)
+        timings.timed("cache.delete" + cache_at, s.cache.delete, cache_name)
+
+    def test_01(self):
+        rounds = int(os.environ.get(ROUNDS_ENV) or DEFAULT_ROUNDS)
+        timings = Timings()
+        with self.connect_to_nfs() as s:
+            index = 0
+            for fs_size, cache_size in self.sizes():
+                for _ in range(rounds):
+                    self.bench_round(s, timings, index, fs_size, cache_size)
+                    index += 1
+        baseline, path = save_baseline("naslib_ops", timings,
+                                       self.conn_args[0],
+                                       self.filestore_solution)
+        print "baseline saved to %s" % path
+        previous = previous_baseline(baseline)
+        if previous is None:
+            for operation, stats in sorted(baseline["results"].items()):
+                print "%-32s p50 %.3fs p95 %.3fs max %.3fs" % (
+                    operation, stats["p50"], stats["p95"], stats["max"])
+            return
+        lines, regressions = compare(previous, baseline)
+        print "\n".join(lines)
+        self.assertEquals([], regressions, "\n".join(lines))
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(BenchOps)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,221 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Drives naslib from many threads at once, as plans run their tasks
+in parallel, and reports throughput and errors.
+
+NASLIB_STRESS_WORKERS threads each run NASLIB_STRESS_CYCLES cycles of
+creating a file system, sharing it, listing the file systems, snapshotting
+it on a common cache, listing the snapshots and deleting it all again.
+Every worker has names of its own, so any error is one of naslib or the SFS
+rather than of the test. test_01 gives every worker a connection of its
+own, test_02 has them all share one.
+
+The errors are counted by exception class per operation, those whose
+message mentions a lock separately, as lock conflicts. The test fails when
+more than NASLIB_STRESS_MAX_ERRORS, a fraction of the operations, failed.
+
+Usage:
+    naslib_stress.py <ip> <user> <password> <fs name> <cache name>
+        <snapshot name>
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+# the benchmarks import the scripts next to them and one directory up, also
+# when naslib_batch.py loads them
+BENCH_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path[:0] = [BENCH_DIR, os.path.dirname(BENCH_DIR)]
+
+from naslibtest import NaslibTest
+from naslib_bench import Timings
+
+WORKERS_ENV = "NASLIB_STRESS_WORKERS"
+CYCLES_ENV = "NASLIB_STRESS_CYCLES"
+MAX_ERRORS_ENV = "NASLIB_STRESS_MAX_ERRORS"
+DEFAULT_WORKERS = 4
+DEFAULT_CYCLES = 10
+FS_SIZE = "10M"
+CACHE_SIZE = "500M"
+
+
+def error_class(err):
+    """ Names the kind of an error, such as "AlreadyExists" or
+    "CreationException (lock)" for one the SFS gave because of a lock.
+    """
+    name = type(err).__name__
+    if "lock" in str(err).lower():
+        name += " (lock)"
+    return name
+
+
+class StressStats(object):
+    """ Durations, successes and errors of the operations of every worker,
+    by operation.
+    """
+
+    def __init__(self):
+        self.timings = Timings()
+        self.calls = {}
+        # count by (operation, error class)
+        self.errors = {}
+        self.examples = {}
+        self.lock = threading.Lock()
+
+    def call(self, operation, method, *args, **kwargs):
+        """ Calls method, recording its duration and any error under
+        operation. Returns whether it worked and what it gave back.
+        """
+        started = time.time()
+        try:
+            result = method(*args, **kwargs)
+        except Exception as err:  # pylint: disable=broad-except
+            self.error(operation, error_class(err), str(err))
+            return False, None
+        with self.lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            self.timings.record(operation, time.time() - started)
+        return True, result
+
+    def error(self, operation, kind, message):
+        """ Records a failed call of operation.
+        """
+        with self.lock:
+            self.calls[operation] = self.calls.get(operation, 0) + 1
+            key = (operation, kind)
+            self.errors[key] = self.errors.get(key, 0) + 1
+            self.examples.setdefault(key, message.strip()[:200])
+
+    def total(self):
+        return sum(self.calls.values())
+
+    def failed(self):
+        return sum(self.errors.values())
+
+    def report(self, seconds):
+        """ Lines giving the throughput, latency and errors of every
+        operation and of all of them.
+        """
+        results = self.timings.results()
+        lines = ["%d operations in %.1fs, %.2f/s, %d failed (%.1f%%)" % (
+            self.total(), seconds, (self.total() - self.failed()) / seconds,
+            self.failed(), 100.0 * self.failed() / max(1, self.total()))]
+        for operation in sorted(self.calls):
+            stats = results.get(operation)
+            failed = sum(count for (failed_op, _), count
+                         in self.errors.items() if failed_op == operation)
+            lines.append("%-18s %5d calls %5d failed %s" % (
+                operation, self.calls[operation], failed,
+                "p50 %.3fs p95 %.3fs max %.3fs" % (
+                    stats["p50"], stats["p95"], stats["max"])
+                if stats else ""))
+        for key in sorted(self.errors):
+            lines.append("%-18s %5d x %s: %s" % (
+                key[0], self.errors[key], key[1], self.examples[key]))
+        return lines
+
+
+class Stress(NaslibTest):
+    """ Concurrency stress of the naslib operations
+    """
+
+    def setUp(self):
+        super(Stress, self).setUp()
+        self.client_ip = sys.argv[1]
+        self.workers = int(os.environ.get(WORKERS_ENV) or DEFAULT_WORKERS)
+        self.cycles = int(os.environ.get(CYCLES_ENV) or DEFAULT_CYCLES)
+        self.max_errors = float(os.environ.get(MAX_ERRORS_ENV) or 0)
+        self.shared = False
+        self.cache_name = None
+
+    def names(self, worker, cycle):
+        # each mode has names of its own, so one does not trip over what
+        # the other left behind
+        suffix = "%s%dc%d" % ("s" if self.shared else "w", worker, cycle)
+        fs_name = sys.argv[4] + suffix
+        return fs_name, "/vx/%s" % fs_name, sys.argv[6] + suffix
+
+    def cycle(self, s, stats, worker, cycle):
+        """ One create, list and delete cycle. A step only runs when what
+        it works on was made; what was made is always deleted.
+        """
+        fs_name, share_name, snap_name = self.names(worker, cycle)
+        made_fs, _ = stats.call("filesystem.create", s.filesystem.create,
+                                fs_name, FS_SIZE, self.pool_name)
+        if not made_fs:
+            return
+        made_share, _ = stats.call("share.create", s.share.create,
+                                   share_name, self.client_ip, "ro")
+        listed, filesystems = stats.call("filesystem.list",
+                                         s.filesystem.list)
+        if listed and fs_name not in [fs.name for fs in filesystems]:
+            stats.error("filesystem.list", "Missing",
+                        "%s is not listed" % fs_name)
+        made_snap, _ = stats.call("snapshot.create", s.snapshot.create,
+                                  snap_name, fs_name, self.cache_name)
+        stats.call("snapshot.list", s.snapshot.list)
+        if made_snap:
+            stats.call("snapshot.delete", s.snapshot.delete, snap_name,
+                       fs_name)
+        if made_share:
+            stats.call("share.delete", s.share.delete, share_name,
+                       self.client_ip)
+        stats.call("filesystem.delete", s.filesystem.delete, fs_name)
+
+    def stress(self, shared):
+        """ Runs the workers, on one connection when shared, and checks
+        the errors.
+        """
+        self.shared = shared
+        self.cache_name = sys.argv[5] + ("s" if shared else "w")
+        stats = StressStats()
+        crashes = []
+
+        def worker(index, s=None):
+            try:
+                if s is not None:
+                    for cycle in range(self.cycles):
+                        self.cycle(s, stats, index, cycle)
+                    return
+                with self.connect_to_nfs(shared=False) as own:
+                    for cycle in range(self.cycles):
+                        self.cycle(own, stats, index, cycle)
+            except Exception as err:  # pylint: disable=broad-except
+                crashes.append("worker %d: %s: %s" % (
+                    index, error_class(err), err))
+
+        with self.connect_to_nfs() as s:
+            s.cache.create(self.cache_name, CACHE_SIZE, self.pool_name)
+            threads = [threading.Thread(target=worker,
+                                        args=(index, s if shared else None))
+                       for index in range(self.workers)]
+            started = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.time() - started
+            stats.call("cache.delete", s.cache.delete, self.cache_name)
+        lines = ["%d workers on %s, %d cycles each" % (
+            self.workers, "one connection" if shared else
+            "a connection each", self.cycles)] + stats.report(seconds)
+        print "\n".join(lines + crashes)
+        self.assertEquals([], crashes, "\n".join(crashes))
+        self.assertTrue(
+            stats.failed() <= self.max_errors * stats.total(),
+            "\n".join(lines))
+
+    def test_01_own_connections(self):
+        self.stress(shared=False)
+
+    def test_02_shared_connection(self):
+        self.stress(shared=True)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(Stress)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,9 +1,9 @@
 import sys
 import unittest
 import re
-import time
 
 from naslibtest import NaslibTest
+from naslib_cachefill import fill_cache
 
 from naslib.objects import Snapshot
 
@@ -72,35 +72,17 @@ class Test01(NaslibTest):
             # - check before if there is space available
             cache = s.cache.get(new_cache_name)
             self.assertTrue(cache.available)
-            # NOTE: initially a cache created starts with 4M used, so it's
-            # available now 6M.
-            # NOTE 2: the SFS "autogrow" feature increases the cache 20% every
-            # time it reaches more than 90% usage.
-            # NOTE 3: the intention below is to write 5M to make the usage be
-            # 9M and the SFS "autogrow" feature will increase the cache 20%,
-            # resulting in 12M size instead of 10M.
-            _, out, err = s.ssh.run('dd if=/dev/urandom of=/vx/%s/stuff1.txt '
-                                 'bs=1M count=5' % new_fs_name)
+            # NOTE: the SFS "autogrow" feature increases the cache 20% every
+            # time it reaches more than 90% usage, so the writes go on until
+            # the cache has grown as far as it does and is full.
+            fill = fill_cache(s, new_fs_name, new_cache_name)
             regex = re.compile('[\d+\+]+\s+records\s+in')
-            self.assertTrue(bool(regex.search(out + err)))
-            _, out, err = s.ssh.run('ls /vx/%s/stuff1.txt' % new_fs_name)
-            self.assertNotEquals(out, "")
-            self.assertEquals(err, "")
-            for i in xrange(2, 10):
-                time.sleep(1)
-                # this 8 iterations is the minimum necessary to write data on
-                # the fs and gets the cache 100% used, because the SFS
-                # "autogrow" feature increases the cache 20% every time it
-                # reaches more than 90% usage.
-                _, out, err = s.ssh.run('dd if=/dev/urandom of=/vx/%s/'
-                                     'stuff%s.txt bs=1M count=2' %
-                                     (new_fs_name, i))
-                regex = re.compile('[\d+\+]+\s+records\s+in')
+            for _, _, (_, out, err), (_, ls_out, ls_err) in fill.writes:
                 self.assertTrue(bool(regex.search(out + err)))
-                _, out, err = s.ssh.run('ls /vx/%s/stuff%s.txt' % (new_fs_name,
-                                                                i))
-                self.assertNotEquals(out, "")
-                self.assertEquals(err, "")
+                self.assertNotEquals(ls_out, "")
+                self.assertEquals(ls_err, "")
+            self.assertTrue(fill.full, '%s not full after %d writes' %
+                            (new_cache_name, len(fill.writes)))
 
             # now the cache must have no space available
             cache = s.cache.get(new_cache_name)
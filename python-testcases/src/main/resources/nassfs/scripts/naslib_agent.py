@@ -0,0 +1,356 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Persistent agent that runs the naslib test scripts on the MS.
+
+The agent imports naslib and configures the LITP logging once, then listens
+on a unix socket. Every script invocation is served by a forked child, so
+the script starts with everything already imported and cannot leak state
+into the next one. The agent goes away after IDLE_TIMEOUT seconds without
+work, and restarts itself when a module it loaded from this directory
+changes.
+
+Usage:
+    naslib_agent.py call <script> [args...]
+    naslib_agent.py start | stop | status
+
+"call" behaves like "python <script> [args...]": it prints the script output
+and exits with its exit code. It starts the agent when needed and falls back
+to a plain interpreter when the agent cannot be started.
+"""
+
+import base64
+import errno
+import fcntl
+import json
+import os
+import runpy
+import select
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+AGENT_PATH = os.path.realpath(__file__)
+AGENT_DIR = os.path.dirname(AGENT_PATH)
+SOCKET_PATH = os.path.join(AGENT_DIR, "naslib_agent.sock")
+LOCK_PATH = os.path.join(AGENT_DIR, "naslib_agent.lock")
+LOG_PATH = os.path.join(AGENT_DIR, "naslib_agent.log")
+FAILED_PATH = os.path.join(AGENT_DIR, "naslib_agent.failed")
+
+IDLE_TIMEOUT = 1800
+START_TIMEOUT = 60
+PRELOAD = ("naslibtest", "naslib.objects", "naslib.nasexceptions",
+           "naslib.drivers.sfs.utils")
+# environment forwarded from the caller to the script
+ENV_PREFIX = "NASLIB_"
+
+
+def watched_files():
+    """ The files whose change makes a running agent stale: this script and
+    the modules it has imported from its directory. The scripts themselves
+    are run afresh on every call.
+    """
+    paths = set([AGENT_PATH])
+    for module in sys.modules.values():
+        path = getattr(module, "__file__", None)
+        # the daemon runs from /, a relative path is no longer right
+        if not path or not os.path.isabs(path):
+            continue
+        path = os.path.realpath(path)
+        if path.endswith((".pyc", ".pyo")):
+            path = path[:-1]
+        if os.path.dirname(path) == AGENT_DIR:
+            paths.add(path)
+    return sorted(paths)
+
+
+def agent_version(paths):
+    """ Identifies the code the agent has loaded from some files.
+    """
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append("%s:%d" % (os.path.basename(path),
+                                     os.stat(path).st_mtime))
+        except OSError:
+            stamps.append("%s:-" % os.path.basename(path))
+    return ",".join(stamps)
+
+
+def send_json(conn, data):
+    """ Writes a message and closes the sending side.
+    """
+    conn.sendall(json.dumps(data) + "\n")
+    conn.shutdown(socket.SHUT_WR)
+
+
+def recv_json(conn):
+    """ Reads a message until the peer closes its sending side.
+    """
+    chunks = []
+    while True:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return json.loads("".join(chunks))
+
+
+def exit_code_of(code):
+    """ Translates a SystemExit code the way the interpreter does.
+    """
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    sys.stderr.write("%s\n" % code)
+    return 1
+
+
+def run_script(request):
+    """ Runs a script as __main__ in the current (forked) process and
+    collects its output.
+    """
+    # JSON hands back unicode, the scripts expect plain strings
+    script = request["script"].encode("utf-8")
+    sys.argv = [script] + [arg.encode("utf-8") for arg in request["argv"]]
+    sys.path[0] = os.path.dirname(script)
+    for key in [k for k in os.environ if k.startswith(ENV_PREFIX)]:
+        del os.environ[key]
+    for key, value in request.get("env", {}).items():
+        os.environ[key.encode("utf-8")] = value.encode("utf-8")
+    out = tempfile.TemporaryFile()
+    err = tempfile.TemporaryFile()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    # the unittest runners hold a reference to the original sys.stderr, so
+    # the descriptors are redirected rather than the file objects
+    os.dup2(out.fileno(), 1)
+    os.dup2(err.fileno(), 2)
+    exit_code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as ex:
+        exit_code = exit_code_of(ex.code)
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        exit_code = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    out.seek(0)
+    err.seek(0)
+    return output_response(out.read(), err.read(), exit_code)
+
+
+def output_response(out, err, exit_code):
+    """ The response to a call. The output goes as base64, as a script may
+    print bytes that are not UTF-8, dd and ls output among them.
+    """
+    return {"stdout": base64.b64encode(out), "stderr": base64.b64encode(err),
+            "exit_code": exit_code}
+
+
+def reap(children):
+    """ Collects the children that have finished.
+    """
+    for pid in list(children):
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except OSError:
+            done = pid
+        if done:
+            children.discard(pid)
+
+
+def close_listener(sock):
+    """ Stops accepting requests. The socket file goes first so a new agent
+    can bind while this one finishes.
+    """
+    try:
+        os.unlink(SOCKET_PATH)
+    except OSError:
+        pass
+    sock.close()
+
+
+def serve(sock, watched, version):
+    """ Accepts requests until idle or stale, forking a child for each
+    script invocation.
+    """
+    children = set()
+    last_request = time.time()
+    while True:
+        reap(children)
+        readable, _, _ = select.select([sock], [], [], 5)
+        if not readable:
+            if not children and time.time() - last_request > IDLE_TIMEOUT:
+                close_listener(sock)
+                return
+            continue
+        conn, _ = sock.accept()
+        last_request = time.time()
+        try:
+            conn.settimeout(30)
+            request = recv_json(conn)
+            conn.settimeout(None)
+        except (socket.error, ValueError):
+            conn.close()
+            continue
+        if request.get("stop") or agent_version(watched) != version:
+            close_listener(sock)
+            send_json(conn, {"stale": True})
+            conn.close()
+            return
+        if request.get("ping"):
+            send_json(conn, {"pong": True, "pid": os.getpid()})
+            conn.close()
+            continue
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            try:
+                response = run_script(request)
+            except Exception:  # pylint: disable=broad-except
+                response = output_response("", traceback.format_exc(), 1)
+            send_json(conn, response)
+            conn.close()
+            os._exit(0)  # pylint: disable=protected-access
+        conn.close()
+        children.add(pid)
+
+
+def daemon_main():
+    """ Body of the detached agent process.
+    """
+    os.chdir("/")
+    null = os.open(os.devnull, os.O_RDONLY)
+    log = os.open(LOG_PATH, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0600)
+    os.dup2(null, 0)
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+    sys.path.insert(0, AGENT_DIR)
+    try:
+        for module in PRELOAD:
+            __import__(module)
+    except Exception:  # pylint: disable=broad-except
+        traceback.print_exc()
+        open(FAILED_PATH, "w").close()
+        return
+    watched = watched_files()
+    version = agent_version(watched)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        os.unlink(SOCKET_PATH)
+    except OSError:
+        pass
+    sock.bind(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0600)
+    sock.listen(16)
+    print "naslib agent %d listening, %s" % (os.getpid(), version)
+    sys.stdout.flush()
+    serve(sock, watched, version)
+
+
+def request_agent(request):
+    """ Sends a request to the agent. Returns None when it is not running.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(SOCKET_PATH)
+        send_json(conn, request)
+        return recv_json(conn)
+    except (socket.error, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def ping():
+    """ True if an up to date agent answers.
+    """
+    response = request_agent({"ping": True})
+    return bool(response and response.get("pong"))
+
+
+def start():
+    """ Starts the agent unless an up to date one is running.
+    """
+    lock = open(LOCK_PATH, "w")
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    try:
+        if ping():
+            return True
+        if os.path.exists(FAILED_PATH):
+            os.unlink(FAILED_PATH)
+        pid = os.fork()
+        if pid == 0:
+            os.setsid()
+            if os.fork() == 0:
+                try:
+                    daemon_main()
+                finally:
+                    os._exit(0)  # pylint: disable=protected-access
+            os._exit(0)  # pylint: disable=protected-access
+        os.waitpid(pid, 0)
+        deadline = time.time() + START_TIMEOUT
+        while time.time() < deadline and not os.path.exists(FAILED_PATH):
+            if ping():
+                return True
+            time.sleep(0.2)
+        return False
+    finally:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        lock.close()
+
+
+def stop():
+    """ Asks a running agent to exit.
+    """
+    request_agent({"stop": True})
+
+
+def call(script, args):
+    """ Runs a script through the agent, as "python <script> args" would.
+    """
+    request = {"script": os.path.abspath(script),
+               "argv": args,
+               "env": dict((k, v) for k, v in os.environ.items()
+                           if k.startswith(ENV_PREFIX))}
+    for _ in range(2):
+        response = request_agent(request)
+        if response is not None and not response.get("stale"):
+            sys.stdout.write(base64.b64decode(response["stdout"]))
+            sys.stderr.write(base64.b64decode(response["stderr"]))
+            return response["exit_code"]
+        if not start():
+            break
+    sys.stdout.flush()
+    os.execv(sys.executable, [sys.executable, script] + args)
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    if len(argv) > 1 and argv[0] == "call":
+        return call(argv[1], argv[2:])
+    if argv == ["start"]:
+        return 0 if start() else 1
+    if argv == ["stop"]:
+        stop()
+        return 0
+    if argv == ["status"]:
+        running = ping()
+        print "running" if running else "stopped"
+        return 0 if running else 1
+    sys.stderr.write(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main(sys.argv[1:]))
+    except IOError as err:
+        if err.errno != errno.EPIPE:
+            raise
@@ -0,0 +1,339 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Runs many naslib test scripts in one interpreter.
+
+Every job names a script and the arguments it would get on the command
+line, plus optionally the arguments for test_teardown.py to run after it.
+The teardown is left out when the ledger of the job recorded nothing.
+The scripts share one NasConnection per SFS. The outcome of every test is
+printed as JSON on a single line starting with RESULT_MARKER.
+
+Jobs against different SFS nodes run at the same time, in worker processes
+with connections of their own. With --workers up to N jobs run at the same
+time against each SFS node, they must then work on resources of their own.
+The results come back in job order either way.
+
+The results carry the measurements the scripts recorded, such as the
+duration and throughput of their rollsyncs, see naslib_wait.py.
+
+A serial run creates the fixture stack of the next job, see
+naslib_fixtures.py, while the current one runs, unless the next job leases
+one of the same sizes and so gets the one the current job hands back. A job
+marked "retire" is the last of its group: the free stacks of its sizes are
+deleted after it. Every result gives the stacks the pool built so far.
+
+Usage:
+    naslib_batch.py [--workers N] <base64 encoded JSON list of jobs>
+
+    job: {"id": "test_01_p_create_fs", "script": "test_01.py",
+          "argv": [ip, user, password, ...], "teardown": [ip, ...] or null,
+          "sfs": SFS node name or null, "env": {"NASLIB_...": value},
+          "provision": [fs size, cache size, cache resize] or null,
+          "retire": true when no later job leases its stack}
+"""
+
+import base64
+import imp
+import json
+import multiprocessing
+import os
+import Queue
+import sys
+import threading
+import time
+import traceback
+import unittest
+
+from naslibtest import NaslibTest, Ledger, POOL_NAME
+from naslib_fixtures import FixturePool, POOL_ENV
+from naslib_wait import take_metrics
+
+from naslib.connection import NasConnection
+
+SCRIPTS_DIR = os.path.dirname(os.path.realpath(__file__))
+TEARDOWN_SCRIPT = "test_teardown.py"
+RESULT_MARKER = "NASLIB_BATCH_RESULT "
+# environment the jobs may set for their scripts
+ENV_PREFIX = "NASLIB_"
+
+
+class JsonResult(unittest.TestResult):
+    """ Keeps status, traceback and duration of every test it runs, and the
+    durations of its naslib calls when they were profiled.
+    """
+
+    def __init__(self):
+        super(JsonResult, self).__init__()
+        self.records = []
+        self._started = None
+
+    def startTest(self, test):
+        super(JsonResult, self).startTest(test)
+        self._started = time.time()
+
+    def _record(self, test, status, err=None):
+        record = {
+            # drop the module name load_script made up
+            "name": test.id().split(".", 1)[-1],
+            "status": status,
+            "traceback": self._exc_info_to_string(err, test) if err else None,
+            "duration": round(time.time() - self._started, 3)}
+        profile = getattr(test, "profile", None)
+        if profile is not None:
+            record["profile"] = profile.summary()
+        self.records.append(record)
+
+    def addSuccess(self, test):
+        super(JsonResult, self).addSuccess(test)
+        self._record(test, "passed")
+
+    def addFailure(self, test, err):
+        super(JsonResult, self).addFailure(test, err)
+        self._record(test, "failed", err)
+
+    def addError(self, test, err):
+        super(JsonResult, self).addError(test, err)
+        self._record(test, "error", err)
+
+    def addSkip(self, test, reason):
+        super(JsonResult, self).addSkip(test, reason)
+        self._record(test, "skipped")
+
+
+def load_script(script, index):
+    """ Imports a script under a unique name, so its __main__ block does not
+    run, and returns the test cases it defines.
+    """
+    path = os.path.join(SCRIPTS_DIR, script)
+    module = imp.load_source("naslib_batch_job_%d" % index, path)
+    loader = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, unittest.TestCase) \
+                and value.__module__ == module.__name__:
+            suite.addTests(loader.loadTestsFromTestCase(value))
+    return suite
+
+
+def run_script(script, argv, index):
+    """ Runs the tests of a script with the given command line arguments.
+    """
+    # JSON hands back unicode, the scripts expect plain strings
+    sys.argv = [os.path.join(SCRIPTS_DIR, script)] + \
+        [arg.encode("utf-8") for arg in argv]
+    try:
+        suite = load_script(script, index)
+    except Exception:  # pylint: disable=broad-except
+        return [{"name": script, "status": "error",
+                 "traceback": traceback.format_exc(), "duration": 0.0}]
+    if not suite.countTestCases():
+        return [{"name": script, "status": "error",
+                 "traceback": "No tests found in %s" % script,
+                 "duration": 0.0}]
+    result = JsonResult()
+    suite.run(result)
+    return result.records
+
+
+def set_job_env(env):
+    """ Gives the scripts of a job its environment and returns the one it
+    replaces.
+    """
+    saved = dict((key, value) for key, value in os.environ.items()
+                 if key.startswith(ENV_PREFIX))
+    for key in saved:
+        del os.environ[key]
+    for key, value in env.items():
+        if key.startswith(ENV_PREFIX):
+            os.environ[key.encode("utf-8")] = value.encode("utf-8")
+    return saved
+
+
+def run_job(job, index):
+    """ Runs the script of a job and its teardown.
+    """
+    started = time.time()
+    take_metrics()
+    saved_env = set_job_env(job.get("env") or {})
+    try:
+        result = {"id": job["id"], "script": job["script"],
+                  "sfs": job.get("sfs"),
+                  "tests": run_script(job["script"], job["argv"], 2 * index)}
+        ledger = Ledger.from_env()
+        # nothing recorded, nothing for the teardown to delete
+        if job.get("teardown") and (ledger is None or
+                                    not ledger.is_empty()):
+            result["teardown"] = run_script(TEARDOWN_SCRIPT,
+                                            job["teardown"], 2 * index + 1)
+        pool = FixturePool.from_env()
+        if pool is not None and job.get("provision"):
+            if job.get("retire"):
+                retire(pool, job)
+            result["fixture_builds"] = pool.builds()
+    finally:
+        set_job_env(saved_env)
+    result["duration"] = round(time.time() - started, 3)
+    result["metrics"] = take_metrics()
+    result["passed"] = all(
+        test["status"] in ("passed", "skipped")
+        for test in result["tests"] + result.get("teardown", []))
+    sys.stderr.write("%s ... %s (%.1fs)\n" % (
+        job["id"], "ok" if result["passed"] else "FAIL", result["duration"]))
+    return result
+
+
+def job_conn_args(job):
+    return tuple(arg.encode("utf-8") for arg in job["argv"][:3])
+
+
+def retire(pool, job):
+    """ Deletes the free stacks of the sizes of a job, on a connection of
+    its own.
+    """
+    conn_args = job_conn_args(job)
+    try:
+        with NasConnection(*conn_args) as nas:
+            pool.retire(nas, conn_args[0], pool.spec(*job["provision"]))
+    except Exception:  # pylint: disable=broad-except
+        # the harness destroys the pool after the testset anyway
+        traceback.print_exc()
+
+
+def provision(pool_path, conn_args, spec):
+    """ Creates a fixture stack, on a connection of its own.
+    """
+    try:
+        with NasConnection(*conn_args) as nas:
+            FixturePool(pool_path).provision(nas, conn_args[0], POOL_NAME,
+                                             *spec)
+    except Exception:  # pylint: disable=broad-except
+        # the lease creates the stack itself then
+        traceback.print_exc()
+
+
+def provision_ahead(job, current=None):
+    """ Starts creating the fixture stack a job will lease, if it declares
+    one the current job does not hand back. Returns the thread doing it.
+    """
+    pool_path = (job.get("env") or {}).get(POOL_ENV)
+    if not job.get("provision") or not pool_path:
+        return None
+    if current is not None and current.get("sfs") == job.get("sfs") and \
+            current.get("provision") == job["provision"]:
+        return None
+    conn_args = job_conn_args(job)
+    spec = [size.encode("utf-8") for size in job["provision"] if size]
+    thread = threading.Thread(target=provision,
+                              args=(pool_path, conn_args, spec))
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+def run_jobs(jobs):
+    """ Runs the jobs in order and collects one result per job.
+    """
+    NaslibTest.share_connections = True
+    threads = []
+    results = []
+    try:
+        for index, job in enumerate(jobs):
+            if index + 1 < len(jobs):
+                threads.append(provision_ahead(jobs[index + 1], job))
+            results.append(run_job(job, index))
+        return results
+    finally:
+        for thread in threads:
+            if thread is not None:
+                thread.join()
+        NaslibTest.close_shared_connections()
+
+
+def worker(job_queue, result_queue):
+    """ Body of a worker process: runs jobs until it gets None.
+    """
+    NaslibTest.share_connections = True
+    try:
+        for index, job in iter(job_queue.get, None):
+            try:
+                result = run_job(job, index)
+            except Exception:  # pylint: disable=broad-except
+                result = {"id": job["id"], "script": job["script"],
+                          "sfs": job.get("sfs"),
+                          "tests": [{"name": job["script"],
+                                     "status": "error",
+                                     "traceback": traceback.format_exc(),
+                                     "duration": 0.0}],
+                          "duration": 0.0, "passed": False}
+            result_queue.put((index, result))
+    finally:
+        NaslibTest.close_shared_connections()
+
+
+def run_jobs_parallel(jobs, workers):
+    """ Runs the jobs in worker processes, up to workers at a time against
+    each SFS node, and collects one result per job, in job order.
+    """
+    shards = {}
+    for item in enumerate(jobs):
+        shards.setdefault(item[1].get("sfs"), []).append(item)
+    result_queue = multiprocessing.Queue()
+    processes = []
+    for shard in shards.values():
+        job_queue = multiprocessing.Queue()
+        for item in shard:
+            job_queue.put(item)
+        for _ in range(min(workers, len(shard))):
+            job_queue.put(None)
+            process = multiprocessing.Process(target=worker,
+                                              args=(job_queue, result_queue))
+            process.start()
+            processes.append(process)
+    results = {}
+    while len(results) < len(jobs):
+        if not any(process.is_alive() for process in processes) \
+                and result_queue.empty():
+            break
+        try:
+            index, result = result_queue.get(timeout=5)
+        except Queue.Empty:
+            continue
+        results[index] = result
+    for process in processes:
+        process.join()
+    for index, job in enumerate(jobs):
+        if index not in results:
+            # the worker running it died
+            results[index] = {"id": job["id"], "script": job["script"],
+                              "sfs": job.get("sfs"),
+                              "tests": [{"name": job["script"],
+                                         "status": "error",
+                                         "traceback": "Worker died",
+                                         "duration": 0.0}],
+                              "duration": 0.0, "passed": False}
+    return [results[index] for index in range(len(jobs))]
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    workers = 1
+    if len(argv) == 3 and argv[0] == "--workers":
+        workers = int(argv[1])
+        argv = argv[2:]
+    if len(argv) != 1 or workers < 1:
+        sys.stderr.write(__doc__)
+        return 2
+    jobs = json.loads(base64.b64decode(argv[0]))
+    if workers > 1 or len(set(job.get("sfs") for job in jobs)) > 1:
+        results = run_jobs_parallel(jobs, workers)
+    else:
+        results = run_jobs(jobs)
+    sys.stdout.write(RESULT_MARKER + json.dumps(results) + "\n")
+    sys.stdout.flush()
+    return 0 if all(result["passed"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,67 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Measures the connection setup latency of the naslib scripts with
+their own SSH sessions against the shared transport of the SSH broker.
+
+Every iteration opens a NasConnection, runs one command and closes it, as
+a script does. The first brokered iteration includes starting the broker.
+
+Usage:
+    naslib_broker_bench.py <ip> <user> <password> [--iterations N]
+"""
+
+import os
+import sys
+import time
+
+from naslibtest import SSH_BROKER_ENV, ensure_host_key, use_ssh_broker
+from naslib_profile import percentile
+
+from naslib.connection import NasConnection
+
+
+def bench(conn_args, iterations, brokered):
+    """ Gives the seconds of every connect, command and close.
+    """
+    if brokered:
+        os.environ[SSH_BROKER_ENV] = "1"
+    else:
+        os.environ.pop(SSH_BROKER_ENV, None)
+    use_ssh_broker(conn_args)
+    timings = []
+    for _ in range(iterations):
+        started = time.time()
+        with NasConnection(*conn_args) as s:
+            s.ssh.run("true")
+        timings.append(time.time() - started)
+    return timings
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    iterations = 10
+    if "--iterations" in argv:
+        position = argv.index("--iterations")
+        iterations = int(argv[position + 1])
+        argv = argv[:position] + argv[position + 2:]
+    if len(argv) != 3:
+        sys.stderr.write(__doc__)
+        return 2
+    conn_args = tuple(argv)
+    ensure_host_key(conn_args[0])
+    print "%-10s %10s %10s %10s %10s" % ("mode", "first ms", "p50 ms",
+                                         "p95 ms", "max ms")
+    for mode, brokered in (("direct", False), ("broker", True)):
+        timings = [seconds * 1000
+                   for seconds in bench(conn_args, iterations, brokered)]
+        print "%-10s %10.1f %10.1f %10.1f %10.1f" % (
+            mode, timings[0], percentile(timings, 0.5),
+            percentile(timings, 0.95), max(timings))
+    use_ssh_broker(conn_args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,140 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Fills the cache of a snapshot by writing to its file system,
+sizing every write from the cache usage the SFS reports.
+
+Each write is as big as the space the cache has left, so a cache of any
+size is full after a few writes, but no bigger than the space left on the
+file system, less FS_MARGIN_MB for its metadata. The SFS autogrow feature
+grows a cache by 20% when it is over 90% used; the total of a cache
+growing between two reads is recorded as an autogrow event and the
+filling goes on until nothing is available. A write is only followed by
+the next once the usage shows it, rather than after a fixed sleep. A write
+that fails raises CacheFillError, and the filling stops short of full when
+the file system has no space left.
+"""
+
+import re
+
+from naslib_shell import run_batch
+from naslib_wait import WaitTimeout, wait_until
+
+_SIZE = re.compile(r"^\s*([\d.]+)\s*([kmgt]?)", re.IGNORECASE)
+_UNITS = {"": 1, "k": 1.0 / 1024, "m": 1, "g": 1024, "t": 1024 * 1024}
+FS_MARGIN_MB = 1
+
+
+class CacheFillError(Exception):
+    """ A write to the file system, or reading its free space, failed.
+    """
+
+
+def megabytes(value):
+    """ Gives a size naslib reports, a number of megabytes or a string with
+    a unit such as "6M", in megabytes.
+    """
+    if isinstance(value, (int, long, float)):
+        return float(value)
+    match = _SIZE.match(str(value))
+    if not match:
+        raise ValueError("not a size: %r" % (value,))
+    return float(match.group(1)) * _UNITS[match.group(2).lower()]
+
+
+class CacheFill(object):
+    """ Writes files to fs_name until the cache cache_name is full.
+    """
+
+    def __init__(self, s, fs_name, cache_name, prefix="stuff",
+                 max_writes=40, settle_secs=30):
+        self.s = s
+        self.fs_name = fs_name
+        self.cache_name = cache_name
+        self.prefix = prefix
+        self.max_writes = max_writes
+        self.settle_secs = settle_secs
+        # (file, megabytes, dd result, ls result) of every write
+        self.writes = []
+        # (used, total before, total after) in megabytes of every autogrow
+        self.autogrows = []
+        self.usage = None
+        self.full = False
+
+    def read_usage(self):
+        """ Reads the used and available megabytes of the cache, recording
+        an autogrow when its total grew since the last read.
+        """
+        cache = self.s.cache.get(self.cache_name)
+        used = megabytes(cache.used)
+        available = megabytes(cache.available)
+        if self.usage is not None:
+            total_before = sum(self.usage)
+            # the reported sizes are rounded, a real autogrow is 20%
+            if used + available > total_before * 1.01:
+                self.autogrows.append((used, total_before, used + available))
+                print "cache %s autogrew from %.1fM to %.1fM at %.1fM used" % (
+                    self.cache_name, total_before, used + available, used)
+        self.usage = (used, available)
+        return self.usage
+
+    def read_free(self):
+        """ Reads the megabytes left on the file system.
+        """
+        status, out, err = self.s.ssh.run("df -Pm /vx/%s" % self.fs_name)
+        lines = out.strip().splitlines()
+        fields = lines[-1].split() if lines else []
+        if status != 0 or len(fields) < 4 or not fields[3].isdigit():
+            raise CacheFillError("cannot read the free space of /vx/%s: %s"
+                                 % (self.fs_name, (err or out).strip()))
+        return int(fields[3])
+
+    def write(self, size_mb):
+        """ Writes one file of size_mb megabytes and lists it.
+        """
+        name = "%s%d.txt" % (self.prefix, len(self.writes) + 1)
+        dd_result, ls_result = run_batch(self.s, [
+            "dd if=/dev/urandom of=/vx/%s/%s bs=1M count=%d" %
+            (self.fs_name, name, size_mb),
+            "ls /vx/%s/%s" % (self.fs_name, name)])
+        self.writes.append((name, size_mb, dd_result, ls_result))
+        if dd_result[0] != 0:
+            raise CacheFillError("writing %dM to /vx/%s/%s failed: %s" %
+                                 (size_mb, self.fs_name, name,
+                                  dd_result[2].strip()))
+
+    def _settled(self, before):
+        """ Waits for the usage to move on from before, and gives it.
+        """
+        try:
+            wait_until(lambda: self.read_usage() != before,
+                       self.settle_secs, "usage of cache %s" % self.cache_name)
+        except WaitTimeout:
+            pass
+        return self.usage
+
+    def run(self):
+        """ Fills the cache. Returns True if it is full, False if it still
+        had space after max_writes writes.
+        """
+        usage = self.read_usage()
+        while usage[1] > 0 and len(self.writes) < self.max_writes:
+            size_mb = min(max(1, int(usage[1] + 0.999)),
+                          self.read_free() - FS_MARGIN_MB)
+            if size_mb < 1:
+                print "file system %s is full, cache %s has %.1fM left" % (
+                    self.fs_name, self.cache_name, usage[1])
+                break
+            self.write(size_mb)
+            usage = self._settled(usage)
+        self.full = usage[1] <= 0
+        return self.full
+
+
+def fill_cache(s, fs_name, cache_name, **kwargs):
+    """ Fills the cache cache_name by writing files to fs_name and gives
+    the CacheFill with the writes and autogrows it saw.
+    """
+    fill = CacheFill(s, fs_name, cache_name, **kwargs)
+    fill.run()
+    return fill
@@ -0,0 +1,78 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Seeds a file system on the SFS with a dataset of a given size in
+one remote command.
+
+The random part of the files is drawn from /dev/urandom once, into a seed
+file that every file copies, the way the scripts used to cp one random
+file around, unless each file is to have random data of its own. The
+files are written by several dd streams at once and synced before the
+command returns.
+"""
+
+import time
+
+SEED_FILE = ".naslib_seed"
+
+
+class DatasetError(Exception):
+    """ The dataset could not be written.
+    """
+
+
+def _file_command(name, random_mb, zero_mb, unique):
+    """ Gives the commands writing one file, random data first.
+    """
+    commands = []
+    if random_mb:
+        source = "/dev/urandom" if unique else SEED_FILE
+        commands.append("dd if=%s of=%s bs=1M count=%d" %
+                        (source, name, random_mb))
+    if zero_mb:
+        commands.append("dd if=/dev/zero of=%s bs=1M seek=%d count=%d "
+                        "conv=notrunc" % (name, random_mb, zero_mb))
+    return " && ".join(commands)
+
+
+def dataset_command(fs_name, total_mb, files, entropy=1.0, streams=4,
+                    prefix="stuff", unique=False):
+    """ Gives the shell command writing the dataset to /vx/fs_name.
+    """
+    file_mb = max(1, total_mb // files)
+    random_mb = int(round(file_mb * entropy))
+    zero_mb = file_mb - random_mb
+    steps = ["cd /vx/%s" % fs_name]
+    if random_mb and not unique:
+        steps.append("dd if=/dev/urandom of=%s bs=1M count=%d 2>/dev/null" %
+                     (SEED_FILE, random_mb))
+    # dd reports on stderr even when it succeeds, xargs gives the failures
+    steps.append("seq 0 %d | xargs -P %d -I{} sh -c 'exec 2>/dev/null; %s'" %
+                 (files - 1, streams,
+                  _file_command("%s_{}.txt" % prefix, random_mb, zero_mb,
+                                unique)))
+    command = " && ".join(steps)
+    return "%s; rc=$?; rm -f %s; /bin/sync; exit $rc" % (command, SEED_FILE)
+
+
+def seed(s, fs_name, total_mb, files, entropy=1.0, streams=4,
+         prefix="stuff", unique=False):
+    """ Writes files of prefix_<n>.txt to the file system fs_name, total_mb
+    megabytes between them, a fraction entropy of each random and the rest
+    zeros. Rewrites the files if they are there already. Returns the
+    megabytes written and the MB/s achieved, sync included.
+    """
+    file_mb = max(1, total_mb // files)
+    started = time.time()
+    status, _, err = s.ssh.run(dataset_command(fs_name, total_mb, files,
+                                               entropy, streams, prefix,
+                                               unique))
+    seconds = time.time() - started
+    if status:
+        raise DatasetError("writing %d files to %s failed (%s): %s" %
+                           (files, fs_name, status, err.strip()))
+    written = file_mb * files
+    rate = written / seconds if seconds else 0
+    print "seeded %s with %d files, %dM in %.1fs, %.1f MB/s on %d streams" % (
+        fs_name, files, written, seconds, rate, streams)
+    return written, rate
@@ -0,0 +1,317 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Pool of file system + cache stacks the naslib scripts lease
+instead of creating their own.
+
+The pool lives in a JSON file on the MS, named by NASLIB_FIXTURE_POOL, and
+is shared by every script of a testset run under a lock. A stack is
+created the first time no free one of the right sizes is left, and is
+handed back by the teardown once the snapshots and shares of the test are
+gone and its data is wiped. A stack the test left offline, resized or with
+snapshots on is destroyed rather than handed back. The harness destroys the
+pool when the testset is done.
+
+The harness can have the stack of the next test created ahead of time, in
+the background, with "provision". A lease waits for a stack being
+provisioned rather than creating one more. A batch runs the tests needing
+the same stack one after the other, so they lease one stack in turn, and
+retires the free stacks of those sizes once the last of them is done.
+
+Usage:
+    naslib_fixtures.py destroy <pool file> <ip> <user> <password>
+    naslib_fixtures.py provision <pool file> <ip> <user>
+        <fs size> <cache size> [<cache resize>]
+The provision runs in the background and reads the password from stdin,
+to keep it out of ps.
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import time
+
+from naslib_cachefill import megabytes
+from naslib_wait import wait_for_rollsync
+
+POOL_ENV = "NASLIB_FIXTURE_POOL"
+# holder of a stack while it is created ahead of time
+PROVISIONING = "provisioning"
+# seconds a lease waits for a stack being provisioned
+PROVISION_WAIT = 300
+# the SFS rounds the sizes it reports by up to as much
+SIZE_TOLERANCE = 0.02
+# empties a file system, dotfiles included, but keeps its lost+found
+WIPE_COMMAND = "find /vx/%s -mindepth 1 -maxdepth 1 ! -name lost+found " \
+    "-exec rm -rf {} +"
+
+
+class FixturePool(object):
+    """ File system + cache stacks by SFS and sizes, with the test holding
+    each one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock_path = path + ".lock"
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get(POOL_ENV)
+        return cls(path) if path else None
+
+    @contextlib.contextmanager
+    def _locked(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {"prefix": "nlp" + hashlib.sha1(self.path).hexdigest()[:5],
+                    "next": 0, "stacks": []}
+        with open(self.path) as pool:
+            return json.load(pool)
+
+    def _save(self, state):
+        with open(self.path + ".tmp", "w") as pool:
+            json.dump(state, pool)
+        os.rename(self.path + ".tmp", self.path)
+
+    def _drop(self, stack):
+        with self._locked():
+            state = self._load()
+            state["stacks"] = [other for other in state["stacks"]
+                               if other["fs"] != stack["fs"]]
+            self._save(state)
+
+    @staticmethod
+    def spec(fs_size, cache_size, cache_resize=None):
+        """ Names the sizes of a stack, as the pool file keeps them.
+        """
+        return "%s/%s" % (fs_size, cache_resize or cache_size)
+
+    def builds(self):
+        """ Gives how many stacks the pool created so far.
+        """
+        with self._locked():
+            return self._load()["next"]
+
+    @staticmethod
+    def _new_stack(state, sfs, spec, holder):
+        prefix = "%s%d" % (state["prefix"], state["next"])
+        stack = {"sfs": sfs, "spec": spec, "holder": holder,
+                 "fs": prefix + "_fs", "cache": prefix + "_cache"}
+        state["next"] += 1
+        state["stacks"].append(stack)
+        return stack
+
+    def _set_holder(self, stack, holder):
+        with self._locked():
+            state = self._load()
+            found = False
+            for other in state["stacks"]:
+                if other["fs"] == stack["fs"]:
+                    other["holder"] = holder
+                    found = True
+            self._save(state)
+        return found
+
+    def _create_stack(self, nas, stack, pool_name, fs_size, cache_size,
+                      cache_resize):
+        try:
+            nas.filesystem.create(stack["fs"], fs_size, pool_name)
+            cache = nas.cache.create(stack["cache"], cache_size, pool_name)
+            if cache_resize:
+                cache.resize(cache_resize)
+        except Exception:
+            self._destroy_stack(nas, stack)
+            self._drop(stack)
+            raise
+        print "fixture pool created %s and %s" % (stack["fs"], stack["cache"])
+
+    def lease(self, nas, sfs, holder, pool_name, fs_size, cache_size,
+              cache_resize=None):
+        """ Hands a free stack of the given sizes on an SFS to holder,
+        creating one when none is free or being provisioned. Returns the
+        file system and cache names.
+        """
+        spec = self.spec(fs_size, cache_size, cache_resize)
+        deadline = time.time() + PROVISION_WAIT
+        while True:
+            with self._locked():
+                state = self._load()
+                stacks = [stack for stack in state["stacks"]
+                          if stack["sfs"] == sfs and stack["spec"] == spec]
+                free = [stack for stack in stacks if stack["holder"] is None]
+                if free:
+                    free[0]["holder"] = holder
+                    self._save(state)
+                    # JSON hands back unicode, the scripts expect strings
+                    return str(free[0]["fs"]), str(free[0]["cache"])
+                coming = [stack for stack in stacks
+                          if stack["holder"] == PROVISIONING]
+                if not coming or time.time() > deadline:
+                    stack = self._new_stack(state, sfs, spec, holder)
+                    self._save(state)
+                    break
+            time.sleep(1)
+        self._create_stack(nas, stack, pool_name, fs_size, cache_size,
+                           cache_resize)
+        return str(stack["fs"]), str(stack["cache"])
+
+    def provision(self, nas, sfs, pool_name, fs_size, cache_size,
+                  cache_resize=None):
+        """ Creates a free stack of the given sizes on an SFS, unless one is
+        free or being provisioned already. Returns True if it created one.
+        """
+        spec = self.spec(fs_size, cache_size, cache_resize)
+        with self._locked():
+            state = self._load()
+            if [stack for stack in state["stacks"]
+                    if stack["sfs"] == sfs and stack["spec"] == spec and
+                    stack["holder"] in (None, PROVISIONING)]:
+                return False
+            stack = self._new_stack(state, sfs, spec, PROVISIONING)
+            self._save(state)
+        self._create_stack(nas, stack, pool_name, fs_size, cache_size,
+                           cache_resize)
+        if not self._set_holder(stack, None):
+            # the pool was destroyed while the stack was being created
+            self._destroy_stack(nas, stack)
+            return False
+        return True
+
+    @staticmethod
+    def _baseline_mismatch(nas, stack):
+        """ Says how a stack differs from the one provisioned: its file
+        system offline, a size changed or snapshots left on it. None when
+        it is as provisioned.
+        """
+        fs_size, cache_size = [megabytes(size)
+                               for size in stack["spec"].split("/")]
+        fs = nas.filesystem.get(stack["fs"])
+        if not fs.online:
+            return "%s is offline" % stack["fs"]
+        if abs(megabytes(fs.size) - fs_size) > SIZE_TOLERANCE * fs_size:
+            return "%s is %s, not %dM" % (stack["fs"], fs.size, fs_size)
+        cache = nas.cache.get(stack["cache"])
+        # an autogrow or a resize of the test changes the total
+        cache_total = megabytes(cache.used) + megabytes(cache.available)
+        if abs(cache_total - cache_size) > SIZE_TOLERANCE * cache_size:
+            return "%s is %dM, not %dM" % (stack["cache"], cache_total,
+                                           cache_size)
+        snapshots = [snap.name for snap in nas.snapshot.list()
+                     if snap.filesystem == stack["fs"]]
+        if snapshots:
+            return "snapshots %s left on %s" % (", ".join(snapshots),
+                                               stack["fs"])
+        return None
+
+    def release(self, nas, sfs, holder):
+        """ Wipes the stacks holder leased on an SFS and makes them free
+        again. A stack that is not as provisioned or cannot be wiped is
+        destroyed instead. The snapshots and shares of the test must be
+        gone already.
+        """
+        with self._locked():
+            stacks = [stack for stack in self._load()["stacks"]
+                      if stack["sfs"] == sfs and stack["holder"] == holder]
+        for stack in stacks:
+            try:
+                wait_for_rollsync(nas, stack["fs"])
+                mismatch = self._baseline_mismatch(nas, stack)
+                if mismatch is not None:
+                    raise ValueError(mismatch)
+                status, _, err = nas.ssh.run(WIPE_COMMAND % stack["fs"])
+                if status:
+                    raise ValueError("wipe failed: %s" % err.strip())
+            except Exception as err:  # pylint: disable=broad-except
+                print "fixture %s not reusable: %s" % (stack["fs"], err)
+                self._destroy_stack(nas, stack)
+                self._drop(stack)
+                continue
+            self._set_holder(stack, None)
+
+    @staticmethod
+    def _destroy_stack(nas, stack):
+        for resource, name in ((nas.filesystem, stack["fs"]),
+                               (nas.cache, stack["cache"])):
+            try:
+                if resource.exists(name):
+                    resource.delete(name)
+            except Exception as err:  # pylint: disable=broad-except
+                print "failed to delete %s: %s" % (name, err)
+
+    def retire(self, nas, sfs, spec):
+        """ Deletes the free stacks of some sizes on an SFS, once no test
+        left in the group needs them. Returns how many it deleted.
+        """
+        with self._locked():
+            state = self._load()
+            stacks = [stack for stack in state["stacks"]
+                      if stack["sfs"] == sfs and stack["spec"] == spec and
+                      stack["holder"] is None]
+            state["stacks"] = [stack for stack in state["stacks"]
+                               if stack not in stacks]
+            self._save(state)
+        for stack in stacks:
+            self._destroy_stack(nas, stack)
+        return len(stacks)
+
+    def destroy(self, nas, sfs):
+        """ Deletes every stack of the pool on an SFS, and the pool file
+        once no stack is left.
+        """
+        with self._locked():
+            state = self._load()
+            stacks = [stack for stack in state["stacks"]
+                      if stack["sfs"] == sfs]
+            state["stacks"] = [stack for stack in state["stacks"]
+                               if stack["sfs"] != sfs]
+            self._save(state)
+        for stack in stacks:
+            self._destroy_stack(nas, stack)
+        if not state["stacks"]:
+            os.unlink(self.path)
+        return len(stacks)
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    if not (len(argv) == 5 and argv[0] == "destroy" or
+            len(argv) in (6, 7) and argv[0] == "provision"):
+        sys.stderr.write(__doc__)
+        return 2
+    pool = FixturePool(argv[1])
+    if argv[0] == "destroy" and not os.path.exists(pool.path):
+        return 0
+    if argv[0] == "provision":
+        argv = argv[:4] + [sys.stdin.readline().rstrip("\n")] + argv[4:]
+    # configures the naslib logging
+    from naslibtest import POOL_NAME
+    from naslib.connection import NasConnection
+    with NasConnection(*argv[2:5]) as nas:
+        if argv[0] == "destroy":
+            print "destroyed %d fixture stacks" % pool.destroy(nas, argv[2])
+        elif not pool.provision(nas, argv[2], POOL_NAME, *argv[5:]):
+            print "a stack of that size is already there"
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
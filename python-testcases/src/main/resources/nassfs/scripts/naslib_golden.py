@@ -0,0 +1,207 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Golden images: seeded file systems kept on the SFS from one run
+to the next, for the tests that need gigabytes of data to restore.
+
+A golden image is a file system and cache of given sizes with a dataset
+written to it, and a snapshot holding the same files rewritten. A test
+checks the image out, takes its own snapshot and has the rewritten data
+restored, so it gets a file system changed since its snapshot without
+writing anything. Once the test restores its snapshot the image is as it
+was checked out. A marker file only the checked out state has tells a
+ready image from one a test left behind, which is built again.
+
+The images are found through NASLIB_GOLDEN, a directory on the MS with
+their list and the locks that give each one to a single test at a time.
+A test holds the lock of its image until its tearDown. The images stay on
+the SFS for the next run; the harness only runs "destroy" once the testset
+is done when the testset asks it to.
+
+Usage:
+    naslib_golden.py list <golden dir>
+    naslib_golden.py destroy <golden dir> <ip> <user> <password>
+"""
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import time
+
+from naslib_dataset import seed
+from naslib_wait import wait_for_rollsync
+
+GOLDEN_ENV = "NASLIB_GOLDEN"
+MARKER = ".naslib_golden"
+
+
+@contextlib.contextmanager
+def _locked(path):
+    with open(path, "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+class GoldenImage(object):
+    """ The golden image of some sizes on an SFS.
+    """
+
+    def __init__(self, directory, sfs, fs_size, cache_size, data_mb, files):
+        self.directory = directory
+        self.sfs = sfs
+        self.spec = "%s/%s/%dM/%d" % (fs_size, cache_size, data_mb, files)
+        self.fs_size = fs_size
+        self.cache_size = cache_size
+        self.data_mb = data_mb
+        self.files = files
+        prefix = "nlg" + hashlib.sha1(self.spec).hexdigest()[:6]
+        self.fs = prefix + "_fs"
+        self.cache = prefix + "_cache"
+        self.changed = prefix + "_changed"
+        self.lock = None
+
+    @classmethod
+    def from_env(cls, sfs, fs_size, cache_size, data_mb, files):
+        directory = os.environ.get(GOLDEN_ENV)
+        if not directory:
+            return None
+        return cls(directory, sfs, fs_size, cache_size, data_mb, files)
+
+    def _index_path(self):
+        return os.path.join(self.directory, "golden.json")
+
+    def _register(self, present):
+        """ Adds the image to the list of the directory, or takes it off.
+        """
+        path = self._index_path()
+        with _locked(path + ".lock"):
+            images = []
+            if os.path.exists(path):
+                with open(path) as index:
+                    images = json.load(index)
+            images = [image for image in images if
+                      (image["sfs"], image["spec"]) != (self.sfs, self.spec)]
+            if present:
+                images.append({"sfs": self.sfs, "spec": self.spec,
+                               "fs_size": self.fs_size,
+                               "cache_size": self.cache_size,
+                               "data_mb": self.data_mb, "files": self.files})
+            with open(path + ".tmp", "w") as index:
+                json.dump(images, index)
+            os.rename(path + ".tmp", path)
+
+    def _acquire(self):
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+        self.lock = open(os.path.join(
+            self.directory, "%s_%s.lock" % (self.sfs, self.fs)), "a")
+        fcntl.flock(self.lock, fcntl.LOCK_EX)
+
+    def release(self):
+        """ Lets other tests check the image out. NaslibTest.tearDown calls
+        it, once the test restored its snapshot.
+        """
+        if self.lock is not None:
+            fcntl.flock(self.lock, fcntl.LOCK_UN)
+            self.lock.close()
+            self.lock = None
+
+    def is_ready(self, nas):
+        if not (nas.filesystem.exists(self.fs) and
+                nas.cache.exists(self.cache) and
+                nas.snapshot.exists(self.changed)):
+            return False
+        wait_for_rollsync(nas, self.fs)
+        status, _, _ = nas.ssh.run("test -f /vx/%s/%s" % (self.fs, MARKER))
+        return status == 0
+
+    def build(self, nas, pool_name):
+        """ Creates the image: the rewritten data goes in first and is kept
+        by the snapshot, then the data tests check out is written over it.
+        """
+        self.destroy(nas)
+        self._register(True)
+        nas.filesystem.create(self.fs, self.fs_size, pool_name)
+        nas.cache.create(self.cache, self.cache_size, pool_name)
+        seed(nas, self.fs, self.data_mb, self.files)
+        nas.snapshot.create(self.changed, self.fs, self.cache)
+        seed(nas, self.fs, self.data_mb, self.files)
+        nas.ssh.run("touch /vx/%s/%s && /bin/sync" % (self.fs, MARKER))
+        print "golden image %s built on %s" % (self.spec, self.sfs)
+
+    def checkout(self, nas, pool_name):
+        """ Gives the image to this script, building it first if it is not
+        there or not as it should be. Returns the file system and cache
+        names.
+        """
+        self._acquire()
+        if not self.is_ready(nas):
+            self.build(nas, pool_name)
+        return self.fs, self.cache
+
+    def rewrite(self, nas):
+        """ Restores the rewritten data over the checked out file system
+        and waits for it to be there.
+        """
+        started = time.time()
+        nas.snapshot.restore(self.changed, self.fs)
+        wait_for_rollsync(nas, self.fs, changed_mb=self.data_mb,
+                          started=started)
+
+    def destroy(self, nas):
+        if nas.filesystem.exists(self.fs):
+            wait_for_rollsync(nas, self.fs)
+        for resource, args in ((nas.snapshot, (self.changed, self.fs)),
+                               (nas.filesystem, (self.fs,)),
+                               (nas.cache, (self.cache,))):
+            if resource.exists(args[0]):
+                resource.delete(*args)
+        self._register(False)
+
+
+def golden_images(directory):
+    """ Gives the images listed in a golden directory.
+    """
+    path = os.path.join(directory, "golden.json")
+    if not os.path.exists(path):
+        return []
+    with open(path) as index:
+        return [GoldenImage(directory, str(image["sfs"]),
+                            str(image["fs_size"]), str(image["cache_size"]),
+                            image["data_mb"], image["files"])
+                for image in json.load(index)]
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    if argv[:1] == ["list"] and len(argv) == 2:
+        for golden in golden_images(argv[1]):
+            print golden.sfs, golden.spec, golden.fs
+        return 0
+    if argv[:1] != ["destroy"] or len(argv) != 5:
+        sys.stderr.write(__doc__)
+        return 2
+    # configures the naslib logging
+    import naslibtest  # pylint: disable=unused-import
+    from naslib.connection import NasConnection
+    with NasConnection(*argv[2:5]) as nas:
+        for golden in golden_images(argv[1]):
+            if golden.sfs == argv[2]:
+                golden.destroy(nas)
+                print "destroyed golden image %s" % golden.spec
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
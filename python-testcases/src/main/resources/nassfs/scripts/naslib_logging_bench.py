@@ -0,0 +1,130 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Measures what the LITP logging costs the naslib scripts, with the
+logging configured by /etc/litp_logging.conf against the buffered mode of
+NASLIB_FAST_LOGGING.
+
+A bare log call is always measured. With the SFS details it also times the
+list, create and delete paths of file systems. The file systems go in the
+ledger NASLIB_LEDGER names, if any, and whatever the deletes left behind is
+deleted before the benchmark ends.
+
+Usage:
+    naslib_logging_bench.py [<ip> <user> <password>] [--iterations N]
+"""
+
+import os
+import sys
+import time
+
+from naslibtest import FAST_LOGGING_ENV, POOL_NAME, Ledger, LedgerConnection
+from naslibtest import buffered_logging, ensure_host_key, log
+
+from naslib.connection import NasConnection
+
+MODES = ("litp", "fast")
+
+
+def set_mode(mode):
+    """ Switches the logging of this process between the modes.
+    """
+    if mode == "fast":
+        os.environ[FAST_LOGGING_ENV] = "1"
+    else:
+        os.environ.pop(FAST_LOGGING_ENV, None)
+    return buffered_logging()
+
+
+def timed(operation, iterations, logs):
+    """ Runs an operation and gives the mean seconds it took. The buffered
+    records are dropped after each run, as for a passing test.
+    """
+    started = time.time()
+    for index in range(iterations):
+        operation(index)
+        if logs is not None:
+            logs.discard()
+    return (time.time() - started) / iterations
+
+
+def bench_log_call(iterations, logs):
+    return timed(lambda index: log.trace.debug("bench record %d", index),
+                 iterations * 100, logs)
+
+
+def cleanup(s, names):
+    """ Deletes the file systems of the benchmark still on the SFS.
+    """
+    for name in names:
+        try:
+            if s.filesystem.exists(name):
+                s.filesystem.delete(name)
+        except Exception as err:  # pylint: disable=broad-except
+            print "could not delete %s: %s" % (name, err)
+
+
+def bench_sfs(conn_args, iterations, logs):
+    """ Times the file system paths on the SFS.
+    """
+    prefix = "nlbench%d" % os.getpid()
+    timings = {}
+    # tried, and not deleted yet
+    created = []
+    ensure_host_key(conn_args[0])
+    connection = NasConnection(*conn_args)
+    ledger = Ledger.from_env()
+    if ledger is not None:
+        connection = LedgerConnection(connection, ledger)
+    with connection as s:
+
+        def create(index):
+            created.append("%s_%d" % (prefix, index))
+            s.filesystem.create(created[-1], "10M", POOL_NAME)
+
+        def delete(index):
+            s.filesystem.delete("%s_%d" % (prefix, index))
+            created.remove("%s_%d" % (prefix, index))
+
+        try:
+            timings["list"] = timed(lambda index: s.filesystem.list(),
+                                    iterations, logs)
+            timings["create"] = timed(create, iterations, logs)
+            timings["delete"] = timed(delete, iterations, logs)
+        finally:
+            cleanup(s, created)
+    return timings
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    iterations = 5
+    if "--iterations" in argv:
+        position = argv.index("--iterations")
+        iterations = int(argv[position + 1])
+        argv = argv[:position] + argv[position + 2:]
+    if len(argv) not in (0, 3):
+        sys.stderr.write(__doc__)
+        return 2
+    results = {}
+    for mode in MODES:
+        logs = set_mode(mode)
+        results[("log call", mode)] = bench_log_call(iterations, logs)
+        if argv:
+            for path, seconds in bench_sfs(argv, iterations, logs).items():
+                results[(path, mode)] = seconds
+    set_mode("litp")
+    print "%-10s %12s %12s %8s" % ("path", "litp ms", "fast ms", "saved")
+    for path in ("log call", "list", "create", "delete"):
+        if (path, "litp") not in results:
+            continue
+        litp = results[(path, "litp")] * 1000
+        fast = results[(path, "fast")] * 1000
+        print "%-10s %12.3f %12.3f %7.1f%%" % (
+            path, litp, fast, 100 * (litp - fast) / litp if litp else 0)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,198 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Times the naslib calls of a test and counts the SSH commands each
+one runs.
+
+ProfilingConnection wraps the connection NaslibTest.connect_to_nfs hands
+out. Calls on its resource managers, s.filesystem.create and the like, and
+on the objects they give back, fs.resize and the like, are timed by
+operation name. The SSH commands naslib runs during a call are counted
+against it; the ones a script runs itself are timed as "ssh.run".
+"""
+
+import math
+import threading
+import time
+
+PROFILE_ENV = "NASLIB_PROFILE"
+PROFILED_KINDS = ("filesystem", "share", "cache", "snapshot", "pool", "disk")
+
+
+def percentile(values, fraction):
+    """ Nearest rank percentile of some values: the smallest one at least
+    that fraction of them are no greater than. The benchmarks use it too.
+    """
+    ordered = sorted(values)
+    rank = int(math.ceil(fraction * len(ordered)))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+class Profile(object):
+    """ Durations and SSH command counts of the calls of one test, by
+    operation.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def current(self):
+        """ Gives the operations running on this thread, outermost first.
+        """
+        if not hasattr(self.local, "operations"):
+            self.local.operations = []
+        return self.local.operations
+
+    def time(self, operation, method, *args, **kwargs):
+        """ Calls method, timing it as operation unless an operation
+        running on this thread made the call.
+        """
+        running = self.current()
+        if running:
+            return method(*args, **kwargs)
+        record = {"ssh": 0}
+        running.append(record)
+        started = time.time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            seconds = time.time() - started
+            running.pop()
+            with self.lock:
+                self.calls.setdefault(operation, []).append(
+                    (seconds, record["ssh"]))
+
+    def ssh_run(self, run, *args, **kwargs):
+        """ Counts an SSH command against the running operation, or times
+        it as one of its own.
+        """
+        running = self.current()
+        if running:
+            running[0]["ssh"] += 1
+            return run(*args, **kwargs)
+        running.append({"ssh": 1})
+        started = time.time()
+        try:
+            return run(*args, **kwargs)
+        finally:
+            seconds = time.time() - started
+            record = running.pop()
+            with self.lock:
+                self.calls.setdefault("ssh.run", []).append(
+                    (seconds, record["ssh"]))
+
+    def summary(self):
+        """ Gives calls, p50, p95 and max seconds and SSH commands of every
+        operation.
+        """
+        with self.lock:
+            calls = dict((operation, list(timings))
+                         for operation, timings in self.calls.items())
+        summary = {}
+        for operation, timings in calls.items():
+            seconds = [timing[0] for timing in timings]
+            summary[operation] = {
+                "calls": len(timings),
+                "p50": round(percentile(seconds, 0.5), 4),
+                "p95": round(percentile(seconds, 0.95), 4),
+                "max": round(max(seconds), 4),
+                "ssh": sum(timing[1] for timing in timings)}
+        return summary
+
+
+def format_summary(summary):
+    """ One line per operation, slowest in total first.
+    """
+    lines = ["%-22s %6s %9s %9s %9s %6s" % ("operation", "calls", "p50 ms",
+                                            "p95 ms", "max ms", "ssh")]
+    for operation, stats in sorted(
+            summary.items(), key=lambda item: -item[1]["p50"] *
+            item[1]["calls"]):
+        lines.append("%-22s %6d %9.1f %9.1f %9.1f %6d" % (
+            operation, stats["calls"], stats["p50"] * 1000,
+            stats["p95"] * 1000, stats["max"] * 1000, stats["ssh"]))
+    return lines
+
+
+def _is_naslib_object(value):
+    return type(value).__module__.split(".")[0] == "naslib"
+
+
+class ProfilingProxy(object):
+    """ Times the method calls on a naslib resource manager or on an object
+    it gave back, as "<kind>.<method>", and wraps what they give back in
+    turn.
+    """
+
+    def __init__(self, target, kind, profile):
+        self._target = target
+        self._kind = kind
+        self._profile = profile
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if not callable(value) or isinstance(value, type):
+            return value
+        operation = "%s.%s" % (self._kind, name)
+
+        def timed(*args, **kwargs):
+            result = self._profile.time(operation, value, *args, **kwargs)
+            return self._wrap(result)
+        return timed
+
+    def _wrap(self, result):
+        if isinstance(result, list):
+            return [self._wrap(item) for item in result]
+        if _is_naslib_object(result):
+            return ProfilingProxy(result, self._kind, self._profile)
+        return result
+
+    def __repr__(self):
+        return repr(self._target)
+
+    def __str__(self):
+        return str(self._target)
+
+
+class ProfilingNas(object):
+    """ Hands out the resource managers of a connection wrapped in
+    ProfilingProxy, and everything else as it is.
+    """
+
+    def __init__(self, nas, profile):
+        self._nas = nas
+        self._profiled = dict(
+            (kind, ProfilingProxy(getattr(nas, kind), kind, profile))
+            for kind in PROFILED_KINDS if hasattr(nas, kind))
+
+    def __getattr__(self, name):
+        if name in self._profiled:
+            return self._profiled[name]
+        return getattr(self._nas, name)
+
+
+class ProfilingConnection(object):
+    """ Context manager profiling the naslib calls made on a connection.
+    """
+
+    def __init__(self, connection, profile):
+        self.connection = connection
+        self.profile = profile
+        self.ssh = None
+
+    def __enter__(self):
+        nas = self.connection.__enter__()
+        # naslib runs its commands on the client of the connection itself,
+        # an instance attribute catches them
+        self.ssh = nas.ssh
+        run = self.ssh.run
+        self.ssh.run = lambda *args, **kwargs: self.profile.ssh_run(
+            run, *args, **kwargs)
+        return ProfilingNas(nas, self.profile)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.ssh is not None and "run" in vars(self.ssh):
+            del self.ssh.run
+        return self.connection.__exit__(exc_type, exc_value, tb)
@@ -0,0 +1,717 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Local stand-in for an SFS or Veritas Access node, an SSH server
+answering the filestore CLI commands naslib runs from an in-memory model.
+
+The model has the pools and disks given on the command line and keeps the
+file systems, shares, caches and snapshots naslib makes. The data of every
+file system is a directory under the root, so the commands the scripts run
+themselves, dd, ls, find and the like, run there through bash with /vx
+pointing at it; a snapshot is a copy of that directory, a restore copies
+it back and the cache of a snapshot is used by the data changed since.
+
+Pointing the scripts at the simulator, NASLIB_SFS_SIMULATOR set to its
+host:port, has NaslibTest send every command of naslib here instead of to
+the SFS named on the command line, see SimulatedSSHClient in naslibtest.py.
+A testset with sfs_simulator set has the harness start one on the MS.
+The output formats follow those of the SFS 6.2 and Access 7 CLIs; they
+are all in the TEMPLATES below.
+
+Usage:
+    naslib_sfs_sim.py serve [--port N] [--root DIR] [--solution SFS|VA]
+        [--user U --password P] [--pool NAME:DISK,DISK,...]
+"""
+
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+import paramiko
+
+SIMULATOR_ENV = "NASLIB_SFS_SIMULATOR"
+DEFAULT_PORT = 2222
+DEFAULT_POOLS = {"litp2": ["emc_clariion0_40", "emc_clariion0_41"]}
+DISK_MB = 50 * 1024
+MIN_FS_MB = 10
+# a cache over 90% used grows by 20%, up to twice its size
+AUTOGROW_USED = 0.9
+AUTOGROW_STEP = 1.2
+AUTOGROW_LIMIT = 2.0
+# a rollsync takes the changed data at this rate, and at least as long
+ROLLSYNC_MB_PER_SEC = 200.0
+ROLLSYNC_MIN_SECS = 2.0
+DISK_GROUP = "sfsdg"
+# seconds a finished command waits for the client to close its channel
+CLOSE_WAIT = 30
+
+# product prefix and message code of every error, by solution
+SOLUTIONS = {"SFS": ("SFS", "V-288-%s"), "VA": ("ACCESS", "V-493-10-%s")}
+# the message codes that differ between the solutions
+VA_CODES = {"1883": "1120"}
+
+TEMPLATES = {
+    "fs_header": ("FS", "STATUS", "SIZE", "LAYOUT", "MIRRORS", "COLUMNS",
+                  "USE%", "NFS SHARED", "CIFS SHARED", "SECONDARY TIER",
+                  "POOL LIST"),
+    "rollback_header": ("NAME", "TYPE", "FILESYSTEM", "SNAPDATE",
+                        "CHANGED_DATA", "SYNCED_DATA"),
+    "cache_header": ("CACHE NAME", "TOTAL(Mb)", "USED(Mb) (%)",
+                     "AVAIL(Mb) (%)", "SDCNT"),
+    "share": "%-40s %s (%s)",
+    "pool_header": "%-20s %s\n%s %s\n" % ("Pool", "List of disks", "-" * 20,
+                                         "-" * 34),
+    "pool": "%-20s %s",
+    "vxdisk_header": ("DEVICE", "TYPE", "DISK", "GROUP", "STATUS"),
+    "vxdisk": "%-24s %-14s %-24s %-8s %s",
+    "vxtask_header": "TASKID  PTID TYPE/STATE    PCT   PROGRESS",
+    "vxtask": "%6d        RSYNC/R    %6.2f%% 0/%d/%d RESTORE %s %s",
+}
+
+_SIZE = re.compile(r"^(\d+(?:\.\d+)?)([kKmMgGtT]?)$")
+_UNITS = {"": 1.0, "k": 1.0 / 1024, "m": 1.0, "g": 1024.0,
+          "t": 1024.0 * 1024}
+_CLISH = re.compile(r"""^.*\bclish\b.*?\s-c\s+(["'])(.*)\1\s*$""")
+_ENV_PREFIX = re.compile(r"^(?:sudo\s+|[A-Z_]+=\S*\s+)+")
+
+
+class CliError(Exception):
+    """ A command the SFS would refuse, with the module and code of its
+    message.
+    """
+
+    def __init__(self, module, code, message, status=1, vxvm=False):
+        super(CliError, self).__init__(message)
+        self.module = module
+        self.code = code
+        self.status = status
+        # a VxVM command rather than one of the filestore CLI
+        self.vxvm = vxvm
+
+
+def megabytes(size):
+    """ Gives a CLI size such as "10M" or "1.5g" in megabytes.
+    """
+    match = _SIZE.match(size)
+    if not match:
+        raise CliError("fs", "601", "Invalid size %s." % size)
+    return float(match.group(1)) * _UNITS[match.group(2).lower()]
+
+
+def format_size(mb):
+    for unit, scale in (("T", 1024.0 * 1024), ("G", 1024.0)):
+        if mb >= scale:
+            return "%.2f%s" % (mb / scale, unit)
+    return "%.2fM" % mb
+
+
+def format_table(header, rows):
+    """ Left aligned columns under a header ruled with "=".
+    """
+    widths = [max([len(header[column])] +
+                  [len(str(row[column])) for row in rows]) + 2
+              for column in range(len(header))]
+
+    def line(cells):
+        return "".join(str(cell).ljust(width)
+                       for cell, width in zip(cells, widths)).rstrip()
+    return "\n".join([line(header), line(["=" * len(cell)
+                                          for cell in header])] +
+                     [line(row) for row in rows]) + "\n"
+
+
+def split_pipe(command):
+    """ Splits a command at its first unquoted "|", giving the head and the
+    rest, None if there is no pipe.
+    """
+    quote = None
+    for position, char in enumerate(command):
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "|" and command[position + 1:position + 2] != "|":
+            return command[:position].strip(), command[position + 1:]
+    return command.strip(), None
+
+
+def unwrap(command):
+    """ Takes the CLI command out of a clish, sudo or environment wrapper.
+    """
+    match = _CLISH.match(command.strip())
+    if match:
+        command = match.group(2)
+    return _ENV_PREFIX.sub("", command.strip())
+
+
+def directory_files(path):
+    """ Gives the size and mtime of every file under path, by relative path.
+    """
+    files = {}
+    for root, _, names in os.walk(path):
+        for name in names:
+            full = os.path.join(root, name)
+            stat = os.lstat(full)
+            files[os.path.relpath(full, path)] = (stat.st_size,
+                                                  stat.st_mtime)
+    return files
+
+
+class SfsModel(object):
+    """ Pools, disks, file systems, shares, caches and snapshots of the
+    simulated node, and the commands that work on them.
+    """
+
+    def __init__(self, root, pools=None, solution="SFS"):
+        self.root = root
+        self.solution = solution
+        self.pools = dict(pools or DEFAULT_POOLS)
+        self.disks = dict((disk, DISK_MB) for disks in self.pools.values()
+                          for disk in disks)
+        self.filesystems = {}
+        self.caches = {}
+        self.snapshots = {}
+        # (path, client, options)
+        self.shares = []
+        self.lock = threading.RLock()
+        self.next_task = 100
+        # the model starts empty, so does the data of a root used before
+        for directory in (self.vx_dir, self.snapshot_dir):
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+            os.makedirs(directory)
+
+    @property
+    def vx_dir(self):
+        return os.path.join(self.root, "vx")
+
+    @property
+    def snapshot_dir(self):
+        return os.path.join(self.root, "rollbacks")
+
+    def fs_path(self, name):
+        return os.path.join(self.vx_dir, name)
+
+    def error_text(self, err):
+        if err.vxvm:
+            return "VxVM %s ERROR V-5-1-%s %s\n" % (err.module, err.code, err)
+        product, code = SOLUTIONS[self.solution]
+        number = VA_CODES.get(err.code, err.code) \
+            if self.solution == "VA" else err.code
+        return "%s %s ERROR %s %s\n" % (product, err.module, code % number,
+                                        err)
+
+    def execute(self, command):
+        """ Runs one command. Returns its exit status, stdout and stderr.
+        """
+        head, rest = split_pipe(unwrap(command))
+        words = head.split()
+        handler = self.handler(words)
+        if handler is None:
+            return self.shell(command)
+        try:
+            with self.lock:
+                out = handler(words) or ""
+            status, err = 0, ""
+        except CliError as cli_error:
+            status, out, err = cli_error.status, "", self.error_text(
+                cli_error)
+        if rest is None:
+            return status, out, err
+        piped_status, piped_out, piped_err = self.shell(rest, out)
+        return piped_status, piped_out, err + piped_err
+
+    def handler(self, words):
+        """ Gives the method answering a CLI command, None for anything
+        else.
+        """
+        handlers = [
+            (("storage", "fs", "list"), self.fs_list),
+            (("storage", "fs", "create"), self.fs_create),
+            (("storage", "fs", "destroy"), self.fs_destroy),
+            (("storage", "fs", "growto"), self.fs_resize),
+            (("storage", "fs", "shrinkto"), self.fs_resize),
+            (("storage", "fs", "online"), self.fs_online),
+            (("storage", "fs", "offline"), self.fs_online),
+            (("nfs", "share", "show"), self.share_show),
+            (("nfs", "share", "add"), self.share_add),
+            (("nfs", "share", "delete"), self.share_delete),
+            (("storage", "rollback", "cache", "list"), self.cache_list),
+            (("storage", "rollback", "cache", "create"), self.cache_create),
+            (("storage", "rollback", "cache", "destroy"),
+             self.cache_destroy),
+            (("storage", "rollback", "cache", "growto"), self.cache_resize),
+            (("storage", "rollback", "cache", "shrinkto"),
+             self.cache_resize),
+            (("storage", "rollback", "list"), self.rollback_list),
+            (("storage", "rollback", "create"), self.rollback_create),
+            (("storage", "rollback", "destroy"), self.rollback_destroy),
+            (("storage", "rollback", "restore"), self.rollback_restore),
+            (("storage", "pool", "list"), self.pool_list),
+            (("storage", "disk", "list"), self.disk_list),
+            (("vxdisk", "list"), self.vxdisk_list),
+            (("vxtask", "list"), self.vxtask_list),
+            (("vxprint",), self.vxprint)]
+        for prefix, handler in handlers:
+            if tuple(words[:len(prefix)]) == prefix:
+                return handler
+        return None
+
+    def shell(self, command, stdin=""):
+        """ Runs a command through bash with /vx pointing at the simulated
+        file systems.
+        """
+        command = re.sub(r"(?<![\w.])/vx(?=/|\b)", self.vx_dir, command)
+        process = subprocess.Popen(["bash", "-c", command], cwd=self.root,
+                                   stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        out, err = process.communicate(stdin)
+        return (process.returncode, out.replace(self.vx_dir, "/vx"),
+                err.replace(self.vx_dir, "/vx"))
+
+    def pool_free(self, pool):
+        used = sum(fs["size"] for fs in self.filesystems.values()
+                   if fs["pool"] == pool)
+        used += sum(cache["size"] for cache in self.caches.values()
+                    if cache["pool"] == pool)
+        return sum(self.disks[disk] for disk in self.pools[pool]) - used
+
+    def check_pool(self, pool, mb, module):
+        if pool not in self.pools:
+            raise CliError(module, "1002", "Pool %s does not exist." % pool)
+        if mb > self.pool_free(pool):
+            raise CliError(module, "2077", "Not enough space in pool %s "
+                           "for %s." % (pool, format_size(mb)))
+
+    def pool_list(self, words):
+        return TEMPLATES["pool_header"] + "".join(
+            TEMPLATES["pool"] % (pool, " ".join(disks)) + "\n"
+            for pool, disks in sorted(self.pools.items()))
+
+    def disk_list(self, words):
+        return format_table(("Disk", "sfs_01"),
+                            [(disk, "OK") for disk in sorted(self.disks)])
+
+    def vxdisk_list(self, words):
+        rows = [TEMPLATES["vxdisk_header"]] + [
+            (disk, "auto:cdsdisk", disk, DISK_GROUP, "online")
+            for disk in sorted(self.disks)]
+        return "".join(TEMPLATES["vxdisk"] % row + "\n" for row in rows)
+
+    def filesystem(self, name, module="fs"):
+        if name not in self.filesystems:
+            raise CliError(module, "646", "File system %s does not exist."
+                           % name)
+        return self.filesystems[name]
+
+    def used_mb(self, name):
+        return sum(size for size, _ in
+                   directory_files(self.fs_path(name)).values()) / 1048576.0
+
+    def restoring(self, name):
+        return self.filesystems[name]["rollsync_until"] > time.time()
+
+    def fs_list(self, words):
+        names = words[3:] or sorted(self.filesystems)
+        rows = []
+        for name in names:
+            fs = self.filesystem(name)
+            shared = any(path.rstrip("/") == "/vx/" + name
+                         for path, _, _ in self.shares)
+            rows.append((name, "online" if fs["online"] else "offline",
+                         format_size(fs["size"]), fs["layout"], "-", "-",
+                         "%d%%" % (100 * self.used_mb(name) / fs["size"]),
+                         "yes" if shared else "no", "no", "no", fs["pool"]))
+        return format_table(TEMPLATES["fs_header"], rows)
+
+    def fs_create(self, words):
+        # storage fs create <layout> <name> <size> [...] <pool>
+        if len(words) < 7:
+            raise CliError("fs", "600", "Usage: storage fs create simple "
+                           "<fs_name> <size> <pool>")
+        layout, name, size, pool = words[3], words[4], words[5], words[-1]
+        if name in self.filesystems:
+            raise CliError("fs", "678", "File system %s already exists."
+                           % name)
+        mb = megabytes(size)
+        self.check_pool(pool, mb, "fs")
+        self.filesystems[name] = {"size": mb, "pool": pool,
+                                  "layout": layout, "online": True,
+                                  "rollsync_until": 0}
+        os.makedirs(self.fs_path(name))
+        return "%s fs SUCCESS V-288-0 Creating %s file system\n" % (
+            SOLUTIONS[self.solution][0], layout)
+
+    def fs_destroy(self, words):
+        name = words[3]
+        self.filesystem(name)
+        if any(path.rstrip("/") == "/vx/" + name
+               for path, _, _ in self.shares):
+            raise CliError("fs", "1006", "File system %s is shared, it "
+                           "cannot be destroyed." % name)
+        if any(snap["fs"] == name for snap in self.snapshots.values()):
+            raise CliError("fs", "1010", "File system %s has rollbacks, it "
+                           "cannot be destroyed." % name)
+        del self.filesystems[name]
+        shutil.rmtree(self.fs_path(name))
+
+    def fs_resize(self, words):
+        # storage fs growto|shrinkto primary <name> <size>
+        name, mb = words[4], megabytes(words[5])
+        fs = self.filesystem(name)
+        if words[2] == "growto":
+            if mb <= fs["size"]:
+                raise CliError("fs", "1030", "New size must be greater than "
+                               "the current size %s." %
+                               format_size(fs["size"]))
+            self.check_pool(fs["pool"], mb - fs["size"], "fs")
+        elif mb >= fs["size"] or mb < max(MIN_FS_MB, self.used_mb(name)):
+            raise CliError("fs", "1031", "Cannot shrink %s to %s." %
+                           (name, format_size(mb)))
+        fs["size"] = mb
+
+    def fs_online(self, words):
+        self.filesystem(words[3])["online"] = words[2] == "online"
+
+    def share_show(self, words):
+        return "".join(TEMPLATES["share"] % share + "\n"
+                       for share in self.shares)
+
+    def share_add(self, words):
+        # nfs share add <options> <path> <client>
+        options, path, client = words[3], words[4], words[5]
+        self.filesystem(path.rstrip("/").split("/")[-1], "nfs")
+        if any(share[:2] == (path, client) for share in self.shares):
+            raise CliError("nfs", "2048", "%s is already exported to %s." %
+                           (path, client))
+        self.shares.append((path, client, options))
+
+    def share_delete(self, words):
+        # nfs share delete <path> [<client>]
+        path = words[3]
+        client = words[4] if len(words) > 4 else None
+        matching = [share for share in self.shares if share[0] == path and
+                    client in (None, share[1])]
+        if not matching:
+            raise CliError("nfs", "2050", "%s is not exported%s." %
+                           (path, " to %s" % client if client else ""))
+        for share in matching:
+            self.shares.remove(share)
+
+    def cache(self, name):
+        if name not in self.caches:
+            raise CliError("rollback", "1851", "Cache %s does not exist." %
+                           name)
+        return self.caches[name]
+
+    def changed_mb(self, snap_name):
+        """ Data of the file system of a snapshot that changed since it was
+        taken.
+        """
+        snap = self.snapshots[snap_name]
+        # the copy of a snapshot does not keep the mtimes exactly, the
+        # stats of the file system when it was taken are compared instead
+        then = snap["files"]
+        now = directory_files(self.fs_path(snap["fs"]))
+        changed = sum(size for path, (size, mtime) in now.items()
+                      if then.get(path) != (size, mtime))
+        changed += sum(size for path, (size, _) in then.items()
+                       if path not in now)
+        return changed / 1048576.0
+
+    def cache_usage(self, name):
+        """ Gives the used MB of a cache, growing it when it is nearly full
+        as the SFS autogrow does.
+        """
+        cache = self.caches[name]
+        used = sum(self.changed_mb(snap) for snap, details
+                   in self.snapshots.items() if details["cache"] == name)
+        while used > AUTOGROW_USED * cache["size"] and \
+                cache["size"] < AUTOGROW_LIMIT * cache["initial"]:
+            cache["size"] = min(cache["size"] * AUTOGROW_STEP,
+                                AUTOGROW_LIMIT * cache["initial"])
+        return min(used, cache["size"])
+
+    def cache_list(self, words):
+        rows = []
+        for name in sorted(self.caches):
+            used = self.cache_usage(name)
+            total = self.caches[name]["size"]
+            rows.append((name, "%d" % total, "%d (%d)" % (
+                used, 100 * used / total), "%d (%d)" % (
+                    total - used, 100 * (total - used) / total),
+                sum(1 for snap in self.snapshots.values()
+                    if snap["cache"] == name)))
+        return format_table(TEMPLATES["cache_header"], rows)
+
+    def cache_create(self, words):
+        # storage rollback cache create <name> <size> <pool>
+        name, size, pool = words[4], words[5], words[6]
+        if name in self.caches:
+            raise CliError("rollback", "1850", "Cache %s already exists." %
+                           name)
+        mb = megabytes(size)
+        self.check_pool(pool, mb, "rollback")
+        self.caches[name] = {"size": mb, "initial": mb, "pool": pool}
+
+    def cache_destroy(self, words):
+        name = words[4]
+        self.cache(name)
+        if any(snap["cache"] == name for snap in self.snapshots.values()):
+            raise CliError("rollback", "1852", "Cache %s is in use by "
+                           "rollbacks." % name)
+        del self.caches[name]
+
+    def cache_resize(self, words):
+        name, mb = words[4], megabytes(words[5])
+        cache = self.cache(name)
+        if words[3] == "growto":
+            self.check_pool(cache["pool"], mb - cache["size"], "rollback")
+        elif mb < self.cache_usage(name):
+            raise CliError("rollback", "1853", "Cannot shrink cache %s "
+                           "below its usage." % name)
+        cache["size"] = cache["initial"] = mb
+
+    def snapshot(self, name):
+        if name not in self.snapshots:
+            raise CliError("rollback", "1800", "Rollback %s does not exist."
+                           % name)
+        return self.snapshots[name]
+
+    def rollback_list(self, words):
+        rows = []
+        for name, snap in sorted(self.snapshots.items()):
+            if words[3:] and snap["fs"] not in words[3:]:
+                continue
+            changed = self.changed_mb(name)
+            percent = 100 * changed / self.filesystems[snap["fs"]]["size"]
+            data = "%s(%.1f%%)" % (format_size(changed), percent)
+            rows.append((name, "spaceopt", snap["fs"], time.strftime(
+                "%Y/%m/%d %H:%M", time.localtime(snap["created"])), data,
+                data))
+        return format_table(TEMPLATES["rollback_header"], rows)
+
+    def rollback_create(self, words):
+        # storage rollback create space-optimized <name> <fs> <cache>
+        name, fs_name, cache_name = words[4], words[5], words[6]
+        self.filesystem(fs_name, "rollback")
+        cache = self.cache(cache_name)
+        if name in self.snapshots:
+            raise CliError("rollback", "1801", "Rollback %s already exists."
+                           % name)
+        if self.cache_usage(cache_name) >= cache["size"]:
+            raise CliError("rollback", "1883", "fsck failed for %s." % name)
+        shutil.copytree(self.fs_path(fs_name),
+                        os.path.join(self.snapshot_dir, name))
+        self.snapshots[name] = {"fs": fs_name, "cache": cache_name,
+                                "created": time.time(),
+                                "files": directory_files(
+                                    self.fs_path(fs_name))}
+
+    def rollback_destroy(self, words):
+        # storage rollback destroy <name> <fs>
+        name = words[3]
+        snap = self.snapshot(name)
+        if self.restoring(snap["fs"]):
+            raise CliError("rollback", "1820", "Rollsync of %s is running, "
+                           "try again later." % snap["fs"])
+        del self.snapshots[name]
+        shutil.rmtree(os.path.join(self.snapshot_dir, name))
+
+    def rollback_restore(self, words):
+        # storage rollback restore <fs> <name>
+        fs_name, name = words[3], words[4]
+        fs = self.filesystem(fs_name, "rollback")
+        snap = self.snapshot(name)
+        if snap["fs"] != fs_name:
+            raise CliError("rollback", "1802", "Rollback %s is not of %s." %
+                           (name, fs_name))
+        if not fs["online"]:
+            raise CliError("rollback", "1821", "File system %s is offline."
+                           % fs_name)
+        if self.restoring(fs_name):
+            raise CliError("rollback", "1820", "Rollsync of %s is running, "
+                           "try again later." % fs_name)
+        changed = self.changed_mb(name)
+        shutil.rmtree(self.fs_path(fs_name))
+        shutil.copytree(os.path.join(self.snapshot_dir, name),
+                        self.fs_path(fs_name))
+        # the file system is as the snapshot has it again
+        snap["files"] = directory_files(self.fs_path(fs_name))
+        fs["rollsync_until"] = time.time() + max(
+            ROLLSYNC_MIN_SECS, changed / ROLLSYNC_MB_PER_SEC)
+        fs["rollsync_mb"] = max(1, int(changed))
+
+    def vxtask_list(self, words):
+        lines = [TEMPLATES["vxtask_header"]]
+        now = time.time()
+        for name, fs in sorted(self.filesystems.items()):
+            if fs["rollsync_until"] > now:
+                self.next_task += 1
+                total = fs["rollsync_mb"] * 2048
+                done = max(0.0, 1 - (fs["rollsync_until"] - now) /
+                           max(ROLLSYNC_MIN_SECS,
+                               fs["rollsync_mb"] / ROLLSYNC_MB_PER_SEC))
+                lines.append(TEMPLATES["vxtask"] % (
+                    self.next_task, 100 * done, total, int(total * done),
+                    name, DISK_GROUP))
+        return "\n".join(lines) + "\n"
+
+    def vxprint(self, words):
+        """ Volume, plex and subdisk records of the file systems and
+        caches, of those named only when names are given.
+        """
+        names = []
+        skip = False
+        for word in words[1:]:
+            if skip:
+                skip = False
+            elif word == "-g":
+                skip = True
+            elif not word.startswith("-"):
+                names.append(word)
+        volumes = dict((name, fs["size"])
+                       for name, fs in self.filesystems.items())
+        volumes.update((name, cache["size"])
+                       for name, cache in self.caches.items())
+        for name in names:
+            if name not in volumes:
+                raise CliError("vxprint", "924", "Record %s not found" %
+                               name, status=11, vxvm=True)
+        disk = sorted(self.disks)[0]
+        lines = ["Disk group: %s" % DISK_GROUP, ""]
+        for name in names or sorted(volumes):
+            sectors = int(volumes[name] * 2048)
+            lines.extend([
+                "v  %-20s %-12s ENABLED  ACTIVE   %-10d SELECT    -  fsgen"
+                % (name, "-", sectors),
+                "pl %-20s %-12s ENABLED  ACTIVE   %-10d CONCAT    -  RW"
+                % (name + "-01", name, sectors),
+                "sd %-20s %-12s %-8s 0        %-10d 0         %s ENA"
+                % (disk + "-01", name + "-01", disk, sectors, disk)])
+        return "\n".join(lines) + "\n"
+
+
+class SimulatorServer(paramiko.ServerInterface):
+    """ Accepts the password given, any when None, and runs the commands
+    of exec requests on the model.
+    """
+
+    def __init__(self, model, user=None, password=None):
+        self.model = model
+        self.user = user
+        self.password = password
+
+    def check_auth_password(self, username, password):
+        if self.user is None or (username, password) == (self.user,
+                                                         self.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        thread = threading.Thread(target=self.run_command,
+                                  args=(channel, command))
+        thread.daemon = True
+        thread.start()
+        return True
+
+    def run_command(self, channel, command):
+        try:
+            status, out, err = self.model.execute(command)
+        except Exception:  # pylint: disable=broad-except
+            status, out, err = 1, "", traceback.format_exc()
+        try:
+            channel.sendall(out)
+            channel.sendall_stderr(err)
+            channel.send_exit_status(status)
+            # the reply to the exec request may not have gone out yet, a
+            # close before it fails the request, so the client closes first
+            channel.shutdown_write()
+            deadline = time.time() + CLOSE_WAIT
+            while not channel.closed and time.time() < deadline:
+                time.sleep(0.05)
+        finally:
+            channel.close()
+
+
+def host_key(root):
+    """ Gives the host key kept in root, making it the first time.
+    """
+    path = os.path.join(root, "host_key")
+    if not os.path.exists(path):
+        paramiko.RSAKey.generate(2048).write_private_key_file(path)
+    return paramiko.RSAKey(filename=path)
+
+
+def serve(port=DEFAULT_PORT, root=None, solution="SFS", user=None,
+          password=None, pools=None, host="127.0.0.1"):
+    """ Answers SSH connections until interrupted.
+    """
+    root = root or tempfile.mkdtemp(prefix="naslib_sfs_sim.")
+    model = SfsModel(root, pools, solution)
+    key = host_key(root)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(100)
+    print "naslib SFS simulator on %s:%d, %s data in %s" % (
+        host, port, solution, root)
+    sys.stdout.flush()
+    while True:
+        client, _ = sock.accept()
+        # small replies go out at once rather than after the delayed ACK
+        client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        transport = paramiko.Transport(client)
+        transport.add_server_key(key)
+        try:
+            transport.start_server(server=SimulatorServer(model, user,
+                                                          password))
+        except (paramiko.SSHException, EOFError, socket.error):
+            transport.close()
+
+
+def parse_address(address):
+    """ Gives the host and port of a "host[:port]" simulator address.
+    """
+    host, _, port = address.partition(":")
+    return host or "127.0.0.1", int(port or DEFAULT_PORT)
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    if not argv or argv[0] != "serve" or len(argv) % 2 != 1:
+        sys.stderr.write(__doc__)
+        return 2
+    options = dict(zip(argv[1::2], argv[2::2]))
+    pools = None
+    if "--pool" in options:
+        name, disks = options["--pool"].split(":", 1)
+        pools = {name: disks.split(",")}
+    serve(port=int(options.get("--port", DEFAULT_PORT)),
+          root=options.get("--root"),
+          solution=options.get("--solution", "SFS"),
+          user=options.get("--user"), password=options.get("--password"),
+          pools=pools)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
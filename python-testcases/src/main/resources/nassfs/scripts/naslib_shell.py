@@ -0,0 +1,75 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Runs a sequence of shell commands on the SFS in one remote exec.
+
+The commands run one after the other, each in a subshell of its own so an
+exit or a cd stays local to it. Before and after every command a marker
+with a random token goes to both stdout and stderr, the one after it
+carrying its exit status, and the output is split back on the markers.
+"""
+
+import binascii
+import os
+import re
+
+
+class BatchError(Exception):
+    """ The output of a batch could not be split back per command.
+    """
+
+
+def _markers(token, index, status="-"):
+    marker = "printf '\\n%%s %%s %%s\\n' %s %d %s" % (token, index, status)
+    return "%s; %s >&2" % (marker, marker)
+
+
+def batch_script(commands, token):
+    """ Gives the shell script running commands between the markers.
+    """
+    lines = []
+    for index, command in enumerate(commands):
+        lines.append(_markers(token, index))
+        lines.append("( %s\n) < /dev/null" % command)
+        lines.append("rc=$?; " + _markers(token, index, '"$rc"'))
+    return "\n".join(lines)
+
+
+def split_output(output, token, count):
+    """ Splits the output of one stream back per command. Returns the
+    output of every command and the exit statuses the end markers give.
+    """
+    # tolerates the output being stripped of its outer whitespace
+    marker = re.compile(r"(?:^|\n)%s (\d+) (-|\d+)(?:\n|$)" % token)
+    outputs = [None] * count
+    statuses = [None] * count
+    position = 0
+    begun = None
+    for match in marker.finditer(output):
+        index = int(match.group(1))
+        if match.group(2) == "-":
+            begun = index
+        elif begun == index:
+            outputs[index] = output[position:match.start()]
+            statuses[index] = int(match.group(2))
+        position = match.end()
+    if None in outputs:
+        raise BatchError("the batch ended after %d of %d commands" %
+                         (outputs.index(None), count))
+    return outputs, statuses
+
+
+def run_batch(s, commands, timeout=None):
+    """ Runs commands on the SFS of the NasConnection s in one exec.
+    Returns the (status, stdout, stderr) of every command, as s.ssh.run
+    gives them for one.
+    """
+    commands = list(commands)
+    if not commands:
+        return []
+    token = "NASLIB" + binascii.hexlify(os.urandom(8))
+    kwargs = {"timeout": timeout} if timeout else {}
+    _, out, err = s.ssh.run(batch_script(commands, token), **kwargs)
+    outs, statuses = split_output(out, token, len(commands))
+    errs, _ = split_output(err, token, len(commands))
+    return zip(statuses, outs, errs)
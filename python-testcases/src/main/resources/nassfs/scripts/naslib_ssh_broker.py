@@ -0,0 +1,325 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: SSH broker on the MS that keeps one authenticated transport per
+SFS and user, like an SSH control master.
+
+The scripts send their SFS commands over a unix socket instead of opening
+an SSH session each, and every command runs on a channel of its own on the
+shared transport. The broker goes away after IDLE_TIMEOUT seconds without
+work and restarts itself when this file changes. See BrokeredSSHClient in
+naslibtest.py for how NasConnection is attached to it.
+
+Usage:
+    naslib_ssh_broker.py start | stop | status
+"""
+
+import base64
+import fcntl
+import os
+import select
+import socket
+import sys
+import threading
+import time
+import traceback
+
+import paramiko
+
+from naslib_agent import recv_json, send_json
+
+BROKER_DIR = os.path.dirname(os.path.realpath(__file__))
+SOCKET_PATH = os.path.join(BROKER_DIR, "naslib_ssh_broker.sock")
+LOCK_PATH = os.path.join(BROKER_DIR, "naslib_ssh_broker.lock")
+LOG_PATH = os.path.join(BROKER_DIR, "naslib_ssh_broker.log")
+KNOWN_HOSTS = os.path.expanduser("~/.ssh/known_hosts")
+
+IDLE_TIMEOUT = 1800
+START_TIMEOUT = 30
+KEEPALIVE_SECS = 30
+# a channel the SFS refuses, over its MaxSessions, is asked for this many
+# times, waiting twice as long each time
+CHANNEL_ATTEMPTS = 6
+CHANNEL_BACKOFF_SECS = 0.5
+
+
+class BrokerError(Exception):
+    """ The broker could not run a command.
+    """
+
+
+def broker_version():
+    """ Identifies the code the broker runs.
+    """
+    return "%d" % os.stat(os.path.realpath(__file__)).st_mtime
+
+
+class Transports(object):
+    """ The SSH clients the broker holds, by host, user and password.
+    """
+
+    def __init__(self):
+        self.clients = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def _connect(self, key, refreshed=False):
+        host, user, password = key
+        client = paramiko.SSHClient()
+        client.load_host_keys(KNOWN_HOSTS)
+        client.set_missing_host_key_policy(paramiko.RejectPolicy())
+        try:
+            client.connect(host, username=user, password=password,
+                           look_for_keys=False, allow_agent=False)
+        except paramiko.BadHostKeyException:
+            if refreshed:
+                raise
+            # the SFS has another key now, known_hosts gets it once
+            from naslibtest import ensure_host_key
+            ensure_host_key(host, refresh=True)
+            return self._connect(key, refreshed=True)
+        client.get_transport().set_keepalive(KEEPALIVE_SECS)
+        return client
+
+    def get(self, key):
+        with self.lock:
+            key_lock = self.locks.setdefault(key, threading.Lock())
+        with key_lock:
+            client = self.clients.get(key)
+            transport = client.get_transport() if client else None
+            if transport is None or not transport.is_active():
+                if client is not None:
+                    client.close()
+                client = self._connect(key)
+                self.clients[key] = client
+            return client
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
+        self.clients = {}
+
+
+def run_command(transports, request):
+    """ Runs a command on a channel of the shared transport. A channel the
+    SFS refuses is asked for again after a back off, and the transport is
+    only reconnected once it went away, as other threads have channels on
+    it. The output goes as base64, it need not be UTF-8.
+    """
+    key = (request["host"], request["user"], request["password"])
+    reconnected = False
+    attempt = 0
+    while True:
+        transport = transports.get(key).get_transport()
+        try:
+            channel = transport.open_session()
+        except (paramiko.SSHException, socket.error, EOFError):
+            if not transport.is_active() and not reconnected:
+                reconnected = True
+                continue
+            attempt += 1
+            if attempt == CHANNEL_ATTEMPTS:
+                raise
+            time.sleep(CHANNEL_BACKOFF_SECS * 2 ** (attempt - 1))
+            continue
+        try:
+            channel.settimeout(request.get("timeout"))
+            channel.exec_command(request["command"].encode("utf-8"))
+            out = channel.makefile("rb").read()
+            err = channel.makefile_stderr("rb").read()
+            status = channel.recv_exit_status()
+        except (paramiko.SSHException, socket.error, EOFError):
+            if transport.is_active() or reconnected:
+                raise
+            reconnected = True
+            continue
+        finally:
+            channel.close()
+        return {"status": status, "stdout": base64.b64encode(out),
+                "stderr": base64.b64encode(err)}
+
+
+def close_listener(sock):
+    """ Stops accepting requests. The socket file goes first so a new broker
+    can bind while this one finishes.
+    """
+    try:
+        os.unlink(SOCKET_PATH)
+    except OSError:
+        pass
+    sock.close()
+
+
+def handle(conn, transports, request):
+    """ Runs the command of one request and answers it.
+    """
+    try:
+        try:
+            response = run_command(transports, request)
+        except Exception:  # pylint: disable=broad-except
+            response = {"error": traceback.format_exc()}
+        send_json(conn, response)
+    except socket.error:
+        pass
+    finally:
+        conn.close()
+
+
+def serve(sock, version):
+    """ Accepts requests until idle or stale, running each command on a
+    thread of its own.
+    """
+    transports = Transports()
+    last_request = time.time()
+    try:
+        while True:
+            readable, _, _ = select.select([sock], [], [], 5)
+            if not readable:
+                if time.time() - last_request > IDLE_TIMEOUT:
+                    close_listener(sock)
+                    return
+                continue
+            conn, _ = sock.accept()
+            last_request = time.time()
+            try:
+                conn.settimeout(30)
+                request = recv_json(conn)
+                conn.settimeout(None)
+            except (socket.error, ValueError):
+                conn.close()
+                continue
+            if request.get("version") != version:
+                close_listener(sock)
+                send_json(conn, {"stale": True})
+                conn.close()
+                return
+            if request.get("ping"):
+                send_json(conn, {"pong": True, "pid": os.getpid()})
+                conn.close()
+                continue
+            thread = threading.Thread(target=handle,
+                                      args=(conn, transports, request))
+            thread.daemon = True
+            thread.start()
+    finally:
+        transports.close()
+
+
+def daemon_main():
+    """ Body of the detached broker process.
+    """
+    os.chdir("/")
+    null = os.open(os.devnull, os.O_RDONLY)
+    log = os.open(LOG_PATH, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0600)
+    os.dup2(null, 0)
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+    version = broker_version()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        os.unlink(SOCKET_PATH)
+    except OSError:
+        pass
+    sock.bind(SOCKET_PATH)
+    os.chmod(SOCKET_PATH, 0600)
+    sock.listen(32)
+    print "naslib ssh broker %d listening, %s" % (os.getpid(), version)
+    sys.stdout.flush()
+    serve(sock, version)
+
+
+def request_broker(request):
+    """ Sends a request to the broker. Returns None when it is not running.
+    """
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(SOCKET_PATH)
+        send_json(conn, request)
+        return recv_json(conn)
+    except (socket.error, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def ping():
+    """ True if an up to date broker answers.
+    """
+    response = request_broker({"ping": True, "version": broker_version()})
+    return bool(response and response.get("pong"))
+
+
+def start():
+    """ Starts the broker unless an up to date one is running.
+    """
+    lock = open(LOCK_PATH, "w")
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    try:
+        if ping():
+            return True
+        pid = os.fork()
+        if pid == 0:
+            os.setsid()
+            if os.fork() == 0:
+                try:
+                    daemon_main()
+                finally:
+                    os._exit(0)  # pylint: disable=protected-access
+            os._exit(0)  # pylint: disable=protected-access
+        os.waitpid(pid, 0)
+        deadline = time.time() + START_TIMEOUT
+        while time.time() < deadline:
+            if ping():
+                return True
+            time.sleep(0.1)
+        return False
+    finally:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+        lock.close()
+
+
+def stop():
+    """ Asks a running broker to exit.
+    """
+    request_broker({"version": None})
+
+
+def run(conn_args, command, timeout=None):
+    """ Runs a command on an SFS through the broker, starting it if needed.
+    Returns the exit status, stdout and stderr.
+    """
+    request = {"version": broker_version(), "host": conn_args[0],
+               "user": conn_args[1], "password": conn_args[2],
+               "command": command, "timeout": timeout}
+    for _ in range(2):
+        response = request_broker(request)
+        if response is not None and not response.get("stale"):
+            if "error" in response:
+                raise BrokerError(response["error"])
+            return (response["status"],
+                    base64.b64decode(response["stdout"]),
+                    base64.b64decode(response["stderr"]))
+        if not start():
+            break
+    raise BrokerError("the SSH broker could not be started, see %s" %
+                      LOG_PATH)
+
+
+def main(argv):
+    """ Command line entry point.
+    """
+    if argv == ["start"]:
+        return 0 if start() else 1
+    if argv == ["stop"]:
+        stop()
+        return 0
+    if argv == ["status"]:
+        running = ping()
+        print "running" if running else "stopped"
+        return 0 if running else 1
+    sys.stderr.write(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
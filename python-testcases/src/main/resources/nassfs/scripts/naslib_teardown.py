@@ -0,0 +1,155 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Deletes SFS resources in dependency order, running the deletes
+that do not depend on each other at the same time.
+
+A file system goes after its shares and snapshots, a cache after every
+snapshot, as the ledger does not say which cache a snapshot uses. Extra
+workers run on connections of their own, opened only when there is more
+than one delete ready to run.
+"""
+
+import threading
+import time
+import traceback
+
+# at most as many SFS connections deleting at the same time
+WORKERS = 3
+
+
+class TeardownTask(object):
+    """ One resource to delete and the tasks that must finish before it.
+    """
+
+    def __init__(self, kind, args):
+        self.kind = kind
+        self.args = args
+        self.depends_on = set()
+        self.dependents = set()
+        self.duration = None
+        self.error = None
+
+    def __repr__(self):
+        return "%s %s" % (self.kind, " ".join(self.args))
+
+
+def plan(resources):
+    """ Builds the tasks, with their dependencies, for the live resources of
+    a ledger.
+    """
+    tasks = dict((kind, [TeardownTask(kind, args) for args in resources[kind]])
+                 for kind in resources)
+    for fs_task in tasks.get("filesystem", []):
+        fs_name = fs_task.args[0]
+        for share_task in tasks.get("share", []):
+            if share_task.args[0].rstrip("/").split("/")[-1] == fs_name:
+                fs_task.depends_on.add(share_task)
+        for snap_task in tasks.get("snapshot", []):
+            if snap_task.args[1] == fs_name:
+                fs_task.depends_on.add(snap_task)
+    for cache_task in tasks.get("cache", []):
+        cache_task.depends_on.update(tasks.get("snapshot", []))
+    all_tasks = [task for kind_tasks in tasks.values() for task in kind_tasks]
+    for task in all_tasks:
+        for dependency in task.depends_on:
+            dependency.dependents.add(task)
+    return all_tasks
+
+
+class TeardownExecutor(object):
+    """ Runs the tasks of a plan. delete(nas, task) deletes one resource,
+    connect() opens a context manager giving a naslib connection for an
+    extra worker.
+    """
+
+    def __init__(self, delete, connect, workers=WORKERS):
+        self.delete = delete
+        self.connect = connect
+        self.workers = workers
+        self._cond = threading.Condition()
+        self._ready = []
+        self._waiting = {}
+        self._running = 0
+        self._left = 0
+
+    def run(self, tasks, nas):
+        """ Deletes everything, nas serving the first worker. Returns the
+        tasks in the order they finished.
+        """
+        self._ready = [task for task in tasks if not task.depends_on]
+        self._waiting = dict((task, len(task.depends_on)) for task in tasks
+                             if task.depends_on)
+        self._left = len(tasks)
+        finished = []
+        threads = [threading.Thread(target=self._extra_worker,
+                                    args=(finished,))
+                   for _ in range(min(self.workers, len(tasks)) - 1)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        self._work(nas, finished)
+        for thread in threads:
+            thread.join()
+        return finished
+
+    def _next_task(self, extra=False):
+        """ Takes a ready task, waiting for one. Returns None when all is
+        done. An extra worker without a connection only takes a task while
+        another one is running.
+        """
+        with self._cond:
+            while self._left and not (
+                    self._ready and (self._running or not extra)):
+                self._cond.wait(1)
+            if not self._left:
+                return None
+            self._running += 1
+            return self._ready.pop(0)
+
+    def _finish(self, task, finished):
+        with self._cond:
+            self._running -= 1
+            self._left -= 1
+            finished.append(task)
+            for dependent in task.dependents:
+                self._waiting[dependent] -= 1
+                if not self._waiting[dependent]:
+                    del self._waiting[dependent]
+                    self._ready.append(dependent)
+            self._cond.notify_all()
+
+    def _work(self, nas, finished, first=None):
+        task = first or self._next_task()
+        while task is not None:
+            started = time.time()
+            try:
+                self.delete(nas, task)
+            except Exception:  # pylint: disable=broad-except
+                task.error = traceback.format_exc()
+            task.duration = time.time() - started
+            print "deleted %r in %.2fs%s" % (
+                task, task.duration, " (failed)" if task.error else "")
+            self._finish(task, finished)
+            task = self._next_task()
+
+    def _extra_worker(self, finished):
+        """ Opens a connection only once there is a task to run on it, so
+        plans with a single branch never pay for one.
+        """
+        while True:
+            task = self._next_task(extra=True)
+            if task is None:
+                return
+            try:
+                with self.connect() as nas:
+                    self._work(nas, finished, task)
+                return
+            except Exception:  # pylint: disable=broad-except
+                # no connection, hand the task back to the other workers
+                with self._cond:
+                    if task.duration is None:
+                        self._running -= 1
+                        self._ready.insert(0, task)
+                        self._cond.notify_all()
+                return
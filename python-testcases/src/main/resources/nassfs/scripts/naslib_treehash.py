@@ -0,0 +1,99 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Tree hashes of the contents of a file system on the SFS, to check
+a restore brought back exactly what the snapshot had.
+
+The files are hashed on the SFS in one pass, find | sort | sha1sum, and the
+hash of every directory is built here from the names and hashes of what it
+holds, as in a Merkle tree. Two tree hashes are compared top down, so only
+the directories that differ are looked into. Empty directories do not
+count.
+"""
+
+import hashlib
+
+HASH_COMMAND = ("cd /vx/%s && find . -type f -print0 | sort -z | "
+                "xargs -0 -r sha1sum")
+
+
+class TreeHashError(Exception):
+    """ The file system could not be hashed.
+    """
+
+
+class TreeHash(object):
+    """ The hash of every file and directory under a file system, by path
+    relative to it, the file system itself being "".
+    """
+
+    def __init__(self, file_hashes):
+        self.hashes = dict(file_hashes)
+        self.children = {"": set()}
+        for path in file_hashes:
+            parts = path.split("/")
+            for depth in range(1, len(parts) + 1):
+                parent = "/".join(parts[:depth - 1])
+                self.children.setdefault(parent, set()).add(
+                    "/".join(parts[:depth]))
+        for directory in sorted(self.children, key=len, reverse=True):
+            entries = "".join("%s %s\n" % (child.rsplit("/", 1)[-1],
+                                           self.hashes[child])
+                              for child in sorted(self.children[directory]))
+            self.hashes[directory] = hashlib.sha1(entries).hexdigest()
+
+    @property
+    def root(self):
+        return self.hashes[""]
+
+    def is_directory(self, path):
+        return path in self.children
+
+    def diff(self, other, path=""):
+        """ Gives what differs from another tree hash, top down: the paths
+        only this one has as "added", those only the other has as "removed"
+        and the files whose contents differ as "changed". A directory only
+        one of them has is given as a whole.
+        """
+        if self.hashes.get(path) == other.hashes.get(path):
+            return []
+        if path not in other.hashes:
+            return [("added", path)]
+        if path not in self.hashes:
+            return [("removed", path)]
+        if not (self.is_directory(path) and other.is_directory(path)):
+            return [("changed", path)]
+        differences = []
+        for child in sorted(self.children[path] | other.children[path]):
+            differences.extend(self.diff(other, child))
+        return differences
+
+
+def parse_sha1sums(output):
+    """ Gives the file hashes of sha1sum output by relative path.
+    """
+    hashes = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        digest, path = line.split(None, 1)
+        hashes[path.lstrip("*")[2:]] = digest.lstrip("\\")
+    return hashes
+
+
+def tree_hash(s, fs_name):
+    """ Hashes the contents of the file system fs_name in one remote
+    command.
+    """
+    status, out, err = s.ssh.run(HASH_COMMAND % fs_name)
+    if status:
+        raise TreeHashError("hashing %s failed (%s): %s" %
+                            (fs_name, status, err.strip()))
+    return TreeHash(parse_sha1sums(out))
+
+
+def describe(differences):
+    """ One line per difference, for assertion messages.
+    """
+    return "\n".join("%s %s" % (change, path or ".")
+                     for change, path in differences)
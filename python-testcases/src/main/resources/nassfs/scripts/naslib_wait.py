@@ -0,0 +1,128 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Polling with exponential backoff, jitter and an overall deadline,
+for the scripts that wait on the SFS.
+
+The rollsync waits also measure the restores. When told how much data a
+restore brings back, a wait polls at intervals sized from the throughput
+earlier restores reached on this MS, and records the duration and
+throughput of this one. naslib_batch.py hands the records of a job back
+with its result.
+"""
+
+import json
+import os
+import random
+import time
+
+# seconds a rollsync may take before the wait gives up, the 30G restore of
+# 10832_test_03.py is the longest one the scripts start
+ROLLSYNC_DEADLINE = 1800
+# moving average of the rollsync throughput seen on this MS
+ROLLSYNC_HISTORY = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                "naslib_rollsync.json")
+# weight of the latest restore in the moving average
+HISTORY_WEIGHT = 0.3
+# restores smaller than this say more about latency than throughput
+HISTORY_MIN_MB = 100
+# measurements of this process not yet taken by take_metrics
+_METRICS = []
+
+
+class WaitTimeout(Exception):
+    """ The condition was not met before the deadline.
+    """
+
+
+def wait_until(condition, deadline_secs, what="condition", initial=0.5,
+               factor=1.5, max_interval=10.0, jitter=0.2):
+    """ Polls condition() until it is true and returns the seconds waited.
+    The interval starts at initial and grows by factor up to max_interval,
+    each one varied by up to jitter of itself so parallel waiters do not
+    poll the SFS in step. Raises WaitTimeout at the deadline.
+    """
+    started = time.time()
+    deadline = started + deadline_secs
+    interval = initial
+    polls = 1
+    while not condition():
+        left = deadline - time.time()
+        if left <= 0:
+            raise WaitTimeout("%s not met after %.1fs and %d polls" %
+                              (what, time.time() - started, polls))
+        delay = interval * random.uniform(1 - jitter, 1 + jitter)
+        time.sleep(min(delay, left))
+        interval = min(interval * factor, max_interval)
+        polls += 1
+    waited = time.time() - started
+    if polls > 1:
+        print "waited %.1fs (%d polls) for %s" % (waited, polls, what)
+    return waited
+
+
+def rollsync_rate():
+    """ Gives the MB/s rollsyncs reached on this MS so far, None before
+    the first one.
+    """
+    try:
+        with open(ROLLSYNC_HISTORY) as history:
+            return json.load(history)["mb_per_sec"]
+    except (IOError, ValueError, KeyError):
+        return None
+
+
+def _update_rollsync_rate(mb_per_sec):
+    previous = rollsync_rate()
+    if previous is not None:
+        mb_per_sec = (HISTORY_WEIGHT * mb_per_sec +
+                      (1 - HISTORY_WEIGHT) * previous)
+    with open(ROLLSYNC_HISTORY + ".%d" % os.getpid(), "w") as history:
+        json.dump({"mb_per_sec": mb_per_sec}, history)
+    os.rename(ROLLSYNC_HISTORY + ".%d" % os.getpid(), ROLLSYNC_HISTORY)
+
+
+def take_metrics():
+    """ Gives the measurements recorded since the last call.
+    """
+    metrics = list(_METRICS)
+    del _METRICS[:]
+    return metrics
+
+
+def wait_for_rollsync(s, fs_name, deadline_secs=ROLLSYNC_DEADLINE,
+                      changed_mb=None, started=None):
+    """ Waits for a snapshot restore of a file system to finish and returns
+    the seconds waited. changed_mb is how much data the restore brings
+    back and started when it was asked for, if known; a rollsync seen
+    running or given changed_mb is recorded with its duration from started
+    and, given changed_mb, its throughput.
+    """
+    polls = []
+
+    def finished():
+        polls.append(None)
+        return not s.filesystem.is_restore_running(fs_name)
+
+    started = started or time.time()
+    rate = rollsync_rate()
+    if changed_mb and rate:
+        # the first polls come at an eighth of the expected duration
+        expected = changed_mb / rate
+        waited = wait_until(finished, deadline_secs, "rollsync of %s" %
+                            fs_name, initial=min(60.0, max(0.5, expected / 8)),
+                            max_interval=min(120.0, max(10.0, expected / 4)))
+    else:
+        waited = wait_until(finished, deadline_secs,
+                            "rollsync of %s" % fs_name)
+    if len(polls) > 1 or changed_mb:
+        seconds = time.time() - started
+        metric = {"metric": "rollsync", "fs": fs_name,
+                  "seconds": round(seconds, 3), "polls": len(polls)}
+        if changed_mb and seconds > 0:
+            metric["changed_mb"] = changed_mb
+            metric["mb_per_sec"] = round(changed_mb / seconds, 3)
+            if changed_mb >= HISTORY_MIN_MB:
+                _update_rollsync_rate(changed_mb / seconds)
+        _METRICS.append(metric)
+    return waited
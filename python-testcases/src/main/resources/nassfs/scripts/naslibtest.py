@@ -1,28 +1,596 @@
+import binascii
+import collections
+import json
 import logging
 import logging.config
+import os
+import Queue
 import sys
+import threading
+import time
 import unittest
 
+import socket
+
+import paramiko
+
+import naslib.connection
 from naslib.log import NasLogger
 from naslib.ssh import SSHClient
 from naslib.connection import NasConnection
 
 from litp.core.litp_logging import LitpLogger
 
+from naslib_dataset import seed
+from naslib_fixtures import FixturePool
+from naslib_golden import GoldenImage
+from naslib_profile import PROFILE_ENV, Profile, ProfilingConnection
+from naslib_profile import format_summary
+from naslib_sfs_sim import SIMULATOR_ENV, parse_address
+import naslib_ssh_broker
+
 logging.config.fileConfig("/etc/litp_logging.conf")
 log = LitpLogger()
 log.trace.setLevel(logging.DEBUG)
 NasLogger.set(log)
 
+# when set, log records are buffered and only reach the LITP handlers when
+# a test fails
+FAST_LOGGING_ENV = "NASLIB_FAST_LOGGING"
+
+
+class QueueLogHandler(logging.Handler):
+    """ Hands records to the BufferedLogging thread, together with the
+    handlers the logger had, so emitting costs a queue put.
+    """
+
+    def __init__(self, queue, handlers):
+        logging.Handler.__init__(self)
+        self.queue = queue
+        self.handlers = handlers
+
+    def emit(self, record):
+        self.queue.put((self.handlers, record))
+
+
+class BufferedLogging(object):
+    """ Takes the handlers off every configured logger and keeps the records
+    of the running test in memory instead. A thread resolves the messages
+    off the test's path. flush() replays the records to the original
+    handlers, discard() drops them.
+    """
+
+    def __init__(self, capacity=50000):
+        self.buffer = collections.deque(maxlen=capacity)
+        self.queue = None
+        self.saved = {}
+        self.pid = None
+
+    @staticmethod
+    def _configured_loggers():
+        loggers = [logging.getLogger()]
+        loggers += [logger for logger in
+                    logging.Logger.manager.loggerDict.values()
+                    if isinstance(logger, logging.Logger)]
+        return loggers
+
+    def install(self):
+        self.queue = Queue.Queue()
+        self.pid = os.getpid()
+        for logger in self._configured_loggers():
+            handlers = self.saved.get(logger, logger.handlers)
+            if not handlers:
+                continue
+            self.saved[logger] = list(handlers)
+            logger.handlers = [QueueLogHandler(self.queue,
+                                               self.saved[logger])]
+        thread = threading.Thread(target=self._drain)
+        thread.daemon = True
+        thread.start()
+
+    def uninstall(self):
+        self.discard()
+        for logger, handlers in self.saved.items():
+            logger.handlers = handlers
+        self.saved = {}
+        self.pid = None
+
+    def _drain(self):
+        formatter = logging.Formatter()
+        while True:
+            handlers, record = self.queue.get()
+            try:
+                record.msg = record.getMessage()
+                record.args = None
+                if record.exc_info:
+                    record.exc_text = formatter.formatException(
+                        record.exc_info)
+                    record.exc_info = None
+                self.buffer.append((handlers, record))
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        self.queue.join()
+        for handlers, record in self.buffer:
+            for handler in handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        self.buffer.clear()
+
+    def discard(self):
+        if self.queue is not None:
+            self.queue.join()
+        self.buffer.clear()
+
+
+_buffered_logging = BufferedLogging()
+
+
+def buffered_logging():
+    """ Gives the BufferedLogging of this process when the fast mode is
+    asked for, None otherwise. The thread does not survive a fork, so a
+    forked process, as the agent runs scripts in, installs it again.
+    """
+    wanted = bool(os.environ.get(FAST_LOGGING_ENV))
+    installed = _buffered_logging.pid is not None
+    if installed and (not wanted or _buffered_logging.pid != os.getpid()):
+        if _buffered_logging.pid != os.getpid():
+            # the queue of the parent has no thread behind it here
+            _buffered_logging.queue = None
+        _buffered_logging.uninstall()
+        installed = False
+    if wanted and not installed:
+        _buffered_logging.install()
+    return _buffered_logging if wanted else None
+
+
+# when set, the SFS commands go through naslib_ssh_broker.py
+SSH_BROKER_ENV = "NASLIB_SSH_BROKER"
+
+
+class BrokeredSSHClient(SSHClient):
+    """ SSHClient that runs its commands on the transport the SSH broker
+    keeps, instead of opening a session of its own. NasConnection builds
+    it in place of SSHClient while the broker mode is on.
+    """
+
+    conn_args = None
+
+    def __init__(self, *args, **kwargs):
+        super(BrokeredSSHClient, self).__init__(*args, **kwargs)
+        self.broker_conn_args = BrokeredSSHClient.conn_args
+
+    def connect(self, *args, **kwargs):
+        pass
+
+    def close(self, *args, **kwargs):
+        pass
+
+    def run(self, cmd, timeout=None, *args, **kwargs):
+        return naslib_ssh_broker.run(self.broker_conn_args, cmd, timeout)
+
+
+class KnownHostSSHClient(SSHClient):
+    """ SSHClient that fetches the host key of the SFS again and retries
+    once when the SFS presents another key than the one in known_hosts,
+    as after a reinstall. NasConnection builds it in place of SSHClient
+    while neither the broker nor the simulator is on.
+    """
+
+    conn_args = None
+
+    def __init__(self, *args, **kwargs):
+        super(KnownHostSSHClient, self).__init__(*args, **kwargs)
+        self.known_host_ip = KnownHostSSHClient.conn_args[0]
+
+    def connect(self, *args, **kwargs):
+        try:
+            return super(KnownHostSSHClient, self).connect(*args, **kwargs)
+        except paramiko.BadHostKeyException:
+            ensure_host_key(self.known_host_ip, refresh=True)
+            return super(KnownHostSSHClient, self).connect(*args, **kwargs)
+
+
+def use_ssh_broker(conn_args):
+    """ Has the NasConnections opened from now on attach to the SSH broker
+    for conn_args, or open SSH sessions of their own when the broker mode
+    is off.
+    """
+    if os.environ.get(SSH_BROKER_ENV):
+        BrokeredSSHClient.conn_args = conn_args
+        naslib.connection.SSHClient = BrokeredSSHClient
+    else:
+        KnownHostSSHClient.conn_args = conn_args
+        naslib.connection.SSHClient = KnownHostSSHClient
+
+
+class SimulatedSSHClient(SSHClient):
+    """ SSHClient that runs its commands on naslib_sfs_sim.py instead of
+    the SFS. NasConnection builds it in place of SSHClient while
+    NASLIB_SFS_SIMULATOR gives the host:port of a simulator.
+    """
+
+    conn_args = None
+    address = None
+
+    def __init__(self, *args, **kwargs):
+        super(SimulatedSSHClient, self).__init__(*args, **kwargs)
+        self.sim_conn_args = SimulatedSSHClient.conn_args
+        self.sim_address = SimulatedSSHClient.address
+        self.sim_client = None
+
+    def connect(self, *args, **kwargs):
+        host, port = self.sim_address
+        self.sim_client = paramiko.SSHClient()
+        self.sim_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        self.sim_client.connect(host, port=port,
+                                username=self.sim_conn_args[1],
+                                password=self.sim_conn_args[2],
+                                look_for_keys=False, allow_agent=False)
+        self.sim_client.get_transport().sock.setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def close(self, *args, **kwargs):
+        if self.sim_client is not None:
+            self.sim_client.close()
+            self.sim_client = None
+
+    def run(self, cmd, timeout=None, *args, **kwargs):
+        if self.sim_client is None:
+            self.connect()
+        _, stdout, stderr = self.sim_client.exec_command(cmd,
+                                                         timeout=timeout)
+        out = stdout.read()
+        err = stderr.read()
+        return stdout.channel.recv_exit_status(), out, err
+
+
+def use_sfs_simulator(conn_args):
+    """ Has the NasConnections opened from now on talk to the SFS simulator
+    when NASLIB_SFS_SIMULATOR names one. Returns whether it does.
+    """
+    address = os.environ.get(SIMULATOR_ENV)
+    if not address:
+        return False
+    SimulatedSSHClient.conn_args = conn_args
+    SimulatedSSHClient.address = parse_address(address)
+    naslib.connection.SSHClient = SimulatedSSHClient
+    return True
+
+
+# the SFS pool the scripts create their resources in
+POOL_NAME = "litp2"
+LEDGER_ENV = "NASLIB_LEDGER"
+# resources in the order they can be deleted, with how many of the create
+# arguments identify one for delete
+LEDGER_KINDS = (("share", 2), ("snapshot", 2), ("filesystem", 1),
+                ("cache", 1))
+
+
+# SFS host keys already known to be in known_hosts, by IP, so scripts skip
+# the handshake that fetches them
+HOST_KEY_CACHE = os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                              "naslib_host_keys.json")
+HOST_KEY_TTL = 3600
+# where SSHClient.save_host_key writes
+KNOWN_HOSTS = os.path.expanduser("~/.ssh/known_hosts")
+
+
+def key_fingerprint(key):
+    return binascii.hexlify(key.get_fingerprint())
+
+
+def known_host_fingerprints(ip):
+    try:
+        keys = paramiko.HostKeys(KNOWN_HOSTS).lookup(ip)
+    except IOError:
+        return []
+    return [key_fingerprint(key) for key in (keys or {}).values()]
+
+
+def ensure_host_key(ip, refresh=False):
+    """ Makes sure the host key of an SFS is in known_hosts. The key is only
+    fetched from the SFS when the cache has no entry for it, the entry is
+    older than HOST_KEY_TTL, or known_hosts no longer has that key. refresh
+    drops the entry and fetches the key anyway, after the SFS presented
+    another key than the one known.
+    """
+    try:
+        with open(HOST_KEY_CACHE) as cache_file:
+            cache = json.load(cache_file)
+    except (IOError, ValueError):
+        cache = {}
+    entry = cache.pop(ip, None) if refresh else cache.get(ip)
+    if entry and time.time() - entry["saved"] < HOST_KEY_TTL and \
+            entry["fingerprint"] in known_host_fingerprints(ip):
+        return
+    key = SSHClient.get_remote_host_key(ip)
+    SSHClient.save_host_key(ip, key)
+    cache[ip] = {"fingerprint": key_fingerprint(key), "saved": time.time()}
+    # replaced in one go, scripts running at the same time only ever see a
+    # whole cache
+    tmp_path = "%s.%d" % (HOST_KEY_CACHE, os.getpid())
+    with open(tmp_path, "w") as cache_file:
+        json.dump(cache, cache_file)
+    os.rename(tmp_path, HOST_KEY_CACHE)
+
+
+class Ledger(object):
+    """ File on the MS where the scripts of a test record the SFS resources
+    they create, one JSON entry per line, so the teardown only deletes
+    those.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @classmethod
+    def from_env(cls):
+        path = os.environ.get(LEDGER_ENV)
+        return cls(path) if path else None
+
+    def record(self, op, kind, args):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                if not os.path.isdir(directory):
+                    raise
+        # a single short append is atomic, no lock is needed
+        with open(self.path, "a") as ledger:
+            ledger.write(json.dumps({"op": op, "kind": kind,
+                                     "args": list(args)}) + "\n")
+
+    def is_empty(self):
+        return not os.path.exists(self.path) or \
+            os.path.getsize(self.path) == 0
+
+    def live_resources(self):
+        """ Gives the resources created and not deleted since, by kind, in
+        the order they were created.
+        """
+        live = dict((kind, []) for kind, _ in LEDGER_KINDS)
+        if self.is_empty():
+            return live
+        with open(self.path) as ledger:
+            for line in ledger:
+                entry = json.loads(line)
+                args = tuple(arg.encode("utf-8") for arg in entry["args"])
+                resources = live.setdefault(entry["kind"], [])
+                if args in resources:
+                    resources.remove(args)
+                if entry["op"] in ("create", "lease"):
+                    resources.append(args)
+        return live
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class RecordingResource(object):
+    """ Wraps a naslib resource manager such as s.filesystem so create and
+    delete calls are written to the ledger. A create is recorded before it
+    is attempted, so a half done one still gets cleaned up.
+    """
+
+    def __init__(self, resource, kind, key_args, ledger):
+        self._resource = resource
+        self._kind = kind
+        self._key_args = key_args
+        self._ledger = ledger
+
+    def __getattr__(self, name):
+        return getattr(self._resource, name)
+
+    def create(self, *args, **kwargs):
+        self._ledger.record("create", self._kind, args[:self._key_args])
+        return self._resource.create(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        result = self._resource.delete(*args, **kwargs)
+        self._ledger.record("delete", self._kind, args[:self._key_args])
+        return result
+
+
+class RecordingNas(object):
+    """ Hands out the resource managers of a naslib connection wrapped in
+    RecordingResource, and everything else as it is.
+    """
+
+    def __init__(self, nas, ledger):
+        self._nas = nas
+        self._recording = dict(
+            (kind, RecordingResource(getattr(nas, kind), kind, key_args,
+                                     ledger))
+            for kind, key_args in LEDGER_KINDS)
+
+    def __getattr__(self, name):
+        if name in self._recording:
+            return self._recording[name]
+        return getattr(self._nas, name)
+
+
+class LedgerConnection(object):
+    """ Context manager recording what the scripts create on a connection.
+    """
+
+    def __init__(self, connection, ledger):
+        self.connection = connection
+        self.ledger = ledger
+
+    def __enter__(self):
+        return RecordingNas(self.connection.__enter__(), self.ledger)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        return self.connection.__exit__(exc_type, exc_value, tb)
+
+
+class SharedConnection(object):
+    """ Hands out an already open connection without closing it on exit, so
+    the scripts can keep using "with self.connect_to_nfs() as s".
+    """
+
+    def __init__(self, conn_args):
+        self.conn_args = conn_args
+
+    def __enter__(self):
+        return NaslibTest.shared_connections[self.conn_args][1]
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is not None and not issubclass(exc_type, AssertionError):
+            # the connection may be broken, the next test opens a new one
+            NaslibTest.close_shared_connection(self.conn_args)
+        return False
+
 
 class NaslibTest(unittest.TestCase):
 
+    # when set, tests in the same process share one connection per SFS,
+    # see naslib_batch.py
+    share_connections = False
+    shared_connections = {}
+
     def setUp(self):
         self.conn_args = tuple(sys.argv[1:4])
-        self.pool_name = "litp2"
-        ip = sys.argv[1]
-        key = SSHClient.get_remote_host_key(ip)
-        SSHClient.save_host_key(ip, key)
+        self.pool_name = POOL_NAME
+        # "SFS" or "VA" as the harness identified it, None when unknown
+        self.filestore_solution = os.environ.get("NASLIB_FILESTORE_SOLUTION")
+        if not os.environ.get(SIMULATOR_ENV):
+            ensure_host_key(sys.argv[1])
+        # durations of the naslib calls of the test, see naslib_profile.py
+        self.profile = Profile() if os.environ.get(PROFILE_ENV) else None
+        # golden images checked out, released in tearDown
+        self.golden_images = []
+
+    def tearDown(self):
+        for golden in getattr(self, "golden_images", []):
+            golden.release()
+        profile = getattr(self, "profile", None)
+        if profile is not None and profile.calls:
+            print "\n".join(format_summary(profile.summary()))
+
+    def run(self, result=None):
+        logs = buffered_logging()
+        if logs is None:
+            return super(NaslibTest, self).run(result)
+        result = result if result is not None else self.defaultTestResult()
+        problems = len(result.failures) + len(result.errors)
+        logs.discard()
+        try:
+            return super(NaslibTest, self).run(result)
+        finally:
+            if len(result.failures) + len(result.errors) > problems:
+                logs.flush()
+            else:
+                logs.discard()
+
+    def connect_to_nfs(self, shared=True):
+        # shared=False opens a connection of its own even in a batch, for
+        # a script that works on several connections at the same time
+        if not use_sfs_simulator(self.conn_args):
+            use_ssh_broker(self.conn_args)
+        if not (shared and NaslibTest.share_connections):
+            connection = NasConnection(*self.conn_args)
+        else:
+            if self.conn_args not in NaslibTest.shared_connections:
+                conn = NasConnection(*self.conn_args)
+                NaslibTest.shared_connections[self.conn_args] = \
+                    (conn, conn.__enter__())
+            connection = SharedConnection(self.conn_args)
+        profile = getattr(self, "profile", None)
+        if profile is not None:
+            connection = ProfilingConnection(connection, profile)
+        ledger = Ledger.from_env()
+        if ledger is None:
+            return connection
+        return LedgerConnection(connection, ledger)
+
+    def fs_and_cache(self, s, fs_name, cache_name, fs_size, cache_size,
+                     cache_resize=None):
+        """ Gives a file system and a cache to work on. When the harness runs
+        a fixture pool they are leased from it and their names returned,
+        otherwise they are created, and checked, under the given names.
+        """
+        pool = FixturePool.from_env()
+        ledger = Ledger.from_env()
+        if pool is not None and ledger is not None:
+            # the pool owns the stack, the test ledger only notes the lease
+            nas = s._nas if isinstance(s, RecordingNas) else s
+            ledger.record("lease", "fixture", [])
+            return pool.lease(nas, self.conn_args[0], ledger.path,
+                              self.pool_name, fs_size, cache_size,
+                              cache_resize)
+
+        fs_existence = s.filesystem.exists(fs_name)
+        self.assertFalse(fs_existence, '%s already exists' % fs_name)
+        new_fs = s.filesystem.create(fs_name, fs_size, self.pool_name)
+        fs_existence = s.filesystem.exists(fs_name)
+        self.assertTrue(fs_existence, '%s does not exists' % fs_name)
+        filesystems = s.filesystem.list()
+        self.assertTrue(len(filesystems) > 0)
+        fs_names = [f.name for f in filesystems]
+        self.assertTrue(fs_name in fs_names,
+                        '%s not in %s' % (new_fs.name, fs_names))
+        fs = s.filesystem.get(fs_name)
+        self.assertEquals(fs.name, fs_name)
+        self.assertEquals(fs.pool.name, self.pool_name)
+
+        cache_existence = s.cache.exists(cache_name)
+        self.assertFalse(cache_existence, '%s should not exist' % cache_name)
+        new_cache = s.cache.create(cache_name, cache_size, self.pool_name)
+        if cache_resize:
+            new_cache.resize(cache_resize)
+        return fs_name, cache_name
+
+    def restore_scenario(self, s, fs_name, cache_name, snap_name, fs_size,
+                         cache_size, data_mb, files):
+        """ Gives a file system with the snapshot snap_name taken of it and
+        data_mb megabytes in files rewritten since, ready to be restored.
+        With golden images on, the file system comes from the golden image
+        of those sizes and its name is returned. Otherwise it is created,
+        and checked, under the given names and the data written twice.
+        """
+        golden = GoldenImage.from_env(self.conn_args[0], fs_size, cache_size,
+                                      data_mb, files)
+        nas = s._nas if isinstance(s, RecordingNas) else s
+        if golden is not None:
+            # the golden image stays on the SFS, the ledger only gets the
+            # test snapshot
+            fs_name, cache_name = golden.checkout(nas, self.pool_name)
+            self.golden_images.append(golden)
+        else:
+            fs_name, cache_name = self.fs_and_cache(s, fs_name, cache_name,
+                                                    fs_size, cache_size)
+            seed(s, fs_name, data_mb, files)
+
+        snap_existence = s.snapshot.exists(snap_name)
+        self.assertFalse(snap_existence, '%s already exists' % snap_name)
+        new_snap = s.snapshot.create(snap_name, fs_name, cache_name)
+        snap_existence = s.snapshot.exists(snap_name)
+        self.assertTrue(snap_existence, '%s does not exists' % snap_name)
+        snapshots = s.snapshot.list()
+        self.assertTrue(len(snapshots) > 0)
+        snap_names = [sn.name for sn in snapshots]
+        self.assertTrue(snap_name in snap_names,
+                        '%s not in %s' % (new_snap.name, snap_names))
+        snap = s.snapshot.get(snap_name)
+        self.assertEquals(snap.name, snap_name)
+
+        if golden is not None:
+            golden.rewrite(nas)
+        else:
+            seed(s, fs_name, data_mb, files)
+        return fs_name
+
+    @classmethod
+    def close_shared_connection(cls, conn_args):
+        conn, _ = cls.shared_connections.pop(conn_args)
+        conn.__exit__(None, None, None)
 
-    def connect_to_nfs(self):
-        return NasConnection(*self.conn_args)
+    @classmethod
+    def close_shared_connections(cls):
+        for conn_args in list(cls.shared_connections):
+            cls.close_shared_connection(conn_args)
@@ -1,42 +1,91 @@
 import sys
-import time
 import unittest
 
-from naslibtest import NaslibTest
+from naslibtest import NaslibTest, Ledger
+from naslib_fixtures import FixturePool
+from naslib_teardown import TeardownExecutor, plan
+from naslib_wait import wait_for_rollsync
 
 from naslib.nasexceptions import DeletionException, DoesNotExist
 from naslib.objects import Snapshot
 
 
+# deletes given up after as many rollsyncs in a row
+ROLLSYNC_RETRIES = 3
+
+
 class TestTearDown(NaslibTest):
-    """ TearDown script for naslib tests
+    """ TearDown script for naslib tests. When the harness gives a ledger
+    only the resources recorded in it are deleted, otherwise every resource
+    named on the command line is tried.
     """
-    def silently_delete(self, resource, *args):
+    def setUp(self):
+        self.ledger = Ledger.from_env()
+        if self.ledger is not None and self.ledger.is_empty():
+            self.skipTest("the test created nothing")
+        super(TestTearDown, self).setUp()
+
+    def silently_delete(self, s, kind, *args):
+        resource = getattr(s, kind)
+        for _ in range(ROLLSYNC_RETRIES):
+            try:
+                resource.delete(*args)
+                return
+            except Snapshot.RollsyncRunning:
+                # because sometimes a snapshot deletion fails because restore
+                # is still in progress.
+                fs_name = args[1] if kind == "snapshot" else args[0]
+                wait_for_rollsync(s, fs_name)
+            except (DeletionException, DoesNotExist) as err:
+                print err
+                return
         try:
             resource.delete(*args)
-        except Snapshot.RollsyncRunning:
-            # because sometimes a snapshot deletion fails because restore is
-            # still in progress.
-            time.sleep(2)
-            self.silently_delete(resource, *args)
-        except (DeletionException, DoesNotExist) as err:
-            print err
-            pass
+        except DoesNotExist:
+            # gone once the last rollsync finished
+            return
+        except Snapshot.RollsyncRunning as err:
+            raise DeletionException(
+                "%s %s not deleted, rollsync still running after %d waits: "
+                "%s" % (kind, ", ".join(args), ROLLSYNC_RETRIES, err))
 
-    def test_01(self):
+    def resources_to_delete(self):
+        if self.ledger is not None:
+            return self.ledger.live_resources()
         new_fs_name = sys.argv[4]
         new_share_name = sys.argv[5]
         new_cache_name = sys.argv[6]
         new_snap_name = sys.argv[7]
         extra_snap_name = sys.argv[8] if len(sys.argv) > 8 else None
         host_ip = sys.argv[1]
+        snapshots = [(new_snap_name, new_fs_name)]
+        if extra_snap_name:
+            snapshots.append((extra_snap_name, new_fs_name))
+        return {"share": [(new_share_name, host_ip)],
+                "snapshot": snapshots,
+                "filesystem": [(new_fs_name,)],
+                "cache": [(new_cache_name,)]}
+
+    def delete_task(self, s, task):
+        self.silently_delete(s, task.kind, *task.args)
+
+    def test_01(self):
+        resources = self.resources_to_delete()
+        # stacks leased from the fixture pool go back to it, not away
+        leased = resources.pop("fixture", None)
+        tasks = plan(resources)
+        executor = TeardownExecutor(
+            self.delete_task, lambda: self.connect_to_nfs(shared=False))
         with self.connect_to_nfs() as s:
-            self.silently_delete(s.share, new_share_name, host_ip)
-            self.silently_delete(s.snapshot, new_snap_name, new_fs_name)
-            if extra_snap_name:
-                self.silently_delete(s.snapshot, extra_snap_name, new_fs_name)
-            self.silently_delete(s.filesystem, new_fs_name)
-            self.silently_delete(s.cache, new_cache_name)
+            finished = executor.run(tasks, s)
+            failed = [task for task in finished if task.error]
+            self.assertEqual([], failed, "\n".join(
+                "%r: %s" % (task, task.error) for task in failed))
+            pool = FixturePool.from_env()
+            if leased and pool is not None:
+                pool.release(s, self.conn_args[0], self.ledger.path)
+        if self.ledger is not None:
+            self.ledger.clear()
 
 
 if __name__ == "__main__":
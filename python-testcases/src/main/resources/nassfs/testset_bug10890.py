@@ -6,12 +6,11 @@
 
 """
 
-import os
+from litp_generic_test import attr
+from nas_sfs_base import NasSfsBase, naslib_script
 
-from litp_generic_test import GenericTest, attr
 
-
-class NasSfs(GenericTest):
+class NasSfs(NasSfsBase):
     """
     Bug LITPCDS-10890
     Create SFS snapshot fails when cache is at 100%
@@ -22,127 +21,65 @@ class NasSfs(GenericTest):
         Description:
             Runs before every test
         Actions:
-            Determine
-                management server,
-                list of all managed nodes
-                location of script src dir
+            Name the extra snapshot the script tries to create
         Results:
             Class variables that are required to execute tests
         """
         super(NasSfs, self).setUp()
-        self.management_server = self.get_management_node_filename()
-        self.nas_server = self.get_sfs_node_filenames()[0]
-        self.nas_server_ip = self.get_node_att(self.nas_server, "ipv4")
-        self.nas_server_user = self.get_node_att(self.nas_server, "username")
-        self.nas_server_pw = self.get_node_att(self.nas_server, "password")
-        self.list_managed_nodes = self.get_managed_node_filenames()
-        current_dir = os.path.dirname(os.path.realpath(__file__))
-        self.script_src_dir = os.path.join(current_dir, "scripts")
-        self.remote_path = "/tmp"
-        self.test_fs_name = "some_fs"
-        self.test_share_name = "/vx/some_fs"
-        self.test_cache_name = "some_cache"
-        self.test_snapshot_name = "some_snap"
-        self.test_extra_snapshot_name = "extra_snap"
-
-        self.python_path = "/usr/bin/python"
-        self.copy_script_to_ms("test_teardown.py")
-        self.copy_script_to_ms("naslibtest.py")
+        self.test_extra_snapshot_name = \
+            self.resource_names(self._testMethodName)["extra_snapshot"]
 
-    def tearDown(self):
-        """
-        Description:
-            Runs after every single test
-        Actions:
-            -
-        Results:
-            The super class prints out diagnostics and variables
-        """
-        script_path = self.script_remote_location("test_teardown.py")
-        _, stderr, _ = self.run_script(script_path,
-                    [self.nas_server_ip, self.nas_server_user,
-                     self.nas_server_pw, self.test_fs_name,
-                     self.test_share_name, self.test_cache_name,
-                     self.test_snapshot_name, self.test_extra_snapshot_name])
-        self.assertTrue(self.is_text_in_list("OK", stderr),
-                "\n".join(stderr))
-        super(NasSfs, self).tearDown()
-
-    def script_remote_location(self, script_name):
-        """Give the remote location for for a script, given it's name.
+    def resource_names(self, test_name):
+        """Give the names of the SFS resources a test works with, which
+        include an extra snapshot.
         Args:
-            script_name. (str) The script file name
-        Returns:
-            str. The script remote location
-        """
-        return os.path.join(self.remote_path, script_name)
+            test_name. (str) The test method name
 
-    def script_local_location(self, script_name):
-        """Give the local location for for a script, given it's name.
-        Args:
-            script_name. (str) The script file name
         Returns:
-            str. The script local location
+            dict. The resource names
         """
-        return os.path.join(self.script_src_dir, script_name)
-
-    def copy_script_to_ms(self, script):
-        """Copy a script to a MS
+        names = super(NasSfs, self).resource_names(test_name)
+        if self.namespace_resources:
+            names["extra_snapshot"] = names["snapshot"].replace("_snap",
+                                                                "_xsnap")
+        else:
+            names["extra_snapshot"] = "extra_snap"
+        return names
+
+    def teardown_params(self, names=None, node=None):
+        """Give the arguments for the teardown script.
         Args:
-            scripts. (str) A script file name
+            names. (dict) The resource names, the running test's if None
+            node. (str) The SFS node to delete them from, nas_server if None
 
         Returns:
-            bool. True if successful.
+            list. The connection details and the resource names to delete
         """
-        script_path = self.script_local_location(script)
-        copy_success = self.copy_file_to(self.management_server, script_path,
-                self.remote_path)
-        return copy_success
-
-    def run_script(self, script_path, args=None):
-        """Runs a python script.
+        names = names or self.resource_names(self._testMethodName)
+        return super(NasSfs, self).teardown_params(names, node) + \
+            [names["extra_snapshot"]]
+
+    def script_params(self, file_system=False, share=False, cache=False,
+                      snapshot=False, names=None, node=None):
+        """Give the arguments for the test script, which always takes the
+        file system, the cache and both snapshot names.
         Args:
-           script_path. (str) A string representing a script path on
-           the Ms file
-           system
-           args. (list) A list of args to be passed to the string
+            names. (dict) The resource names, the running test's if None
+            node. (str) The SFS node to run against, nas_server if None
 
         Returns:
-            stdout. (list) A list of the standart output
-            stderr. (list) A list of the standart error output
-            exit_code. (int) A integer represeting the exit code
-        """
-        args = args or []
-        args = ' '.join(args)
-        script_cmd = "%s %s %s" % (self.python_path, script_path, args)
-        stdout, stderr, exit_code = self.run_command(self.management_server,
-                script_cmd)
-        return stdout, stderr, exit_code
-
-    def _test_script(self, script_name):
-        """Runs a python test file on the MS
-        Args:
-            script_name. (str) The script's name
-        Returns:
-            stdout. (list) A list of the standard output
-            stderr. (list) A list of the standard error output
-            exit_code. (int) A integer representing the exit code
+            list. The connection details and the resource names
         """
-        script_path = self.script_remote_location(script_name)
-        params = [
-            self.nas_server_ip,
-            self.nas_server_user,
-            self.nas_server_pw,
-            self.test_fs_name,
-            self.test_cache_name,
-            self.test_snapshot_name,
-            self.test_extra_snapshot_name
+        names = names or self.resource_names(self._testMethodName)
+        return self.sfs_credentials(node or self.nas_server) + [
+            names["fs"],
+            names["cache"],
+            names["snapshot"],
+            names["extra_snapshot"]
         ]
-        stdout, stderr, exit_code = self.run_script(script_path, params)
-        self.assertTrue(self.is_text_in_list("OK", stderr), "\n".join(stderr))
-        return stdout, stderr, exit_code
 
     @attr('all', 'revert', 'bug10890', 'bug10890_tc01')
+    @naslib_script("bug_10890_test_01.py")
     def test_01_n_create_snapshot_when_cache_is_full(self):
         """
         @tms_id: litpcds_10890_tc01
@@ -164,7 +101,4 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "bug_10890_test_01.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script)
+        self._test_script()
@@ -0,0 +1,81 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: Benchmarks of the naslib library against the SFS
+"""
+
+from litp_generic_test import attr
+from nas_sfs_base import NasSfsBase, naslib_script
+
+
+class NasSfs(NasSfsBase):
+    """
+    Latency of the naslib operations and listings, saved as baselines on
+    the MS and compared with those of the previous ERIClitpnassfs build.
+    These are only run when selected with the 'benchmark' tag.
+    """
+
+    benchmark_baselines = True
+    # a sweep creates, restores and deletes a few gigabytes many times, the
+    # listings make and delete a thousand of every kind
+    script_timeout_secs = 14400
+
+    @attr('benchmark', 'naslib_benchmark_ops')
+    @naslib_script("benchmarks/naslib_ops_bench.py", file_system=True,
+                   cache=True, snapshot=True)
+    def test_01_naslib_operation_latency(self):
+        """
+        @tms_id: naslib_benchmark_tc01
+        @tms_title: Latency of the naslib operations by size
+        @tms_description: Time creating, resizing, snapshotting, restoring
+        and deleting file systems and caches over a sweep of sizes
+        @tms_test_steps:
+        @step: Run every operation a few times for every size
+        @result: The p50, p95 and max latencies are saved as a baseline
+        @step: Compare the baseline with the one of the previous build
+        @result: No operation got slower than the tolerance allows
+        @tms_test_precondition: NA
+        @tms_execution_type: Automated
+        """
+        self._test_script()
+
+    @attr('benchmark', 'naslib_benchmark_list')
+    @naslib_script("benchmarks/naslib_list_bench.py", file_system=True,
+                   cache=True, snapshot=True)
+    def test_02_naslib_listing_scalability(self):
+        """
+        @tms_id: naslib_benchmark_tc02
+        @tms_title: Latency and memory of the naslib listings by count
+        @tms_description: Time listing, checking and getting file systems,
+        shares and snapshots as up to a thousand of each are made
+        @tms_test_steps:
+        @step: Make up to 10, 100, 500 and 1000 of every kind
+        @result: The list, exists and get latencies and the memory of the
+        listings are saved as a baseline at every count
+        @step: Compare the baseline with the one of the previous build
+        @result: No lookup got slower than the tolerance allows
+        @tms_test_precondition: NA
+        @tms_execution_type: Automated
+        """
+        self._test_script()
+
+    @attr('benchmark', 'naslib_benchmark_stress')
+    @naslib_script("benchmarks/naslib_stress.py", file_system=True,
+                   cache=True, snapshot=True)
+    def test_03_naslib_concurrency_stress(self):
+        """
+        @tms_id: naslib_benchmark_tc03
+        @tms_title: naslib used from many threads at once
+        @tms_description: Run create, list and delete cycles from several
+        threads, first on a connection each, then on one shared connection
+        @tms_test_steps:
+        @step: Run the cycles on a connection per thread
+        @result: The throughput and the errors by class are reported, none
+        of the operations failed
+        @step: Run the cycles on one connection shared by the threads
+        @result: The throughput and the errors by class are reported, none
+        of the operations failed
+        @tms_test_precondition: NA
+        @tms_execution_type: Automated
+        """
+        self._test_script()
@@ -0,0 +1,69 @@
+"""
+@copyright: LM Ericsson Ltd
+@since: October 2026
+@summary: naslib scripts run against the SFS simulator on the MS
+"""
+
+from litp_generic_test import attr
+from nas_sfs_base import NasSfsBase, naslib_script
+
+
+class NasSfs(NasSfsBase):
+    """
+    Runs naslib scripts against naslib_sfs_sim.py, which the harness starts
+    on the MS, instead of the SFS nodes of the deployment. These are only
+    run when selected with the 'simulator' tag.
+    """
+
+    sfs_simulator = "127.0.0.1:2222"
+
+    @attr('simulator', 'naslib_simulator_tc01')
+    @naslib_script("test_01.py", file_system=True)
+    def test_01_p_create_fs_on_simulator(self):
+        """
+        @tms_id: naslib_simulator_tc01
+        @tms_title: Create a filesystem on the SFS simulator
+        @tms_description: Verify the file system script passes against the
+        simulator
+        @tms_test_steps:
+        @step: Start the SFS simulator on the MS
+        @result: The simulator listens
+        @step: Create a file-system through the simulator
+        @result: file-system is created and listed
+        @tms_test_precondition: NA
+        @tms_execution_type: Automated
+        """
+        self._test_script()
+
+    @attr('simulator', 'naslib_simulator_tc02')
+    @naslib_script("test_14.py", cache=True)
+    def test_02_p_create_cache_on_simulator(self):
+        """
+        @tms_id: naslib_simulator_tc02
+        @tms_title: Create a cache on the SFS simulator
+        @tms_description: Verify the cache script passes against the
+        simulator
+        @tms_test_steps:
+        @step: Create a cache through the simulator
+        @result: Cache is created and listed
+        @tms_test_precondition: NA
+        @tms_execution_type: Automated
+        """
+        self._test_script()
+
+    @attr('simulator', 'naslib_simulator_tc03')
+    @naslib_script("test_21.py", file_system=True, cache=True, snapshot=True)
+    def test_03_p_create_snapshot_on_simulator(self):
+        """
+        @tms_id: naslib_simulator_tc03
+        @tms_title: Create a snapshot on the SFS simulator
+        @tms_description: Verify the snapshot script passes against the
+        simulator
+        @tms_test_steps:
+        @step: Create a file-system, a cache and a snapshot through the
+        simulator
+        @result: Snapshot is created and listed
+        @tms_test_precondition: NA
+        @tms_execution_type: Automated
+        """
+        self._test_script()
@@ -11,6 +11,7 @@ program(s) have been supplied.
 @summary:   Integration tests for Story: TORF-275856
 """
 from litp_generic_test import GenericTest, attr
+from filestore_solution import FilestoreSolution
 from redhat_cmd_utils import RHCmdUtils
 from litp_cli_utils import CLIUtils
 import test_constants
@@ -33,7 +34,7 @@ CONSTANT_OPTIONS_LIST = \
     CONSTANT_OPTIONS.keys()
 
 
-class Story275856(GenericTest):
+class Story275856(FilestoreSolution, GenericTest):
     """
     TORF-275856:
     As a LITP user I want be able to modify the 'options'
@@ -392,45 +393,6 @@ class Story275856(GenericTest):
             opposite_options.append(CONSTANT_OPTIONS[option])
         return opposite_options
 
-    def identify_filestore_solution(self, node):
-        """
-        Function to identify whether the filestore solution
-        utilised in the deployment is SFS or VA.
-
-        Args:
-            node (str): Connection data file name of the
-                        filestore server name.
-
-        Returns:
-            str. Identifier of filestore solution: VA / SFS.
-        """
-        # THERE IS NO INDEPENDENT VERSION COMMAND THAT
-        # IDENTIFIES THE SOLUTION INSTALLED. THE SSH
-        # BANNER SEEMS TO BE THE EASIEST IDENTIFIER TO ACCESS.
-        # FIND THE BANNER FILE.
-        find_cmd = \
-            self.redhat.get_find_cmd("/ -name banner")
-        find_cmd = "/usr{0}".format(find_cmd)
-        # IGNORE ANY UPGRADE RPM DIRS AND FOCUS ON THE LIVE CONFIG
-        find_cmd = \
-            find_cmd + " |{0} -v upgrade".format(self.redhat.grep_path)
-        stdout, _, _ = \
-            self.run_command(node, find_cmd)
-        self.assertNotEqual([], stdout)
-        # GATHER THE HEADER INFO
-        cat_cmd = self.redhat.get_cat_cmd(stdout[0])
-        stdout, _, _ = \
-            self.run_command(node, cat_cmd)
-        # BASE DECISION ON BANNER CONTENT.
-        if self.is_text_in_list("Symantec FileStore", stdout):
-            return "SFS"
-        elif self.is_text_in_list("Veritas Access", stdout):
-            return "VA"
-        else:
-            # RAISE AN ASSERTION AS FILESTORE SOLUTION NOT KNOWN
-            self.assertTrue(False,
-                            "Filestore solution not ascertained.")
-
     @attr('all', 'revert', 'story275856', 'story275856_tc01')
     def test_01_p_verify_initial_sfs_export_options(self):
         """
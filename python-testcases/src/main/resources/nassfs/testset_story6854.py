@@ -5,151 +5,23 @@
 @sumary: Integration tests for naslib library
 
 """
-from litp_generic_test import GenericTest, attr
+from litp_generic_test import attr
+from nas_sfs_base import NasSfsBase, naslib_script
 import test_constants
-import os
 
 
-class NasSfs(GenericTest):
+class NasSfs(NasSfsBase):
     """
     LITPCDS-6854
     As a LITP Architect, I want to have separate PSL library for SFS, so I can
     split specific SFS implementation from LITP plugin.
     """
 
-    def setUp(self):
-        """
-        Description:
-            Runs before every test
-        Actions:
-            Determine
-                management server,
-                list of all managed nodes
-                location of script src dir
-        Results:
-            Class variables that are required to execute tests
-        """
-
-        super(NasSfs, self).setUp()
-        self.management_server = self.get_management_node_filename()
-        self.nas_server = self.get_sfs_node_filenames()[0]
-        self.nas_server_ip = self.get_node_att(self.nas_server, "ipv4")
-        self.nas_server_user = self.get_node_att(self.nas_server, "username")
-        self.nas_server_pw = self.get_node_att(self.nas_server, "password")
-        self.list_managed_nodes = self.get_managed_node_filenames()
-        current_dir = os.path.dirname(os.path.realpath(__file__))
-        self.script_src_dir = os.path.join(current_dir, "scripts")
-        self.remote_path = "/tmp"
-        self.test_fs_name = "some_fs"
-        self.test_share_name = "/vx/some_fs"
-        self.test_cache_name = "some_cache"
-        self.test_snapshot_name = "some_snap"
-
-        self.python_path = "/usr/bin/python"
-        self.copy_script_to_ms("test_teardown.py")
-        self.copy_script_to_ms("naslibtest.py")
-
-    def tearDown(self):
-        """
-        Description:
-            Runs after every single test
-        Actions:
-            -
-        Results:
-            The super class prints out diagnostics and variables
-        """
-        script_path = self.script_remote_location("test_teardown.py")
-        _, stderr, _ = self.run_script(script_path,
-                    [self.nas_server_ip, self.nas_server_user,
-                        self.nas_server_pw, self.test_fs_name,
-                        self.test_share_name, self.test_cache_name,
-                        self.test_snapshot_name])
-        self.assertTrue(self.is_text_in_list("OK", stderr),
-                "\n".join(stderr))
-        super(NasSfs, self).tearDown()
-
-    def script_remote_location(self, script_name):
-        """Give the remote location for for a script, given it's name.
-        Args:
-            script_name. (str) The script file name
-        Returns:
-            str. The script remote location
-        """
-        return os.path.join(self.remote_path, script_name)
-
-    def script_local_location(self, script_name):
-        """Give the local location for for a script, given it's name.
-        Args:
-            script_name. (str) The script file name
-        Returns:
-            str. The script local location
-        """
-        return os.path.join(self.script_src_dir, script_name)
-
-    def copy_script_to_ms(self, script):
-        """Copy a script to a MS
-        Args:
-            scripts. (str) A script file name
-
-        Returns:
-            bool. True if successful.
-        """
-        script_path = self.script_local_location(script)
-        copy_success = self.copy_file_to(self.management_server, script_path,
-                self.remote_path)
-        return copy_success
-
-    def run_script(self, script_path, args=None):
-        """Runs a python script.
-        Args:
-           script_path. (str) A string representing a script path on
-           the Ms file
-           system
-           args. (list) A list of args to be passed to the string
-
-        Returns:
-            stdout. (list) A list of the standart output
-            stderr. (list) A list of the standart error output
-            exit_code. (int) A integer represeting the exit code
-        """
-        args = args or []
-        args = ' '.join(args)
-        script_cmd = "%s %s %s" % (self.python_path, script_path, args)
-        stdout, stderr, exit_code = self.run_command(self.management_server,
-                script_cmd)
-        return stdout, stderr, exit_code
-
-    def _test_script(self, script_name, file_system=False, share=False,
-                     cache=False, snapshot=False):
-        """Runs a python test file on the MS
-        Args:
-            script_name. (str) The script's name
-            fs. (bool) A flag indicating if the script must
-            create a file system
-            share. (bool) A flag indicating if the script must create a share
-
-        Returns:
-            stdout. (list) A list of the standart output
-            stderr. (list) A list of the standart error output
-            exit_code. (int) A integer represeting the exit code
-
-        """
-        script_path = self.script_remote_location(script_name)
-        params = [self.nas_server_ip, self.nas_server_user, self.nas_server_pw]
-        if file_system:
-            params += [self.test_fs_name]
-        if share:
-            params += [self.test_share_name]
-        if cache:
-            params += [self.test_cache_name]
-        if snapshot:
-            params += [self.test_snapshot_name]
-        stdout, stderr, exit_code = self.run_script(script_path, params)
-        self.assertTrue(self.is_text_in_list("OK", stderr),
-                "\n".join(stderr))
-        return stdout, stderr, exit_code
+    # test_21 to test_23 snapshot a file system and cache they lease
+    use_fixture_pool = True
 
     @attr('all', 'revert', 'story6854', 'story6854_tc01')
+    @naslib_script("test_01.py", file_system=True)
     def test_01_p_create_fs(self):
         """
         @tms_id: litpcds_6854_tc01
@@ -162,10 +34,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_01.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -174,6 +43,7 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_fs_name))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc02')
+    @naslib_script("test_02.py", file_system=True)
     def test_02_n_duplicate_fs_creation(self):
         """
         @tms_id: litpcds_6854_tc02
@@ -189,12 +59,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_02.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc03')
+    @naslib_script("test_03.py", file_system=True)
     def test_03_p_delete_fs(self):
         """
         @tms_id: litpcds_6854_tc03
@@ -209,10 +77,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_03.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -221,6 +86,7 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_fs_name))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc04')
+    @naslib_script("test_04.py", file_system=True)
     def test_04_n_delete_nonexistent_fs(self):
         """
         @tms_id: litpcds_6854_tc04
@@ -234,12 +100,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_04.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc05')
+    @naslib_script("test_05.py", file_system=True)
     def test_05_n_fs_size_too_large(self):
         """
         @tms_id: litpcds_6854_tc05
@@ -254,12 +118,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_05.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc06')
+    @naslib_script("test_06.py", file_system=True)
     def test_06_n_fs_with_invalid_pool(self):
         """
         @tms_id: litpcds_6854_tc06
@@ -273,12 +135,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_06.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc07')
+    @naslib_script("test_07.py", file_system=True, share=True)
     def test_07_p_create_share(self):
         """
         @tms_id: litpcds_6854_tc07
@@ -293,10 +153,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_07.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True, share=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -318,11 +175,10 @@ class NasSfs(GenericTest):
 
         """
         test_script = "test_08.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
         self._test_script(test_script, file_system=True, share=True)
 
     @attr('all', 'revert', 'story6854', 'story6854_tc09')
+    @naslib_script("test_09.py", file_system=True, share=True)
     def test_09_p_delete_share(self):
         """
         @tms_id: litpcds_6854_tc09
@@ -337,10 +193,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_09.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True, share=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -349,6 +202,7 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_share_name))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc10')
+    @naslib_script("test_10.py", file_system=True, share=True)
     def test_10_n_delete_nonexistent_share(self):
         """
         @tms_id: litpcds_6854_tc10
@@ -362,12 +216,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_10.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True, share=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc11')
+    @naslib_script("test_11.py")
     def test_11_p_query_pools(self):
         """
         @tms_id: litpcds_6854_tc11
@@ -380,12 +232,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_11.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc12')
+    @naslib_script("test_12.py")
     def test_12_p_query_disks(self):
         """
         @tms_id: litpcds_6854_tc12
@@ -398,12 +248,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_12.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc13')
+    @naslib_script("test_13.py")
     def test_13_p_vxcommands(self):
         """
         @tms_id: litpcds_6854_tc13
@@ -416,12 +264,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_13.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc14')
+    @naslib_script("test_14.py", cache=True)
     def test_14_p_create_cache(self):
         """
         @tms_id: litpcds_6854_tc14
@@ -436,10 +282,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_14.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, cache=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -448,6 +291,7 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_cache_name))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc15')
+    @naslib_script("test_15.py", cache=True)
     def test_15_n_duplicate_cache_creation(self):
         """
         @tms_id: litpcds_6854_tc15
@@ -463,12 +307,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_15.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, cache=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc16')
+    @naslib_script("test_16.py", cache=True)
     def test_16_p_delete_cache(self):
         """
         @tms_id: litpcds_6854_tc16
@@ -483,10 +325,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_16.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, cache=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -495,6 +334,7 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_cache_name))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc17')
+    @naslib_script("test_17.py", cache=True)
     def test_17_n_delete_nonexistent_cache(self):
         """
         @tms_id: litpcds_6854_tc17
@@ -508,12 +348,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_17.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, cache=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc18')
+    @naslib_script("test_18.py", cache=True)
     def test_18_n_cache_size_too_large(self):
         """
         @tms_id: litpcds_6854_tc18
@@ -527,12 +365,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_18.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, cache=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc19')
+    @naslib_script("test_19.py", cache=True)
     def test_19_n_cache_with_invalid_pool(self):
         """
         @tms_id: litpcds_6854_tc19
@@ -546,12 +382,10 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_19.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, cache=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc20')
+    @naslib_script("test_20.py", cache=True)
     def test_20_p_resize_cache(self):
         """
         @tms_id: litpcds_6854_tc20
@@ -566,10 +400,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_20.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, cache=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -578,6 +409,8 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_cache_name, "20"))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc21')
+    @naslib_script("test_21.py", file_system=True, cache=True, snapshot=True,
+                   fixture=("10M", "10M", "20M"))
     def test_21_p_create_snapshot(self):
         """
         @tms_id: litpcds_6854_tc21
@@ -592,11 +425,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_21.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True,
-                          cache=True, snapshot=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -605,6 +434,8 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_snapshot_name))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc22')
+    @naslib_script("test_22.py", file_system=True, cache=True, snapshot=True,
+                   fixture=("10M", "10M", "20M"))
     def test_22_n_duplicate_snap_creation(self):
         """
         @tms_id: litpcds_6854_tc22
@@ -622,13 +453,11 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_22.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True,
-                          cache=True, snapshot=True)
+        self._test_script()
 
     @attr('all', 'revert', 'story6854', 'story6854_tc23')
+    @naslib_script("test_23.py", file_system=True, cache=True, snapshot=True,
+                   fixture=("10M", "10M", "20M"))
     def test_23_p_delete_snapshot(self):
         """
         @tms_id: litpcds_6854_tc23
@@ -645,11 +474,7 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_23.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True,
-                          cache=True, snapshot=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -658,6 +483,7 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_snapshot_name))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc24')
+    @naslib_script("test_24.py", file_system=True)
     def test_24_p_resize_filesystem(self):
         """
         @tms_id: litpcds_6854_tc24
@@ -673,10 +499,7 @@ class NasSfs(GenericTest):
         @tms_execution_type: Automated
 
         """
-        test_script = "test_24.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
@@ -685,6 +508,7 @@ class NasSfs(GenericTest):
             self.nas_server, self.test_fs_name, size="20.00M"))
 
     @attr('all', 'revert', 'story6854', 'story6854_tc25')
+    @naslib_script("test_25.py", file_system=True)
     def test_25_n_shrink_filesystem(self):
         """
         @tms_id: litpcds_6854_tc25
@@ -700,13 +524,34 @@ class NasSfs(GenericTest):
         @tms_test_precondition: NA
         @tms_execution_type: Automated
         """
-        test_script = "test_25.py"
-        copy_success = self.copy_script_to_ms(test_script)
-        self.assertTrue(copy_success, "Failed to copy files to MS")
-        self._test_script(test_script, file_system=True)
+        self._test_script()
         self.assertTrue(
             self.set_node_connection_data(
                 self.nas_server, username=test_constants.SFS_MASTER_USR,
                 password=test_constants.SFS_MASTER_PW))
         self.assertTrue(self.is_sfs_filesystem_present(
             self.nas_server, self.test_fs_name, size="10.00M"))
+
+    @attr('batch', 'story6854_batch')
+    def test_26_p_run_all_scripts_in_batch(self):
+        """Run the naslib script of every story 6854 test in a single
+        interpreter on the MS
+        Inside the batch:
+            run each test script, sharing one connection to the SFS
+            run the teardown script after each of them
+        Outside the batch:
+        - Check every script and teardown passed
+        """
+        self._test_declared_scripts_batch()
+
+    @attr('parallel', 'story6854_parallel')
+    def test_27_p_run_all_scripts_in_parallel(self):
+        """Run the naslib script of every story 6854 test on the MS, up to
+        max_parallel_scripts at a time, each on resources of its own
+        Inside the batch:
+            run the test scripts in worker processes
+            run the teardown script after each of them
+        Outside the batch:
+        - Check every script and teardown passed
+        """
+        self._test_declared_scripts_batch(parallel=True)